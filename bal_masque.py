@@ -1,1115 +1,5008 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""
-🎭 BAL MASQUÉ
-Outil militant d'anonymisation des visages et métadonnées
-Niveau professionnel de suppression des données sensibles
-Licence GPL-3.0
-"""
-
-import cv2
-import tkinter as tk
-from tkinter import filedialog, messagebox, font as tkfont
-from PIL import Image, ImageTk
-from PIL.ExifTags import TAGS, GPSTAGS
-from pathlib import Path
-import numpy as np
-import webbrowser
-import ctypes
-import sys
-import os
-from datetime import datetime
-import struct
-import re
-import shutil
-
-
-def enable_high_dpi():
-    if sys.platform == 'win32':
-        try:
-            ctypes.windll.shcore.SetProcessDpiAwareness(2)
-        except:
-            try:
-                ctypes.windll.user32.SetProcessDPIAware()
-            except:
-                pass
-
-
-enable_high_dpi()
-
-
-class Style:
-    """Styles centralisés"""
-    
-    BG = '#0f0f1a'
-    BG_PANEL = '#1a1a2e'
-    ACCENT = '#ff2d55'
-    ACCENT_HOVER = '#ff5c7c'
-    SECONDARY = '#00e5a0'
-    SECONDARY_HOVER = '#4dffc3'
-    HIGHLIGHT = '#ffe600'
-    PURPLE = '#a855f7'
-    PURPLE_HOVER = '#c084fc'
-    ORANGE = '#ff9500'
-    CYAN = '#00d4ff'
-    PINK = '#ff6bcb'
-    TEXT = '#ffffff'
-    TEXT_DIM = '#b8b8d0'
-    TEXT_MUTED = '#7878a0'
-    CANVAS_BG = '#08080f'
-    LINK = '#5cb8ff'
-    WHITE = '#ffffff'
-    BLACK = '#000000'
-    SUCCESS = '#00e5a0'
-    WARNING = '#ff9500'
-    CRITICAL = '#ff2d55'
-    
-    FONT = None
-    FONT_MONO = None
-    
-    @classmethod
-    def init(cls, root):
-        available = list(tkfont.families())
-        
-        for f in ['Inter', 'Segoe UI', 'SF Pro Display', 'Helvetica Neue', 'Arial']:
-            if f in available:
-                cls.FONT = f
-                break
-        cls.FONT = cls.FONT or 'TkDefaultFont'
-        
-        for f in ['JetBrains Mono', 'Fira Code', 'Consolas', 'Monaco']:
-            if f in available:
-                cls.FONT_MONO = f
-                break
-        cls.FONT_MONO = cls.FONT_MONO or 'monospace'
-
-
-class MetadataManager:
-    """Gestionnaire professionnel de métadonnées"""
-    
-    SENSITIVE_TAGS = {
-        'GPSInfo': '🌍 Position GPS',
-        'GPSLatitude': '🌍 Latitude',
-        'GPSLongitude': '🌍 Longitude',
-        'GPSAltitude': '🌍 Altitude',
-        'DateTime': '📅 Date/Heure',
-        'DateTimeOriginal': '📅 Date originale',
-        'DateTimeDigitized': '📅 Date numérisation',
-        'Make': '📱 Fabricant',
-        'Model': '📱 Modèle appareil',
-        'Software': '💻 Logiciel',
-        'HostComputer': '💻 Ordinateur',
-        'Artist': '👤 Artiste',
-        'Copyright': '©️ Copyright',
-        'ImageUniqueID': '🔢 ID unique',
-        'BodySerialNumber': '🔢 N° série',
-        'LensSerialNumber': '🔢 N° série objectif',
-    }
-    
-    @staticmethod
-    def get_all_metadata(image_path):
-        """Extraction complète des métadonnées"""
-        result = {
-            'exif': {},
-            'gps': None,
-            'sensibles': [],
-            'all_tags': {},
-            'file_info': {},
-            'risk_score': 0,
-            'hidden_data': []
-        }
-        
-        try:
-            stat = os.stat(image_path)
-            result['file_info'] = {
-                'Taille': f"{stat.st_size / 1024:.1f} Ko",
-                'Modifié': datetime.fromtimestamp(stat.st_mtime).strftime('%d/%m/%Y %H:%M'),
-                'Chemin': str(image_path)
-            }
-            
-            img = Image.open(image_path)
-            result['file_info']['Format'] = img.format
-            result['file_info']['Dimensions'] = f"{img.size[0]}x{img.size[1]}"
-            result['file_info']['Mode'] = img.mode
-            
-            exif_data = img._getexif()
-            if exif_data:
-                for tag_id, value in exif_data.items():
-                    tag_name = TAGS.get(tag_id, str(tag_id))
-                    
-                    if tag_name == 'GPSInfo' and isinstance(value, dict):
-                        gps_data = {}
-                        for gps_tag_id, gps_value in value.items():
-                            gps_tag_name = GPSTAGS.get(gps_tag_id, str(gps_tag_id))
-                            gps_data[gps_tag_name] = gps_value
-                        
-                        coords = MetadataManager._extract_gps_coords(gps_data)
-                        if coords:
-                            result['gps'] = coords
-                            result['risk_score'] += 40
-                    
-                    try:
-                        if isinstance(value, bytes):
-                            value = value.decode('utf-8', errors='replace')[:100]
-                        result['all_tags'][tag_name] = str(value)[:200]
-                    except:
-                        result['all_tags'][tag_name] = "[Binaire]"
-                    
-                    if tag_name in MetadataManager.SENSITIVE_TAGS:
-                        result['sensibles'].append({
-                            'tag': tag_name,
-                            'label': MetadataManager.SENSITIVE_TAGS[tag_name],
-                            'value': str(value)[:100]
-                        })
-                        result['risk_score'] += 10
-            
-            with open(image_path, 'rb') as f:
-                binary_data = f.read()
-            
-            emails = re.findall(rb'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', binary_data)
-            for email in emails[:5]:
-                result['hidden_data'].append(f"📧 Email: {email.decode('utf-8', errors='replace')}")
-                result['risk_score'] += 15
-            
-            urls = re.findall(rb'https?://[^\s<>"{}|\\^`\[\]]+', binary_data)
-            for url in urls[:5]:
-                result['hidden_data'].append(f"🔗 URL: {url.decode('utf-8', errors='replace')[:60]}")
-                result['risk_score'] += 5
-            
-            if b'\xff\xd8\xff' in binary_data[20:]:
-                result['hidden_data'].append("🖼️ Miniature EXIF embarquée détectée")
-                result['risk_score'] += 20
-            
-            result['risk_score'] = min(100, result['risk_score'])
-            
-        except Exception as e:
-            result['error'] = str(e)
-        
-        return result
-    
-    @staticmethod
-    def _extract_gps_coords(gps_data):
-        try:
-            def convert_to_degrees(value):
-                if isinstance(value, tuple) and len(value) == 3:
-                    d, m, s = float(value[0]), float(value[1]), float(value[2])
-                    return d + (m / 60.0) + (s / 3600.0)
-                return None
-            
-            lat = convert_to_degrees(gps_data.get('GPSLatitude'))
-            lon = convert_to_degrees(gps_data.get('GPSLongitude'))
-            
-            if lat is None or lon is None:
-                return None
-            
-            if gps_data.get('GPSLatitudeRef', 'N') == 'S':
-                lat = -lat
-            if gps_data.get('GPSLongitudeRef', 'E') == 'W':
-                lon = -lon
-            
-            return {
-                'lat': lat, 'lon': lon,
-                'display': f"{abs(lat):.6f}°{'N' if lat >= 0 else 'S'}, {abs(lon):.6f}°{'E' if lon >= 0 else 'W'}",
-                'osm': f"https://www.openstreetmap.org/?mlat={lat}&mlon={lon}&zoom=15"
-            }
-        except:
-            return None
-    
-    @staticmethod
-    def remove_all_metadata(image_path, output_path=None):
-        try:
-            if output_path is None:
-                output_path = image_path
-            
-            img = Image.open(image_path)
-            clean_img = Image.new(img.mode, img.size)
-            clean_img.putdata(list(img.getdata()))
-            
-            ext = Path(output_path).suffix.lower()
-            
-            if ext in ['.jpg', '.jpeg']:
-                clean_img.save(output_path, 'JPEG', quality=95, exif=b'')
-            elif ext == '.png':
-                clean_img.save(output_path, 'PNG')
-            elif ext == '.webp':
-                clean_img.save(output_path, 'WEBP', quality=95, exif=b'')
-            else:
-                clean_img.save(output_path)
-            
-            if ext in ['.jpg', '.jpeg']:
-                MetadataManager._clean_jpeg_segments(output_path)
-            
-            check = MetadataManager.get_all_metadata(output_path)
-            
-            return {
-                'success': True,
-                'sensibles_restants': len(check.get('sensibles', [])),
-                'risk_score': check.get('risk_score', 0)
-            }
-            
-        except Exception as e:
-            return {'success': False, 'message': str(e)}
-    
-    @staticmethod
-    def _clean_jpeg_segments(filepath):
-        try:
-            with open(filepath, 'rb') as f:
-                data = f.read()
-            
-            for marker in [b'\xff\xe1', b'\xff\xed', b'\xff\xfe']:
-                while marker in data:
-                    idx = data.find(marker)
-                    if idx == -1:
-                        break
-                    length = struct.unpack('>H', data[idx+2:idx+4])[0]
-                    data = data[:idx] + data[idx+2+length:]
-            
-            with open(filepath, 'wb') as f:
-                f.write(data)
-        except:
-            pass
-
-
-class BalMasque:
-    """Application principale"""
-    
-    VERSION = "2.0"
-    
-    def __init__(self):
-        # D'abord le disclaimer
-        if not self.show_disclaimer():
-            return
-        
-        # Puis l'application principale
-        self.root = tk.Tk()
-        self.root.title("🎭 Bal Masqué")
-        self.root.configure(bg=Style.BG)
-        
-        # Plein écran
-        self.root.state('zoomed')  # Windows
-        try:
-            self.root.attributes('-zoomed', True)  # Linux
-        except:
-            pass
-        
-        self.root.minsize(1200, 800)
-        
-        Style.init(self.root)
-        
-        # Variables
-        self.image_path = None
-        self.image_original = None
-        self.image_processed = None
-        self.image_display = None
-        self.faces_detected = []
-        self.manual_boxes = []
-        self.mode = tk.StringVar(value="auto")
-        self.effect_var = tk.StringVar(value="pixelate")
-        self.intensity_var = tk.IntVar(value=20)
-        self.metadata_enabled = tk.BooleanVar(value=True)
-        self.metadata_info = None
-        
-        self.start_x = 0
-        self.start_y = 0
-        self.current_rect = None
-        self.scale_ratio = 1.0
-        self.offset_x = 0
-        self.offset_y = 0
-        
-        self.build_ui()
-        self.bind_shortcuts()
-        self.root.mainloop()
-    
-    def load_logo(self, size=90):
-        logo_paths = [
-            Path(__file__).parent / "logo.png",
-            Path(__file__).parent / "assets" / "logo.png",
-            Path("logo.png"),
-        ]
-        
-        for path in logo_paths:
-            if path.exists():
-                try:
-                    img = Image.open(path)
-                    img.thumbnail((size, size), Image.Resampling.LANCZOS)
-                    return ImageTk.PhotoImage(img)
-                except:
-                    pass
-        return None
-    
-    def center_window(self, win, w, h):
-        win.update_idletasks()
-        x = (win.winfo_screenwidth() - w) // 2
-        y = (win.winfo_screenheight() - h) // 2
-        win.geometry(f"{w}x{h}+{x}+{y}")
-    
-    def show_disclaimer(self):
-        """Fenêtre de bienvenue"""
-        enable_high_dpi()
-        
-        win = tk.Tk()
-        win.title("Bal Masqué")
-        win.configure(bg=Style.BG)
-        
-        Style.init(win)
-        self.center_window(win, 550, 620)
-        
-        accepted = [False]
-        
-        def accept():
-            accepted[0] = True
-            win.quit()
-            win.destroy()
-        
-        def on_close():
-            win.quit()
-            win.destroy()
-        
-        win.protocol("WM_DELETE_WINDOW", on_close)
-        
-        canvas = tk.Canvas(win, bg=Style.BG, highlightthickness=0)
-        scrollbar = tk.Scrollbar(win, orient='vertical', command=canvas.yview)
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        scrollbar.pack(side='right', fill='y')
-        canvas.pack(side='left', fill='both', expand=True)
-        
-        main = tk.Frame(canvas, bg=Style.BG)
-        canvas.create_window((0, 0), window=main, anchor='nw')
-        
-        content = tk.Frame(main, bg=Style.BG)
-        content.pack(expand=True, fill='both', padx=45, pady=35)
-        
-        # Logo
-        logo = self.load_logo(90)
-        if logo:
-            lbl = tk.Label(content, image=logo, bg=Style.BG)
-            lbl.image = logo
-            lbl.pack(pady=(0, 10))
-        else:
-            lbl = tk.Label(content, text="🎭 Bal Masqué", font=(Style.FONT, 22, 'bold'), bg=Style.BG, fg=Style.ACCENT)
-            lbl.pack(pady=(0, 10))
-        
-        sub = tk.Label(content, text="Floutage de visages • Hors-ligne", font=(Style.FONT, 11), bg=Style.BG, fg=Style.CYAN)
-        sub.pack(pady=(0, 25))
-        
-        # Métaphore
-        metaphor_frame = tk.Frame(content, bg=Style.PURPLE, padx=3, pady=3)
-        metaphor_frame.pack(fill='x', pady=(0, 25))
-        
-        metaphor_inner = tk.Frame(metaphor_frame, bg=Style.BG_PANEL, padx=20, pady=18)
-        metaphor_inner.pack(fill='x')
-        
-        metaphor_text = """Au bal masqué, chacun·e choisit ce qu'iel révèle.
-
-Dans la rue comme au carnaval, le masque protège.
-Il permet d'exister sans être fiché, de défiler sans être ciblé.
-
-Vos images restent sur votre machine."""
-        
-        tk.Label(
-            metaphor_inner, text=metaphor_text,
-            font=(Style.FONT, 11), bg=Style.BG_PANEL, fg=Style.TEXT,
-            justify='left', wraplength=420
-        ).pack()
-        
-        # Bouton principal
-        btn = tk.Button(
-            content, text="Accéder au bal →",
-            command=accept, padx=25, pady=12,
-            font=(Style.FONT, 12, 'bold'),
-            bg=Style.SECONDARY, fg=Style.BLACK,
-            activebackground=Style.SECONDARY_HOVER,
-            activeforeground=Style.BLACK,
-            relief='flat', cursor='hand2'
-        )
-        btn.pack(pady=(0, 25))
-        
-        # Ressources dépliantes
-        resources_frame = tk.Frame(content, bg=Style.BG)
-        resources_frame.pack(fill='x')
-        
-        expanded = [False]
-        resources_content = [None]
-        
-        def toggle_resources():
-            expanded[0] = not expanded[0]
-            
-            if expanded[0]:
-                toggle_btn.config(text="▾ Ressources", fg=Style.PINK)
-                rc = tk.Frame(resources_frame, bg=Style.BG)
-                rc.pack(fill='x', pady=(10, 0))
-                resources_content[0] = rc
-                
-                resources = [
-                    ("La Quadrature du Net", "https://www.laquadrature.net", "Libertés numériques"),
-                    ("Technopolice", "https://technopolice.fr", "Surveillance urbaine"),
-                    ("Guide Boum", "https://guide.boum.org", "Autodéfense numérique"),
-                ]
-                
-                for name, url, desc in resources:
-                    row = tk.Frame(rc, bg=Style.BG)
-                    row.pack(fill='x', pady=3)
-                    
-                    link = tk.Label(row, text=f"★ {name}", font=(Style.FONT, 10, 'underline'), bg=Style.BG, fg=Style.LINK, cursor='hand2')
-                    link.pack(side='left')
-                    link.bind('<Button-1>', lambda e, u=url: webbrowser.open(u))
-                    
-                    tk.Label(row, text=f" — {desc}", font=(Style.FONT, 10), bg=Style.BG, fg=Style.TEXT_DIM).pack(side='left')
-                
-                main.update_idletasks()
-                canvas.configure(scrollregion=canvas.bbox('all'))
-            else:
-                toggle_btn.config(text="▸ Ressources", fg=Style.TEXT_DIM)
-                if resources_content[0]:
-                    resources_content[0].destroy()
-                main.update_idletasks()
-                canvas.configure(scrollregion=canvas.bbox('all'))
-        
-        toggle_btn = tk.Button(
-            resources_frame, text="▸ Ressources",
-            command=toggle_resources,
-            font=(Style.FONT, 10),
-            bg=Style.BG, fg=Style.TEXT_DIM,
-            activebackground=Style.BG, activeforeground=Style.PINK,
-            relief='flat', cursor='hand2', bd=0
-        )
-        toggle_btn.pack(anchor='w')
-        
-        tk.Label(
-            content,
-            text="GPL-3.0 • github.com/comenottaris/BAL-MASQUE",
-            font=(Style.FONT, 9),
-            bg=Style.BG, fg=Style.TEXT_MUTED
-        ).pack(pady=(25, 0))
-        
-        main.update_idletasks()
-        canvas.configure(scrollregion=canvas.bbox('all'))
-        
-        canvas.bind_all('<MouseWheel>', lambda e: canvas.yview_scroll(int(-1 * (e.delta / 120)), 'units'))
-        
-        win.mainloop()
-        return accepted[0]
-    
-    def build_ui(self):
-        """Construction de l'interface"""
-        main = tk.Frame(self.root, bg=Style.BG)
-        main.pack(fill='both', expand=True)
-        
-        # === SIDEBAR GAUCHE (contrôles) ===
-        sidebar = tk.Frame(main, bg=Style.BG, width=320)
-        sidebar.pack(side='left', fill='y', padx=15, pady=15)
-        sidebar.pack_propagate(False)
-        
-        # Scrollable
-        s_canvas = tk.Canvas(sidebar, bg=Style.BG, highlightthickness=0)
-        s_scroll = tk.Scrollbar(sidebar, orient='vertical', command=s_canvas.yview)
-        s_frame = tk.Frame(s_canvas, bg=Style.BG)
-        
-        s_frame.bind("<Configure>", lambda e: s_canvas.configure(scrollregion=s_canvas.bbox("all")))
-        s_canvas.create_window((0, 0), window=s_frame, anchor='nw', width=300)
-        s_canvas.configure(yscrollcommand=s_scroll.set)
-        
-        s_canvas.pack(side='left', fill='both', expand=True)
-        s_scroll.pack(side='right', fill='y')
-        
-        content = s_frame
-        
-        # Logo + titre
-        logo = self.load_logo(70)
-        if logo:
-            lbl = tk.Label(content, image=logo, bg=Style.BG)
-            lbl.image = logo
-            lbl.pack(pady=(0, 5))
-        else:
-            tk.Label(content, text="🎭", font=('Segoe UI Emoji', 32), bg=Style.BG, fg=Style.ACCENT).pack()
-        
-        tk.Label(content, text="Bal Masqué", font=(Style.FONT, 16, 'bold'), bg=Style.BG, fg=Style.TEXT).pack()
-        tk.Label(content, text="v2.0 • Hors-ligne", font=(Style.FONT, 9), bg=Style.BG, fg=Style.TEXT_MUTED).pack(pady=(0, 15))
-        
-        # === SECTION IMAGE ===
-        self.create_section(content, "📷 IMAGE")
-        
-        img_btns = tk.Frame(content, bg=Style.BG)
-        img_btns.pack(fill='x', pady=5)
-        
-        btn_open = tk.Button(img_btns, text="📂 Ouvrir", font=(Style.FONT, 10, 'bold'),
-                            bg=Style.SECONDARY, fg=Style.BLACK, relief='flat', cursor='hand2',
-                            padx=15, pady=6, command=self.load_image)
-        btn_open.pack(side='left', expand=True, fill='x', padx=(0, 3))
-        
-        btn_save = tk.Button(img_btns, text="💾 Sauver", font=(Style.FONT, 10, 'bold'),
-                            bg=Style.ORANGE, fg=Style.BLACK, relief='flat', cursor='hand2',
-                            padx=15, pady=6, command=self.save_image)
-        btn_save.pack(side='left', expand=True, fill='x', padx=(3, 0))
-        
-        # === SECTION MÉTADONNÉES (dépliante) ===
-        self.create_collapsible_section(content, "🔒 MÉTADONNÉES", self.build_metadata_panel)
-        
-        # === SECTION DÉTECTION (dépliante) ===
-        self.create_collapsible_section(content, "🎯 DÉTECTION", self.build_detection_panel)
-        
-        # === SECTION EFFET (dépliante) ===
-        self.create_collapsible_section(content, "🎨 EFFET", self.build_effect_panel)
-        
-        # === SECTION ACTIONS ===
-        self.create_section(content, "⚡ ACTIONS")
-        
-        act_row1 = tk.Frame(content, bg=Style.BG)
-        act_row1.pack(fill='x', pady=3)
-        
-        btn_detect = tk.Button(act_row1, text="🔍 Détecter", font=(Style.FONT, 10),
-                              bg=Style.PURPLE, fg=Style.WHITE, relief='flat', cursor='hand2',
-                              padx=10, pady=6, command=self.detect_faces)
-        btn_detect.pack(side='left', expand=True, fill='x', padx=(0, 3))
-        
-        btn_apply = tk.Button(act_row1, text="✨ Appliquer", font=(Style.FONT, 10),
-                             bg=Style.CYAN, fg=Style.BLACK, relief='flat', cursor='hand2',
-                             padx=10, pady=6, command=self.apply_blur)
-        btn_apply.pack(side='left', expand=True, fill='x', padx=(3, 0))
-        
-        act_row2 = tk.Frame(content, bg=Style.BG)
-        act_row2.pack(fill='x', pady=3)
-        
-        btn_undo = tk.Button(act_row2, text="↩ Annuler zone", font=(Style.FONT, 10),
-                            bg=Style.BG_PANEL, fg=Style.TEXT, relief='flat', cursor='hand2',
-                            padx=10, pady=6, command=self.undo_last_box)
-        btn_undo.pack(side='left', expand=True, fill='x', padx=(0, 3))
-        
-        btn_reset = tk.Button(act_row2, text="🔄 Reset", font=(Style.FONT, 10),
-                             bg=Style.ACCENT, fg=Style.WHITE, relief='flat', cursor='hand2',
-                             padx=10, pady=6, command=self.reset_image)
-        btn_reset.pack(side='left', expand=True, fill='x', padx=(3, 0))
-        
-        # Compteur
-        self.counter_label = tk.Label(content, text="Zones : 0", font=(Style.FONT, 12, 'bold'),
-                                     fg=Style.HIGHLIGHT, bg=Style.BG)
-        self.counter_label.pack(pady=15)
-        
-        # Indicateur métadonnées
-        self.meta_indicator = tk.Label(content, text="", font=(Style.FONT, 9),
-                                      fg=Style.TEXT_DIM, bg=Style.BG, wraplength=280)
-        self.meta_indicator.pack(pady=5)
-        
-        # === ZONE CENTRALE (image) ===
-        center = tk.Frame(main, bg=Style.CANVAS_BG)
-        center.pack(side='left', fill='both', expand=True, padx=(0, 15), pady=15)
-        
-        # Barre de statut
-        self.status_bar = tk.Label(center, text="Prêt — Ctrl+O pour ouvrir", font=(Style.FONT, 10),
-                                  bg=Style.BG_PANEL, fg=Style.TEXT_DIM, anchor='w', padx=15, pady=8)
-        self.status_bar.pack(fill='x')
-        
-        # Canvas
-        self.canvas = tk.Canvas(center, bg=Style.CANVAS_BG, highlightthickness=0)
-        self.canvas.pack(fill='both', expand=True)
-        
-        self.canvas.bind('<ButtonPress-1>', self.on_canvas_press)
-        self.canvas.bind('<B1-Motion>', self.on_canvas_drag)
-        self.canvas.bind('<ButtonRelease-1>', self.on_canvas_release)
-        
-        self.show_welcome()
-    
-    def create_section(self, parent, title):
-        """Titre de section simple"""
-        frame = tk.Frame(parent, bg=Style.BG)
-        frame.pack(fill='x', pady=(15, 5))
-        
-        tk.Frame(frame, bg=Style.CYAN, height=1).pack(fill='x', pady=(0, 5))
-        tk.Label(frame, text=title, font=(Style.FONT, 9, 'bold'), fg=Style.CYAN, bg=Style.BG).pack(anchor='w')
-    
-    def create_collapsible_section(self, parent, title, build_func):
-        """Section dépliante"""
-        container = tk.Frame(parent, bg=Style.BG)
-        container.pack(fill='x', pady=(10, 0))
-        
-        expanded = [False]
-        content_frame = [None]
-        
-        def toggle():
-            expanded[0] = not expanded[0]
-            if expanded[0]:
-                btn.config(text=f"▾ {title}", fg=Style.PINK)
-                cf = tk.Frame(container, bg=Style.BG_PANEL, padx=10, pady=10)
-                cf.pack(fill='x', pady=(5, 0))
-                content_frame[0] = cf
-                build_func(cf)
-            else:
-                btn.config(text=f"▸ {title}", fg=Style.CYAN)
-                if content_frame[0]:
-                    content_frame[0].destroy()
-        
-        btn = tk.Button(container, text=f"▸ {title}", font=(Style.FONT, 10, 'bold'),
-                       bg=Style.BG, fg=Style.CYAN, relief='flat', cursor='hand2', bd=0,
-                       anchor='w', command=toggle)
-        btn.pack(fill='x')
-    
-    def build_metadata_panel(self, parent):
-        """Contenu du panneau métadonnées"""
-        cb = tk.Checkbutton(parent, text="Supprimer à la sauvegarde", variable=self.metadata_enabled,
-                           font=(Style.FONT, 10), fg=Style.TEXT, bg=Style.BG_PANEL,
-                           selectcolor=Style.PURPLE, activebackground=Style.BG_PANEL)
-        cb.pack(anchor='w', pady=3)
-        
-        btns = tk.Frame(parent, bg=Style.BG_PANEL)
-        btns.pack(fill='x', pady=5)
-        
-        tk.Button(btns, text="🔍 Analyser", font=(Style.FONT, 9),
-                 bg=Style.CYAN, fg=Style.BLACK, relief='flat', cursor='hand2',
-                 padx=8, pady=4, command=self.show_metadata_report).pack(side='left', padx=(0, 5))
-        
-        tk.Button(btns, text="🧹 Nettoyer", font=(Style.FONT, 9),
-                 bg=Style.ACCENT, fg=Style.WHITE, relief='flat', cursor='hand2',
-                 padx=8, pady=4, command=self.clean_metadata_now).pack(side='left')
-    
-    def build_detection_panel(self, parent):
-        """Contenu du panneau détection"""
-        for val, txt in [("auto", "🤖 Automatique"), ("manual", "✋ Manuel (dessiner)")]:
-            rb = tk.Radiobutton(parent, text=txt, variable=self.mode, value=val,
-                               font=(Style.FONT, 10), fg=Style.TEXT, bg=Style.BG_PANEL,
-                               selectcolor=Style.PURPLE, activebackground=Style.BG_PANEL)
-            rb.pack(anchor='w', pady=2)
-    
-    def build_effect_panel(self, parent):
-        """Contenu du panneau effet"""
-        for val, txt in [("pixelate", "▦ Pixelisation"), ("blur", "◐ Flou gaussien"), ("black", "■ Noir")]:
-            rb = tk.Radiobutton(parent, text=txt, variable=self.effect_var, value=val,
-                               font=(Style.FONT, 10), fg=Style.TEXT, bg=Style.BG_PANEL,
-                               selectcolor=Style.PURPLE, activebackground=Style.BG_PANEL)
-            rb.pack(anchor='w', pady=2)
-        
-        tk.Label(parent, text="Intensité:", font=(Style.FONT, 9), fg=Style.TEXT_DIM, bg=Style.BG_PANEL).pack(anchor='w', pady=(10, 0))
-        
-        slider = tk.Scale(parent, from_=5, to=50, orient='horizontal', variable=self.intensity_var,
-                         bg=Style.BG_PANEL, fg=Style.TEXT, highlightthickness=0,
-                         troughcolor=Style.BG, activebackground=Style.PINK,
-                         command=lambda v: self.apply_blur() if self.image_processed is not None else None)
-        slider.pack(fill='x')
-    
-    def show_welcome(self):
-        self.canvas.delete("all")
-        self.canvas.update()
-        cx = self.canvas.winfo_width() // 2 or 400
-        cy = self.canvas.winfo_height() // 2 or 300
-        
-        self.canvas.create_text(cx, cy - 30, text="🎭", font=('Segoe UI Emoji', 48), fill=Style.ACCENT)
-        self.canvas.create_text(cx, cy + 40, text="Glissez une image ou cliquez sur Ouvrir",
-                               font=(Style.FONT, 14), fill=Style.TEXT_DIM)
-        self.canvas.create_text(cx, cy + 70, text="Ctrl+O pour ouvrir • Ctrl+S pour sauver",
-                               font=(Style.FONT, 11), fill=Style.TEXT_MUTED)
-    
-    def bind_shortcuts(self):
-        self.root.bind('<Control-o>', lambda e: self.load_image())
-        self.root.bind('<Control-s>', lambda e: self.save_image())
-        self.root.bind('<Control-z>', lambda e: self.undo_last_box())
-        self.root.bind('<Control-d>', lambda e: self.detect_faces())
-    
-    def update_status(self, text):
-        self.status_bar.config(text=text)
-    
-    def update_counter(self):
-        total = len(self.faces_detected) + len(self.manual_boxes)
-        self.counter_label.config(text=f"Zones : {total}")
-    
-    def load_image(self):
-        path = filedialog.askopenfilename(
-            title="Ouvrir une image",
-            filetypes=[("Images", "*.jpg *.jpeg *.png *.bmp *.webp"), ("Tous", "*.*")]
-        )
-        
-        if path:
-            self.image_path = path
-            self.image_original = cv2.imread(path)
-            
-            if self.image_original is None:
-                messagebox.showerror("Erreur", "Impossible de charger l'image")
-                return
-            
-            self.image_processed = self.image_original.copy()
-            self.faces_detected = []
-            self.manual_boxes = []
-            self.update_counter()
-            self.analyze_metadata()
-            self.display_image()
-            self.update_status(f"Image chargée : {Path(path).name}")
-    
-    def analyze_metadata(self):
-        if not self.image_path:
-            return
-        
-        self.metadata_info = MetadataManager.get_all_metadata(self.image_path)
-        
-        if self.metadata_info:
-            risk = self.metadata_info.get('risk_score', 0)
-            sensibles = len(self.metadata_info.get('sensibles', []))
-            gps = self.metadata_info.get('gps')
-            
-            if risk >= 50:
-                color, icon = Style.CRITICAL, "⚠️"
-            elif risk >= 25:
-                color, icon = Style.WARNING, "⚡"
-            else:
-                color, icon = Style.SUCCESS, "✓"
-            
-            text = f"{icon} Risque: {risk}/100"
-            if sensibles > 0:
-                text += f" • {sensibles} données sensibles"
-            if gps:
-                text += "\n🌍 GPS DÉTECTÉ !"
-            
-            self.meta_indicator.config(text=text, fg=color)
-    
-    def show_metadata_report(self):
-        """Rapport de métadonnées - fenêtre agrandie"""
-        if not self.image_path:
-            messagebox.showwarning("Aucune image", "Chargez d'abord une image")
-            return
-        
-        if not self.metadata_info:
-            self.analyze_metadata()
-        
-        report = self.metadata_info
-        
-        win = tk.Toplevel(self.root)
-        win.title("🔍 Rapport de sécurité - Métadonnées")
-        win.configure(bg=Style.BG)
-        
-        # Fenêtre plus grande
-        win_w, win_h = 850, 700
-        x = (win.winfo_screenwidth() - win_w) // 2
-        y = (win.winfo_screenheight() - win_h) // 2
-        win.geometry(f"{win_w}x{win_h}+{x}+{y}")
-        
-        # Scrollable
-        canvas = tk.Canvas(win, bg=Style.BG, highlightthickness=0)
-        scrollbar = tk.Scrollbar(win, orient='vertical', command=canvas.yview)
-        frame = tk.Frame(canvas, bg=Style.BG, padx=35, pady=25)
-        
-        frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=frame, anchor='nw', width=win_w - 40)
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        scrollbar.pack(side='right', fill='y')
-        canvas.pack(side='left', fill='both', expand=True)
-        
-        # Titre
-        tk.Label(frame, text="🔍 RAPPORT DE SÉCURITÉ", font=(Style.FONT, 20, 'bold'),
-                fg=Style.ACCENT, bg=Style.BG).pack(anchor='w', pady=(0, 20))
-        
-        # Score
-        risk = report.get('risk_score', 0)
-        if risk >= 50:
-            risk_color, risk_text = Style.CRITICAL, "CRITIQUE"
-        elif risk >= 25:
-            risk_color, risk_text = Style.WARNING, "ÉLEVÉ"
-        else:
-            risk_color, risk_text = Style.SUCCESS, "FAIBLE"
-        
-        risk_frame = tk.Frame(frame, bg=Style.BG_PANEL, padx=25, pady=20)
-        risk_frame.pack(fill='x', pady=(0, 20))
-        
-        tk.Label(risk_frame, text=f"Score de risque : {risk}/100 — {risk_text}",
-                font=(Style.FONT, 16, 'bold'), fg=risk_color, bg=Style.BG_PANEL).pack(anchor='w')
-        
-        # GPS
-        if report.get('gps'):
-            gps = report['gps']
-            gps_frame = tk.Frame(frame, bg=Style.CRITICAL, padx=3, pady=3)
-            gps_frame.pack(fill='x', pady=15)
-            
-            gps_inner = tk.Frame(gps_frame, bg=Style.BG_PANEL, padx=20, pady=15)
-            gps_inner.pack(fill='x')
-            
-            tk.Label(gps_inner, text="🌍 POSITION GPS DÉTECTÉE", font=(Style.FONT, 14, 'bold'),
-                    fg=Style.CRITICAL, bg=Style.BG_PANEL).pack(anchor='w')
-            tk.Label(gps_inner, text=gps['display'], font=(Style.FONT_MONO, 12),
-                    fg=Style.TEXT, bg=Style.BG_PANEL).pack(anchor='w', pady=8)
-            
-            tk.Button(gps_inner, text="🗺️ Voir sur la carte", font=(Style.FONT, 11),
-                     fg=Style.BLACK, bg=Style.ORANGE, relief='flat', cursor='hand2',
-                     padx=15, pady=6, command=lambda: webbrowser.open(gps['osm'])).pack(anchor='w')
-        
-        # Données sensibles
-        sensibles = report.get('sensibles', [])
-        if sensibles:
-            tk.Label(frame, text=f"\n⚠️ DONNÉES SENSIBLES ({len(sensibles)})",
-                    font=(Style.FONT, 14, 'bold'), fg=Style.WARNING, bg=Style.BG).pack(anchor='w')
-            
-            for item in sensibles:
-                tk.Label(frame, text=f"  {item['label']}: {item['value'][:60]}",
-                        font=(Style.FONT, 11), fg=Style.TEXT_DIM, bg=Style.BG).pack(anchor='w', pady=2)
-        
-        # Données cachées
-        hidden = report.get('hidden_data', [])
-        if hidden:
-            tk.Label(frame, text=f"\n🔎 DONNÉES CACHÉES ({len(hidden)})",
-                    font=(Style.FONT, 14, 'bold'), fg=Style.PINK, bg=Style.BG).pack(anchor='w')
-            
-            for item in hidden:
-                tk.Label(frame, text=f"  {item}", font=(Style.FONT, 11),
-                        fg=Style.TEXT_DIM, bg=Style.BG).pack(anchor='w', pady=2)
-        
-        # Toutes métadonnées
-        all_tags = report.get('all_tags', {})
-        if all_tags:
-            tk.Label(frame, text=f"\n📋 TOUTES LES MÉTADONNÉES ({len(all_tags)})",
-                    font=(Style.FONT, 14, 'bold'), fg=Style.CYAN, bg=Style.BG).pack(anchor='w')
-            
-            tags_frame = tk.Frame(frame, bg=Style.BG_PANEL, padx=15, pady=15)
-            tags_frame.pack(fill='x', pady=10)
-            
-            for i, (tag, value) in enumerate(list(all_tags.items())[:25]):
-                tk.Label(tags_frame, text=f"{tag}: {value[:70]}", font=(Style.FONT, 10),
-                        fg=Style.TEXT_DIM, bg=Style.BG_PANEL, anchor='w').pack(anchor='w', pady=1)
-            
-            if len(all_tags) > 25:
-                tk.Label(tags_frame, text=f"... et {len(all_tags) - 25} autres",
-                        font=(Style.FONT, 10), fg=Style.TEXT_MUTED, bg=Style.BG_PANEL).pack(anchor='w')
-        
-        # Boutons
-        btn_frame = tk.Frame(frame, bg=Style.BG)
-        btn_frame.pack(pady=25)
-        
-        tk.Button(btn_frame, text="🧹 Tout nettoyer", font=(Style.FONT, 12, 'bold'),
-                 fg=Style.BLACK, bg=Style.SECONDARY, relief='flat', cursor='hand2',
-                 padx=25, pady=10, command=lambda: [self.clean_metadata_now(), win.destroy()]).pack(side='left', padx=10)
-        
-        tk.Button(btn_frame, text="Fermer", font=(Style.FONT, 12),
-                 fg=Style.TEXT, bg=Style.BG_PANEL, relief='flat', cursor='hand2',
-                 padx=25, pady=10, command=win.destroy).pack(side='left', padx=10)
-        
-        canvas.bind_all('<MouseWheel>', lambda e: canvas.yview_scroll(int(-1 * (e.delta / 120)), 'units'))
-    
-    def clean_metadata_now(self):
-        if not self.image_path:
-            messagebox.showwarning("Aucune image", "Chargez d'abord une image")
-            return
-        
-        if messagebox.askyesno("Confirmation", "Supprimer TOUTES les métadonnées ?\n\nUne sauvegarde sera créée."):
-            try:
-                backup = self.image_path + ".backup"
-                shutil.copy2(self.image_path, backup)
-                
-                result = MetadataManager.remove_all_metadata(self.image_path)
-                
-                if result['success']:
-                    self.analyze_metadata()
-                    messagebox.showinfo("Succès", f"✅ Métadonnées supprimées !\n\nSauvegarde : {Path(backup).name}")
-                else:
-                    messagebox.showerror("Erreur", result['message'])
-            except Exception as e:
-                messagebox.showerror("Erreur", str(e))
-    
-    def display_image(self):
-        if self.image_processed is None:
-            return
-        
-        image_rgb = cv2.cvtColor(self.image_processed, cv2.COLOR_BGR2RGB)
-        
-        self.canvas.update()
-        canvas_w = max(self.canvas.winfo_width(), 400)
-        canvas_h = max(self.canvas.winfo_height(), 300)
-        
-        img_h, img_w = image_rgb.shape[:2]
-        ratio_w = canvas_w / img_w
-        ratio_h = canvas_h / img_h
-        self.scale_ratio = min(ratio_w, ratio_h, 1.0)
-        
-        new_w = int(img_w * self.scale_ratio)
-        new_h = int(img_h * self.scale_ratio)
-        
-        image_resized = cv2.resize(image_rgb, (new_w, new_h), interpolation=cv2.INTER_AREA)
-        image_pil = Image.fromarray(image_resized)
-        self.image_display = ImageTk.PhotoImage(image_pil)
-        
-        self.canvas.delete("all")
-        self.offset_x = (canvas_w - new_w) // 2
-        self.offset_y = (canvas_h - new_h) // 2
-        
-        self.canvas.create_image(self.offset_x, self.offset_y, anchor=tk.NW, image=self.image_display)
-        self.draw_boxes()
-    
-    def draw_boxes(self):
-        self.canvas.delete("boxes")
-        
-        for (x, y, w, h) in self.faces_detected:
-            x1 = int(x * self.scale_ratio) + self.offset_x
-            y1 = int(y * self.scale_ratio) + self.offset_y
-            x2 = int((x + w) * self.scale_ratio) + self.offset_x
-            y2 = int((y + h) * self.scale_ratio) + self.offset_y
-            self.canvas.create_rectangle(x1, y1, x2, y2, outline=Style.SECONDARY, width=2, tags="boxes")
-        
-        for (x, y, w, h) in self.manual_boxes:
-            x1 = int(x * self.scale_ratio) + self.offset_x
-            y1 = int(y * self.scale_ratio) + self.offset_y
-            x2 = int((x + w) * self.scale_ratio) + self.offset_x
-            y2 = int((y + h) * self.scale_ratio) + self.offset_y
-            self.canvas.create_rectangle(x1, y1, x2, y2, outline=Style.ORANGE, width=2, tags="boxes")
-    
-    def on_canvas_press(self, event):
-        if self.mode.get() != "manual" or self.image_original is None:
-            return
-        self.start_x = event.x
-        self.start_y = event.y
-        self.current_rect = None
-    
-    def on_canvas_drag(self, event):
-        if self.mode.get() != "manual" or self.image_original is None:
-            return
-        if self.current_rect:
-            self.canvas.delete(self.current_rect)
-        self.current_rect = self.canvas.create_rectangle(
-            self.start_x, self.start_y, event.x, event.y,
-            outline=Style.ACCENT, width=2, dash=(4, 4)
-        )
-    
-    def on_canvas_release(self, event):
-        if self.mode.get() != "manual" or self.image_original is None:
-            return
-        if self.current_rect:
-            self.canvas.delete(self.current_rect)
-        
-        x1 = int((min(self.start_x, event.x) - self.offset_x) / self.scale_ratio)
-        y1 = int((min(self.start_y, event.y) - self.offset_y) / self.scale_ratio)
-        x2 = int((max(self.start_x, event.x) - self.offset_x) / self.scale_ratio)
-        y2 = int((max(self.start_y, event.y) - self.offset_y) / self.scale_ratio)
-        
-        if x2 - x1 > 10 and y2 - y1 > 10:
-            h, w = self.image_original.shape[:2]
-            x1, y1 = max(0, x1), max(0, y1)
-            x2, y2 = min(w, x2), min(h, y2)
-            
-            self.manual_boxes.append((x1, y1, x2 - x1, y2 - y1))
-            self.update_counter()
-            self.apply_blur()
-    
-    def detect_faces(self):
-        if self.image_original is None:
-            messagebox.showwarning("Aucune image", "Chargez d'abord une image")
-            return
-        
-        self.update_status("Détection en cours...")
-        self.root.update()
-        
-        cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        face_cascade = cv2.CascadeClassifier(cascade_path)
-        
-        gray = cv2.cvtColor(self.image_original, cv2.COLOR_BGR2GRAY)
-        gray = cv2.equalizeHist(gray)
-        
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-        self.faces_detected = list(faces) if len(faces) > 0 else []
-        
-        profile_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_profileface.xml')
-        profiles = profile_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-        
-        for p in profiles:
-            if not any(self._boxes_overlap(p, f) for f in self.faces_detected):
-                self.faces_detected.append(tuple(p))
-        
-        self.update_counter()
-        
-        if self.faces_detected:
-            self.update_status(f"{len(self.faces_detected)} visage(s) détecté(s)")
-            self.apply_blur()
-        else:
-            self.update_status("Aucun visage — Mode manuel recommandé")
-            messagebox.showinfo("Détection", "Aucun visage détecté.\n\nUtilisez le mode manuel (▸ DÉTECTION)")
-    
-    def _boxes_overlap(self, box1, box2, threshold=0.5):
-        x1, y1, w1, h1 = box1
-        x2, y2, w2, h2 = box2
-        
-        xi1, yi1 = max(x1, x2), max(y1, y2)
-        xi2, yi2 = min(x1 + w1, x2 + w2), min(y1 + h1, y2 + h2)
-        
-        if xi2 <= xi1 or yi2 <= yi1:
-            return False
-        
-        inter = (xi2 - xi1) * (yi2 - yi1)
-        return inter / min(w1 * h1, w2 * h2) > threshold
-    
-    def apply_blur(self):
-        if self.image_original is None:
-            return
-        
-        self.image_processed = self.image_original.copy()
-        all_boxes = self.faces_detected + self.manual_boxes
-        intensity = self.intensity_var.get()
-        effect = self.effect_var.get()
-        
-        for (x, y, w, h) in all_boxes:
-            roi = self.image_processed[y:y+h, x:x+w]
-            if roi.size == 0:
-                continue
-            
-            if effect == "pixelate":
-                pixel_size = max(2, intensity // 5)
-                small = cv2.resize(roi, (max(1, w // pixel_size), max(1, h // pixel_size)), interpolation=cv2.INTER_LINEAR)
-                blurred = cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
-            elif effect == "blur":
-                ksize = intensity * 2 + 1
-                blurred = cv2.GaussianBlur(roi, (ksize, ksize), 0)
-            elif effect == "black":
-                blurred = np.zeros_like(roi)
-            else:
-                blurred = roi
-            
-            self.image_processed[y:y+h, x:x+w] = blurred
-        
-        self.display_image()
-    
-    def undo_last_box(self):
-        if self.manual_boxes:
-            self.manual_boxes.pop()
-        elif self.faces_detected:
-            self.faces_detected.pop()
-        else:
-            return
-        
-        self.update_counter()
-        self.apply_blur()
-        self.update_status("Zone annulée")
-    
-    def reset_image(self):
-        if self.image_original is not None:
-            self.image_processed = self.image_original.copy()
-            self.faces_detected = []
-            self.manual_boxes = []
-            self.update_counter()
-            self.display_image()
-            self.update_status("Image réinitialisée")
-    
-    def save_image(self):
-        if self.image_processed is None:
-            messagebox.showwarning("Aucune image", "Aucune image à sauvegarder")
-            return
-        
-        default_name = f"bal_masque_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        
-        path = filedialog.asksaveasfilename(
-            defaultextension=".png",
-            initialfile=default_name,
-            filetypes=[("PNG (recommandé)", "*.png"), ("JPEG", "*.jpg"), ("WebP", "*.webp")]
-        )
-        
-        if path:
-            try:
-                cv2.imwrite(path, self.image_processed)
-                
-                if self.metadata_enabled.get():
-                    result = MetadataManager.remove_all_metadata(path)
-                    if result['success']:
-                        messagebox.showinfo("Succès", f"✅ Image sauvegardée :\n{path}\n\n✅ Métadonnées supprimées")
-                    else:
-                        messagebox.showwarning("Attention", f"Sauvegardée mais erreur métadonnées")
-                else:
-                    messagebox.showinfo("Succès", f"Image sauvegardée :\n{path}")
-                
-                self.update_status(f"Sauvegardé : {Path(path).name}")
-            except Exception as e:
-                messagebox.showerror("Erreur", str(e))
-
-
-if __name__ == "__main__":
-    BalMasque()
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🎭 BAL MASQUÉ
+Outil militant d'anonymisation des visages et métadonnées
+Niveau professionnel de suppression des données sensibles
+Licence GPL-3.0
+"""
+
+import cv2
+import tkinter as tk
+from tkinter import filedialog, messagebox, font as tkfont
+from PIL import Image, ImageTk, ImageSequence, TiffImagePlugin, JpegImagePlugin
+from PIL.ExifTags import TAGS, GPSTAGS
+from pathlib import Path
+import numpy as np
+import webbrowser
+import ctypes
+import sys
+import os
+from datetime import datetime
+import struct
+import select
+import signal
+import re
+import shutil
+import threading
+import queue
+import argparse
+import time
+import json
+import io
+import zlib
+import tempfile
+import hashlib
+import zipfile
+import tarfile
+import sqlite3
+import math
+import itertools
+import contextlib
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+
+def enable_high_dpi():
+    if sys.platform == 'win32':
+        try:
+            ctypes.windll.shcore.SetProcessDpiAwareness(2)
+        except:
+            try:
+                ctypes.windll.user32.SetProcessDPIAware()
+            except:
+                pass
+
+
+enable_high_dpi()
+
+
+class Style:
+    """Styles centralisés"""
+
+    BG = '#0f0f1a'
+    BG_PANEL = '#1a1a2e'
+    ACCENT = '#ff2d55'
+    ACCENT_HOVER = '#ff5c7c'
+    SECONDARY = '#00e5a0'
+    SECONDARY_HOVER = '#4dffc3'
+    HIGHLIGHT = '#ffe600'
+    PURPLE = '#a855f7'
+    PURPLE_HOVER = '#c084fc'
+    ORANGE = '#ff9500'
+    CYAN = '#00d4ff'
+    PINK = '#ff6bcb'
+    TEXT = '#ffffff'
+    TEXT_DIM = '#b8b8d0'
+    TEXT_MUTED = '#7878a0'
+    CANVAS_BG = '#08080f'
+    LINK = '#5cb8ff'
+    WHITE = '#ffffff'
+    BLACK = '#000000'
+    SUCCESS = '#00e5a0'
+    WARNING = '#ff9500'
+    CRITICAL = '#ff2d55'
+
+    FONT = None
+    FONT_MONO = None
+
+    @classmethod
+    def init(cls, root):
+        available = list(tkfont.families())
+
+        for f in ['Inter', 'Segoe UI', 'SF Pro Display', 'Helvetica Neue', 'Arial']:
+            if f in available:
+                cls.FONT = f
+                break
+        cls.FONT = cls.FONT or 'TkDefaultFont'
+
+        for f in ['JetBrains Mono', 'Fira Code', 'Consolas', 'Monaco']:
+            if f in available:
+                cls.FONT_MONO = f
+                break
+        cls.FONT_MONO = cls.FONT_MONO or 'monospace'
+
+
+class MetadataManager:
+    """Gestionnaire professionnel de métadonnées"""
+
+    SENSITIVE_TAGS = {
+        'GPSInfo': '🌍 Position GPS',
+        'GPSLatitude': '🌍 Latitude',
+        'GPSLongitude': '🌍 Longitude',
+        'GPSAltitude': '🌍 Altitude',
+        'DateTime': '📅 Date/Heure',
+        'DateTimeOriginal': '📅 Date originale',
+        'DateTimeDigitized': '📅 Date numérisation',
+        'Make': '📱 Fabricant',
+        'Model': '📱 Modèle appareil',
+        'Software': '💻 Logiciel',
+        'HostComputer': '💻 Ordinateur',
+        'Artist': '👤 Artiste',
+        'Copyright': '©️ Copyright',
+        'ImageUniqueID': '🔢 ID unique',
+        'BodySerialNumber': '🔢 N° série',
+        'LensSerialNumber': '🔢 N° série objectif',
+    }
+
+    @staticmethod
+    def get_all_metadata(image_path, data=None, on_disk=True):
+        """Extraction complète des métadonnées.
+
+        `data` : contenu du fichier déjà lu (ImageLoader.read_bytes), pour
+        ne pas relire le fichier ; sinon il est lu une seule fois ici.
+        `on_disk=False` : contenu sans fichier correspondant (membre
+        d'archive), le système de fichiers n'est pas consulté.
+        """
+        result = {
+            'exif': {},
+            'gps': None,
+            'sensibles': [],
+            'all_tags': {},
+            'file_info': {},
+            'risk_score': 0,
+            'hidden_data': []
+        }
+
+        try:
+            if data is not None and not on_disk:
+                result['file_info'] = {'Taille': f"{len(data) / 1024:.1f} Ko", 'Chemin': str(image_path)}
+            else:
+                stat = os.stat(image_path)
+                result['file_info'] = {
+                    'Taille': f"{stat.st_size / 1024:.1f} Ko",
+                    'Modifié': datetime.fromtimestamp(stat.st_mtime).strftime('%d/%m/%Y %H:%M'),
+                    'Chemin': str(image_path)
+                }
+
+            if data is None:
+                data = ImageLoader.read_bytes(image_path)
+
+            img = Image.open(io.BytesIO(data))
+            result['file_info']['Format'] = img.format
+            result['file_info']['Dimensions'] = f"{img.size[0]}x{img.size[1]}"
+            result['file_info']['Mode'] = img.mode
+
+            if hasattr(img, '_getexif'):
+                exif_data = img._getexif()
+            else:
+                # TIFF, GIF… : même contenu via getexif(), sous-IFD Exif et GPS compris
+                exif = img.getexif()
+                exif_data = dict(exif)
+                exif_data.update(exif.get_ifd(0x8769))
+                gps = exif.get_ifd(0x8825)
+                if gps:
+                    exif_data[0x8825] = dict(gps)
+            if exif_data:
+                for tag_id, value in exif_data.items():
+                    tag_name = TAGS.get(tag_id, str(tag_id))
+
+                    if tag_name == 'GPSInfo' and isinstance(value, dict):
+                        gps_data = {}
+                        for gps_tag_id, gps_value in value.items():
+                            gps_tag_name = GPSTAGS.get(gps_tag_id, str(gps_tag_id))
+                            gps_data[gps_tag_name] = gps_value
+
+                        coords = MetadataManager._extract_gps_coords(gps_data)
+                        if coords:
+                            result['gps'] = coords
+                            result['risk_score'] += 40
+
+                    try:
+                        if isinstance(value, bytes):
+                            value = value.decode('utf-8', errors='replace')[:100]
+                        result['all_tags'][tag_name] = str(value)[:200]
+                    except:
+                        result['all_tags'][tag_name] = "[Binaire]"
+
+                    if tag_name in MetadataManager.SENSITIVE_TAGS:
+                        result['sensibles'].append({
+                            'tag': tag_name,
+                            'label': MetadataManager.SENSITIVE_TAGS[tag_name],
+                            'value': str(value)[:100]
+                        })
+                        result['risk_score'] += 10
+
+            binary_data = data
+
+            emails = re.findall(rb'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', binary_data)
+            for email in emails[:5]:
+                result['hidden_data'].append(f"📧 Email: {email.decode('utf-8', errors='replace')}")
+                result['risk_score'] += 15
+
+            urls = re.findall(rb'https?://[^\s<>"{}|\\^`\[\]]+', binary_data)
+            for url in urls[:5]:
+                result['hidden_data'].append(f"🔗 URL: {url.decode('utf-8', errors='replace')[:60]}")
+                result['risk_score'] += 5
+
+            if b'\xff\xd8\xff' in binary_data[20:]:
+                result['hidden_data'].append("🖼️ Miniature EXIF embarquée détectée")
+                result['risk_score'] += 20
+
+            result['risk_score'] = min(100, result['risk_score'])
+
+        except Exception as e:
+            result['error'] = str(e)
+
+        return result
+
+    @staticmethod
+    def _extract_gps_coords(gps_data):
+        try:
+            def convert_to_degrees(value):
+                if isinstance(value, tuple) and len(value) == 3:
+                    d, m, s = float(value[0]), float(value[1]), float(value[2])
+                    return d + (m / 60.0) + (s / 3600.0)
+                return None
+
+            lat = convert_to_degrees(gps_data.get('GPSLatitude'))
+            lon = convert_to_degrees(gps_data.get('GPSLongitude'))
+
+            if lat is None or lon is None:
+                return None
+
+            if gps_data.get('GPSLatitudeRef', 'N') == 'S':
+                lat = -lat
+            if gps_data.get('GPSLongitudeRef', 'E') == 'W':
+                lon = -lon
+
+            return {
+                'lat': lat, 'lon': lon,
+                'display': f"{abs(lat):.6f}°{'N' if lat >= 0 else 'S'}, {abs(lon):.6f}°{'E' if lon >= 0 else 'W'}",
+                'osm': f"https://www.openstreetmap.org/?mlat={lat}&mlon={lon}&zoom=15"
+            }
+        except:
+            return None
+
+    @staticmethod
+    def remove_all_metadata(image_path, output_path=None, profile=None, data=None):
+        try:
+            if output_path is None:
+                output_path = image_path
+
+            img = Image.open(io.BytesIO(data) if data is not None else image_path)
+            # Copie des seuls pixels : aucune métadonnée ne suit
+            clean_img = Image.frombytes(img.mode, img.size, img.tobytes())
+            if img.mode == 'P':
+                clean_img.putpalette(img.getpalette())
+
+            ext = Path(output_path).suffix.lower()
+            fmt, options = ExportProfiles.save_options(ext, profile)
+
+            # Encodage et nettoyage en mémoire : une seule écriture, et le
+            # contrôle final porte sur ces mêmes octets sans relire le fichier
+            buffer = io.BytesIO()
+            clean_img.save(buffer, fmt or Image.registered_extensions().get(ext), **options)
+            encoded = buffer.getvalue()
+            if ext in ImageLoader.JPEG_EXTENSIONS:
+                encoded = MetadataManager._strip_jpeg_segments(encoded)
+
+            def write(tmp_path):
+                with open(tmp_path, 'wb') as f:
+                    f.write(encoded)
+
+            # Jamais de réécriture directe : un arrêt brutal ne corrompt pas l'original
+            MetadataManager.write_atomically(output_path, write)
+
+            check = MetadataManager.get_all_metadata(output_path, encoded)
+
+            return {
+                'success': True,
+                'sensibles_restants': len(check.get('sensibles', [])),
+                'risk_score': check.get('risk_score', 0)
+            }
+
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
+    @staticmethod
+    def write_atomically(target_path, write_func):
+        """Écrit via write_func(chemin_temporaire) puis remplace la cible d'un coup.
+
+        Le temporaire est créé dans le même dossier (même système de fichiers),
+        synchronisé sur disque puis renommé : la cible contient soit l'ancien
+        fichier complet, soit le nouveau.
+        """
+        target = Path(target_path)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{target.stem}.", suffix=target.suffix, dir=str(target.parent))
+        os.close(fd)
+        try:
+            write_func(tmp_path)
+            with open(tmp_path, 'rb+') as f:
+                os.fsync(f.fileno())
+            if target.exists():
+                shutil.copymode(str(target), tmp_path)
+            else:
+                # mkstemp crée en 0600 : droits habituels d'un nouveau fichier
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(tmp_path, 0o666 & ~umask)
+            os.replace(tmp_path, str(target))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        # Le renommage lui-même doit être durable (POSIX uniquement)
+        if hasattr(os, 'O_DIRECTORY'):
+            try:
+                dir_fd = os.open(str(target.parent), os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            except OSError:
+                pass
+
+    @staticmethod
+    def clean_in_place(image_path, profile=None, backup=True, backup_store=None):
+        """Nettoyage sur place avec une sauvegarde qui ne recopie pas les octets.
+
+        La sauvegarde est un lien physique vers l'original (le renommage
+        atomique laisse l'ancien inode intact derrière ce lien). Si le système
+        de fichiers ne le permet pas, l'original est renommé puis sert de
+        source ; la copie n'est utilisée qu'en dernier recours (autre disque).
+        """
+        image_path = str(image_path)
+        if not backup:
+            result = MetadataManager.remove_all_metadata(image_path, profile=profile)
+            result['backup'] = None
+            return result
+
+        if backup_store:
+            backup_path = backup_store.reserve(image_path)
+        else:
+            # Ne jamais écraser une sauvegarde précédente (qui est peut-être la seule originale)
+            backup_path = image_path + ".backup"
+            counter = 1
+            while os.path.exists(backup_path):
+                backup_path = f"{image_path}.backup.{counter}"
+                counter += 1
+
+        try:
+            os.link(image_path, backup_path)
+            source = image_path
+        except (OSError, AttributeError, NotImplementedError):
+            try:
+                os.replace(image_path, backup_path)
+            except OSError:
+                shutil.copy2(image_path, backup_path)
+                source = image_path
+            else:
+                source = backup_path
+
+        result = MetadataManager.remove_all_metadata(source, output_path=image_path, profile=profile)
+
+        if not result['success']:
+            # Rien n'a été remplacé : on restaure l'état initial
+            if source == backup_path:
+                os.replace(backup_path, image_path)
+            elif os.path.exists(backup_path):
+                os.remove(backup_path)
+            backup_path = None
+
+        result['backup'] = backup_path
+        return result
+
+    @staticmethod
+    def _strip_jpeg_segments(data):
+        """Retire les segments APP1 (EXIF/XMP), APP13 (IPTC) et COM d'un JPEG en mémoire"""
+        try:
+            for marker in [b'\xff\xe1', b'\xff\xed', b'\xff\xfe']:
+                while marker in data:
+                    idx = data.find(marker)
+                    if idx == -1:
+                        break
+                    length = struct.unpack('>H', data[idx+2:idx+4])[0]
+                    data = data[:idx] + data[idx+2+length:]
+        except struct.error:
+            pass
+        return data
+
+
+class BackupStore:
+    """Dossier central de sauvegardes, rangées par jour, avec durée de rétention"""
+
+    def __init__(self, root, retention_days=30):
+        self.root = Path(root)
+        self.retention_days = retention_days
+
+    def reserve(self, image_path):
+        """Chemin de sauvegarde libre pour une image (le dossier du jour est créé)"""
+        day_dir = self.root / datetime.now().strftime('%Y-%m-%d')
+        day_dir.mkdir(parents=True, exist_ok=True)
+
+        source = Path(image_path)
+        # Empreinte du chemin complet : deux images homonymes ne se marchent pas dessus
+        digest = hashlib.sha1(str(source.resolve()).encode('utf-8')).hexdigest()[:8]
+        candidate = day_dir / f"{source.stem}_{digest}{source.suffix}"
+        counter = 1
+        while candidate.exists():
+            candidate = day_dir / f"{source.stem}_{digest}_{counter}{source.suffix}"
+            counter += 1
+        return str(candidate)
+
+    def purge(self):
+        """Supprime les jours plus anciens que la rétention ; retourne le nombre de dossiers supprimés"""
+        if not self.root.is_dir():
+            return 0
+
+        removed = 0
+        today = datetime.now().date()
+        for day_dir in self.root.iterdir():
+            try:
+                day = datetime.strptime(day_dir.name, '%Y-%m-%d').date()
+            except ValueError:
+                continue
+            if day_dir.is_dir() and (today - day).days > self.retention_days:
+                shutil.rmtree(day_dir, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+class ExportProfiles:
+    """Profils d'export : compromis vitesse d'encodage / taille du fichier"""
+
+    PROFILES = {
+        'fast': {
+            'label': "⚡ Rapide",
+            'jpeg': {'quality': 90, 'progressive': False, 'optimize': False},
+            'png': {'compress_level': 1, 'compress_type': zlib.Z_RLE},
+            'webp': {'quality': 85, 'method': 0, 'lossless': False},
+            'tiff': {'compression': 'raw'},
+        },
+        'balanced': {
+            'label': "⚖️ Équilibré",
+            'jpeg': {'quality': 92, 'progressive': False, 'optimize': True},
+            'png': {'compress_level': 6, 'compress_type': zlib.Z_DEFAULT_STRATEGY},
+            'webp': {'quality': 90, 'method': 4, 'lossless': False},
+            'tiff': {'compression': 'tiff_lzw'},
+        },
+        'smallest': {
+            'label': "📦 Compact",
+            'jpeg': {'quality': 85, 'progressive': True, 'optimize': True},
+            'png': {'compress_level': 9, 'compress_type': zlib.Z_FILTERED},
+            'webp': {'quality': 80, 'method': 6, 'lossless': False},
+            'tiff': {'compression': 'tiff_adobe_deflate'},
+        },
+    }
+    DEFAULT = 'balanced'
+    # Codes de compression TIFF (libtiff) pour cv2.imencode
+    TIFF_CODES = {'raw': 1, 'tiff_lzw': 5, 'tiff_adobe_deflate': 8}
+
+    @staticmethod
+    def save_options(ext, profile=None):
+        """(format Pillow, options d'encodage) pour une extension, ou (None, {})"""
+        settings = ExportProfiles.PROFILES[profile or ExportProfiles.DEFAULT]
+        ext = ext.lower()
+        if ext in ImageLoader.JPEG_EXTENSIONS:
+            return 'JPEG', dict(settings['jpeg'])
+        if ext == '.png':
+            return 'PNG', dict(settings['png'])
+        if ext == '.webp':
+            return 'WEBP', dict(settings['webp'])
+        if ext in ImageLoader.TIFF_EXTENSIONS:
+            return 'TIFF', dict(settings['tiff'])
+        if ext == '.gif':
+            return 'GIF', {}
+        return None, {}
+
+    @staticmethod
+    def cv2_params(ext, profile=None):
+        """Équivalent cv2.imencode du profil, pour les images 16 bits que Pillow n'écrit pas en couleur"""
+        settings = ExportProfiles.PROFILES[profile or ExportProfiles.DEFAULT]
+        ext = ext.lower()
+        if ext == '.png':
+            # Les constantes de stratégie d'OpenCV reprennent celles de zlib
+            return [cv2.IMWRITE_PNG_COMPRESSION, settings['png']['compress_level'],
+                    cv2.IMWRITE_PNG_STRATEGY, settings['png']['compress_type']]
+        if ext in ImageLoader.TIFF_EXTENSIONS:
+            return [cv2.IMWRITE_TIFF_COMPRESSION, ExportProfiles.TIFF_CODES[settings['tiff']['compression']]]
+        return []
+
+    @staticmethod
+    def to_pil(image):
+        """Tableau OpenCV (BGR, BGRA ou gris) vers image Pillow sans métadonnées"""
+        if image.ndim == 2:
+            return Image.fromarray(image)
+        if image.shape[2] == 4:
+            return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA))
+        return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+    @staticmethod
+    def save(image, path, profile=None):
+        """Encode en une seule passe selon le profil.
+
+        L'image est reconstruite à partir des pixels : le fichier écrit ne
+        contient aucune métadonnée, il n'y a donc pas de ré-encodage de
+        nettoyage à faire ensuite.
+        """
+        encoded = ExportProfiles.encode(image, Path(path).suffix, profile)
+        with open(path, 'wb') as f:
+            f.write(encoded)
+
+    @staticmethod
+    def encode(image, ext, profile=None):
+        """Contenu du fichier `ext` selon le profil, en mémoire (sans métadonnées)"""
+        ext = ext.lower()
+        if image.dtype != np.uint8:
+            if ext == '.png' or ext in ImageLoader.TIFF_EXTENSIONS:
+                # Profondeur conservée : OpenCV écrit le PNG / TIFF 16 bits sans métadonnées
+                ok, encoded = cv2.imencode(ext, image, ExportProfiles.cv2_params(ext, profile))
+                if not ok:
+                    raise IOError(f"Encodage {ext} impossible")
+                return encoded.tobytes()
+            image = ImageLoader.to_8bit(image)
+
+        fmt, options = ExportProfiles.save_options(ext, profile)
+        if fmt is None:
+            fmt = Image.registered_extensions().get(ext)
+            if fmt is None:
+                raise IOError(f"Format de sortie inconnu : {ext}")
+        pil_image = ExportProfiles.to_pil(image)
+        if fmt == 'JPEG' and pil_image.mode == 'RGBA':
+            pil_image = pil_image.convert('RGB')
+        buffer = io.BytesIO()
+        pil_image.save(buffer, fmt, **options)
+        return buffer.getvalue()
+
+    @staticmethod
+    def benchmark(image, profiles=None, extensions=('.jpg', '.png', '.webp')):
+        """Temps d'encodage et taille produite pour chaque profil et format (en mémoire).
+
+        Mesure ExportProfiles.encode, soit le chemin réel de l'export :
+        conversions comprises (alpha retiré pour le JPEG, 16 bits conservés
+        en PNG).
+        """
+        results = []
+        for ext in extensions:
+            for name in profiles or ExportProfiles.PROFILES:
+                fmt, _ = ExportProfiles.save_options(ext, name)
+                start = time.perf_counter()
+                encoded = ExportProfiles.encode(image, ext, name)
+                results.append({
+                    'profile': name,
+                    'format': fmt,
+                    'time_ms': round((time.perf_counter() - start) * 1000, 1),
+                    'size': len(encoded),
+                })
+        return results
+
+
+class ImageLoader:
+    """Chargement d'images : aperçu à résolution réduite, pleine résolution à l'export"""
+
+    # Facteurs de décodage réduit dans le domaine DCT (JPEG uniquement)
+    REDUCED_FLAGS = {
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }
+    JPEG_EXTENSIONS = ('.jpg', '.jpeg', '.jpe', '.jfif')
+    TIFF_EXTENSIONS = ('.tif', '.tiff')
+    # Plus petit côté long acceptable pour l'aperçu (affichage + première détection)
+    PROXY_MIN_SIDE = 2048
+
+    @staticmethod
+    def read_bytes(image_path, check=None):
+        """Lecture unique du fichier, partagée par le décodage, l'EXIF et la recherche de données cachées.
+
+        Une seule lecture séquentielle : sur un stockage réseau, c'est le
+        nombre d'allers-retours qui coûte, pas la copie en mémoire.
+        `check(f)` examine le fichier ouvert avant la lecture complète (en-tête)
+        et peut le refuser en levant une exception.
+        """
+        with open(image_path, 'rb') as f:
+            if check:
+                check(f)
+                f.seek(0)
+            return f.read()
+
+    @staticmethod
+    def decode(data, flags=cv2.IMREAD_COLOR):
+        """cv2.imdecode sur le contenu du fichier (orientation EXIF appliquée, comme imread)"""
+        if not data:
+            return None
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), flags)
+        if image is None:
+            # Formats que cette version d'OpenCV ne lit pas (GIF avant 4.11…) : Pillow
+            try:
+                with Image.open(io.BytesIO(data)) as img:
+                    image = cv2.cvtColor(np.asarray(img.convert('RGB')), cv2.COLOR_RGB2BGR)
+            except Exception:
+                return None
+        return image
+
+    @staticmethod
+    def to_8bit(image):
+        """Ramène une image 16 bits ou flottante sur 8 bits (canaux inchangés)"""
+        if image.dtype == np.uint8:
+            return image
+        if image.dtype == np.uint16:
+            return (image >> 8).astype(np.uint8)
+        if np.issubdtype(image.dtype, np.floating):
+            return (np.clip(image, 0.0, 1.0) * 255 + 0.5).astype(np.uint8)
+        return cv2.convertScaleAbs(image)
+
+    @staticmethod
+    def to_bgr8(image):
+        """Vue BGR 8 bits pour la détection (gris, alpha et 16 bits acceptés)"""
+        image = ImageLoader.to_8bit(image)
+        if image.ndim == 2:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        if image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        return image
+
+    @staticmethod
+    def exif_orientation(img):
+        """Orientation EXIF d'une image Pillow ouverte, sans décoder ses pixels"""
+        if img.format == 'PNG' and 'exif' not in img.info:
+            return 1  # Pillow décoderait toute l'image pour chercher un eXIf après les données
+        try:
+            return img.getexif().get(0x0112, 1)
+        except Exception:
+            return 1
+
+    @staticmethod
+    def orientation(data):
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                return ImageLoader.exif_orientation(img)
+        except Exception:
+            return 1
+
+    @staticmethod
+    def probe(image_path, data=None, stream=None):
+        """Ce qu'annonce l'en-tête, sans décoder un seul pixel.
+
+        Depuis un chemin ou un fichier déjà ouvert (`stream`, laissé ouvert),
+        seuls les premiers Ko sont lus (segments d'en-tête, IFD des pages
+        TIFF). Retourne {'format', 'width', 'height',
+        'channels', 'depth', 'frames', 'orientation'} ; ValueError si
+        l'en-tête est illisible ou annonce une bombe de décompression.
+        """
+        try:
+            if stream is not None:
+                source = contextlib.nullcontext(stream)
+            else:
+                source = io.BytesIO(data) if data is not None else open(image_path, 'rb')
+            with source as f:
+                with Image.open(f) as img:
+                    mode = img.mode
+                    if 'A' in mode or 'transparency' in img.info:
+                        channels = 4
+                    elif mode in ('1', 'L', 'I', 'F') or mode.startswith('I;'):
+                        channels = 1
+                    else:
+                        channels = 3
+                    depth = 16 if ';16' in mode else 32 if mode in ('I', 'F') else 8
+                    if img.format == 'TIFF':
+                        bits = img.tag_v2.get(258, 8)
+                        depth = max(bits) if isinstance(bits, tuple) else bits
+                    info = {
+                        'format': img.format, 'width': img.size[0], 'height': img.size[1],
+                        'channels': channels, 'depth': depth, 'frames': getattr(img, 'n_frames', 1),
+                        'orientation': ImageLoader.exif_orientation(img),
+                    }
+                if info['format'] == 'PNG':
+                    # Pillow ramène les PNG couleur 16 bits à 8 bits : la profondeur est dans l'IHDR
+                    f.seek(24)
+                    info['depth'] = max(info['depth'], f.read(1)[0])
+                return info
+        except Image.DecompressionBombError as e:
+            raise ValueError(f"bombe de décompression ({e})")
+        except Image.UnidentifiedImageError:
+            raise ValueError("format d'image non reconnu")
+        except (OSError, SyntaxError, struct.error, IndexError) as e:
+            raise ValueError(f"en-tête illisible ({e})")
+
+    @staticmethod
+    def apply_orientation(image, orientation):
+        """Applique l'orientation EXIF comme le fait cv2.imread en couleur"""
+        if orientation in (5, 6, 7, 8):
+            image = cv2.transpose(image)
+            orientation = {5: 1, 6: 2, 7: 3, 8: 4}[orientation]
+        if orientation == 2:
+            return cv2.flip(image, 1)
+        if orientation == 3:
+            return cv2.flip(image, -1)
+        if orientation == 4:
+            return cv2.flip(image, 0)
+        return image
+
+    @staticmethod
+    def get_size(image_path, data=None):
+        """Dimensions (largeur, hauteur) lues dans l'en-tête, orientation EXIF comprise"""
+        with Image.open(io.BytesIO(data) if data is not None else image_path) as img:
+            w, h = img.size
+            orientation = ImageLoader.exif_orientation(img)
+        # cv2.imread applique l'orientation EXIF : on fait de même
+        if orientation in (5, 6, 7, 8):
+            w, h = h, w
+        return w, h
+
+    @staticmethod
+    def choose_factor(size, min_side=None):
+        """Plus grand facteur de réduction qui garde un côté long >= min_side"""
+        min_side = min_side or ImageLoader.PROXY_MIN_SIDE
+        long_side = max(size)
+        for factor in sorted(ImageLoader.REDUCED_FLAGS, reverse=True):
+            if long_side / factor >= min_side:
+                return factor
+        return 1
+
+    @staticmethod
+    def load_proxy(image_path, min_side=None, data=None):
+        """Décodage rapide pour l'aperçu et la détection.
+
+        Retourne (image, échelle, (largeur, hauteur) pleine résolution) ou
+        (None, 1.0, None) si l'image est illisible. L'échelle convertit les
+        coordonnées pleine résolution en coordonnées de l'aperçu. En-tête et
+        pixels sont lus dans `data` (lu ici une seule fois s'il est absent).
+        """
+        if data is None:
+            try:
+                data = ImageLoader.read_bytes(image_path)
+            except OSError:
+                return None, 1.0, None
+
+        try:
+            full_size = ImageLoader.get_size(image_path, data)
+        except Exception:
+            full_size = None
+
+        factor = 1
+        if full_size and Path(image_path).suffix.lower() in ImageLoader.JPEG_EXTENSIONS:
+            factor = ImageLoader.choose_factor(full_size, min_side)
+
+        image = ImageLoader.decode(data, ImageLoader.REDUCED_FLAGS.get(factor, cv2.IMREAD_COLOR))
+
+        if image is None:
+            return None, 1.0, None
+
+        h, w = image.shape[:2]
+        if factor == 1 or not full_size:
+            return image, 1.0, (w, h)
+        return image, w / full_size[0], full_size
+
+    @staticmethod
+    def load_full(image_path, data=None, factor=1):
+        """Décodage pleine résolution (différé jusqu'à l'export).
+
+        Hors JPEG, l'alpha et la profondeur (16 bits) sont conservés pour que
+        l'image exportée ne perde rien d'autre que les zones masquées.
+        `factor` réduit un JPEG dans le domaine DCT (budget mémoire dépassé).
+        """
+        if data is None:
+            try:
+                data = ImageLoader.read_bytes(image_path)
+            except OSError:
+                return None
+        if Path(image_path).suffix.lower() in ImageLoader.JPEG_EXTENSIONS:
+            return ImageLoader.decode(data, ImageLoader.REDUCED_FLAGS.get(factor, cv2.IMREAD_COLOR))
+        image = ImageLoader.decode(data, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            return None
+        # IMREAD_UNCHANGED ignore l'orientation EXIF : on l'applique pour rester aligné sur l'aperçu
+        return ImageLoader.apply_orientation(image, ImageLoader.orientation(data))
+
+    @staticmethod
+    def frame_proxy(frame):
+        """Aperçu BGR 8 bits d'une page ou d'une image animée ; retourne (aperçu, échelle)"""
+        preview = ImageLoader.to_bgr8(frame)
+        h, w = preview.shape[:2]
+        ratio = min(1.0, ImageLoader.PROXY_MIN_SIDE / max(w, h))
+        if ratio < 1.0:
+            preview = cv2.resize(preview, (max(1, int(w * ratio)), max(1, int(h * ratio))), interpolation=cv2.INTER_AREA)
+        return preview, preview.shape[1] / w
+
+
+class FrameStream:
+    """Documents multipages (TIFF) et images animées (GIF, WebP, APNG), image par image.
+
+    Les pages TIFF sont décodées une à une par OpenCV (profondeur et alpha
+    conservés) et réécrites au fil de l'eau : la mémoire reste bornée à une
+    page. Les animations passent par Pillow en RGBA ; leurs encodeurs
+    assemblent toutes les images avant d'écrire, ce qui reste modeste pour
+    ces formats.
+    """
+
+    EXTENSIONS = ('.tif', '.tiff', '.gif', '.webp', '.png')
+
+    @staticmethod
+    def count(image_path, data):
+        """Nombre de pages / d'images, 1 pour les formats à image unique"""
+        if Path(image_path).suffix.lower() not in FrameStream.EXTENSIONS:
+            return 1
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                return getattr(img, 'n_frames', 1)
+        except Exception:
+            return 1
+
+    @staticmethod
+    def tiff_pages(data, count):
+        """Pages d'un TIFF, décodées une par une (sans orientation, comme IMREAD_UNCHANGED)"""
+        buffer = np.frombuffer(data, np.uint8)
+        for index in range(count):
+            ok, pages = cv2.imdecodemulti(buffer, cv2.IMREAD_UNCHANGED, range=(index, index + 1))
+            if not ok or not pages:
+                raise IOError(f"Page {index + 1} illisible")
+            yield pages[0]
+
+    @staticmethod
+    def write(output, write_func):
+        """write_func(fichier) vers un fichier objet (membre d'archive en mémoire) ou, atomiquement, un chemin"""
+        if hasattr(output, 'write'):
+            write_func(output)
+            return
+
+        def write(tmp_path):
+            with open(tmp_path, 'w+b') as f:
+                write_func(f)
+
+        MetadataManager.write_atomically(output, write)
+
+    @staticmethod
+    def write_tiff(output, pages, profile=None):
+        """Écrit chaque page dès qu'elle est prête (TIFF multipage, sans métadonnées)"""
+        params = ExportProfiles.cv2_params('.tiff', profile)
+
+        def write(f):
+            with TiffImagePlugin.AppendingTiffWriter(f, new=True) as tiff:
+                for page in pages:
+                    ok, encoded = cv2.imencode('.tiff', page, params)
+                    if not ok:
+                        raise IOError("Encodage TIFF impossible")
+                    tiff.write(encoded.tobytes())
+                    tiff.newFrame()
+
+        FrameStream.write(output, write)
+
+    @staticmethod
+    def animation_frames(data):
+        """Images d'une animation en BGRA 8 bits, avec leur durée (ms)"""
+        with Image.open(io.BytesIO(data)) as img:
+            for frame in ImageSequence.Iterator(img):
+                rgba = np.asarray(frame.convert('RGBA'))
+                yield cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGRA), frame.info.get('duration', 100)
+
+    @staticmethod
+    def write_animation(output, frames, ext, loop=None, profile=None):
+        """Ré-assemble une animation à partir de (image BGRA, durée)"""
+        images, durations = [], []
+        for frame, duration in frames:
+            images.append(ExportProfiles.to_pil(frame))
+            durations.append(duration)
+        fmt, options = ExportProfiles.save_options(ext, profile)
+        options.pop('compress_type', None)  # non pris en charge par l'APNG
+        if loop is not None:
+            options['loop'] = loop
+
+        def write(f):
+            images[0].save(f, fmt, save_all=True, append_images=images[1:],
+                           duration=durations, **options)
+
+        FrameStream.write(output, write)
+
+    @staticmethod
+    def loop(data):
+        """Nombre de boucles de l'animation, None si elle ne se répète pas"""
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                return img.info.get('loop')
+        except Exception:
+            return None
+
+
+class JpegSplice:
+    """Ré-encodage partiel d'un JPEG : seules les lignes de blocs (MCU) touchées par le masquage changent.
+
+    Possible quand le JPEG source est séquentiel et découpé en intervalles de
+    redémarrage (segment DRI, marqueurs RSTn) : chaque intervalle se décode
+    indépendamment des autres. Les bandes de lignes de MCU qui couvrent les
+    zones sont ré-encodées avec les tables de quantification,
+    l'échantillonnage et l'intervalle de la source, puis leurs intervalles
+    remplacent ceux d'origine ; tous les autres sont recopiés octet pour
+    octet, sans perte de génération. Sans intervalles, ou si l'encodeur ne
+    retrouve pas les tables de Huffman de la source (tables optimisées),
+    ValueError : l'appelant encode alors l'image entière.
+    """
+
+    BASELINE = (0xC0, 0xC1)
+    INVERSE_ORIENTATION = {6: 8, 8: 6}  # les autres orientations sont leur propre inverse
+    RST = re.compile(rb'\xff[\xd0-\xd7]')
+
+    @staticmethod
+    def parse(data):
+        """([(marqueur, contenu)] jusqu'au SOS inclus, données compressées du scan)"""
+        if data[:2] != b'\xff\xd8':
+            raise ValueError("pas un JPEG")
+        pos, segments = 2, []
+        try:
+            while True:
+                while data[pos + 1] == 0xFF:  # octets de remplissage
+                    pos += 1
+                if data[pos] != 0xFF:
+                    raise ValueError("en-tête JPEG invalide")
+                marker = data[pos + 1]
+                length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+                segments.append((marker, data[pos + 4:pos + 2 + length]))
+                pos += 2 + length
+                if marker == 0xDA:
+                    break
+        except (IndexError, struct.error):
+            raise ValueError("en-tête JPEG tronqué")
+        end = data.rfind(b'\xff\xd9')
+        return segments, data[pos:end if end >= pos else len(data)]
+
+    @staticmethod
+    def coding(segments):
+        """Ce qui détermine le codage : (DQT par table, DHT par table, SOF, intervalle, SOS)"""
+        dqt, dht, sof, dri, sos = {}, {}, None, 0, None
+        for marker, body in segments:
+            pos = 0
+            if marker == 0xDB:
+                while pos < len(body):
+                    size = 1 + 64 * (2 if body[pos] >> 4 else 1)
+                    dqt[body[pos] & 0x0F] = body[pos:pos + size]
+                    pos += size
+            elif marker == 0xC4:
+                while pos < len(body):
+                    size = 17 + sum(body[pos + 1:pos + 17])
+                    dht[body[pos]] = body[pos:pos + size]
+                    pos += size
+            elif 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                sof = (marker, body)
+            elif marker == 0xDD:
+                dri = struct.unpack('>H', body[:2])[0]
+            elif marker == 0xDA:
+                sos = body
+        return dqt, dht, sof, dri, sos
+
+    @staticmethod
+    def orient_rect(rect, orientation, shape):
+        """Rectangle (x1, y1, x2, y2) d'une image `shape` après ImageLoader.apply_orientation"""
+        x1, y1, x2, y2 = rect
+        h, w = shape[:2]
+        if orientation in (5, 6, 7, 8):
+            x1, y1, x2, y2, w, h = y1, x1, y2, x2, h, w
+            orientation = {5: 1, 6: 2, 7: 3, 8: 4}[orientation]
+        if orientation in (2, 3):
+            x1, x2 = w - x2, w - x1
+        if orientation in (3, 4):
+            y1, y2 = h - y2, h - y1
+        return x1, y1, x2, y2
+
+    @staticmethod
+    def layout(data):
+        """Structure d'un JPEG découpable en intervalles ; ValueError s'il ne s'y prête pas"""
+        segments, scan = JpegSplice.parse(data)
+        dqt, dht, sof, dri, sos = JpegSplice.coding(segments)
+        if sof is None or sof[0] not in JpegSplice.BASELINE:
+            raise ValueError("JPEG progressif ou non séquentiel")
+        if not dri:
+            raise ValueError("pas d'intervalles de redémarrage")
+        if any(marker == 0xEE for marker, _ in segments):
+            raise ValueError("espace colorimétrique Adobe")
+        height, width = struct.unpack('>HH', sof[1][1:5])
+        components = sof[1][5]
+        if components not in (1, 3) or sos[0] != components or b'\xff\xda' in scan:
+            raise ValueError("scans multiples ou composantes non prises en charge")
+
+        sampling = [sof[1][7 + 3 * i] for i in range(components)]
+        mcu_w = 8 * max(s >> 4 for s in sampling) if components > 1 else 8
+        mcu_h = 8 * max(s & 0x0F for s in sampling) if components > 1 else 8
+        mcus_x, mcus_y = -(-width // mcu_w), -(-height // mcu_h)
+        parts = JpegSplice.RST.split(scan)
+        if len(parts) != -(-mcus_x * mcus_y // dri):
+            raise ValueError("intervalles de redémarrage inattendus")
+
+        with Image.open(io.BytesIO(data)) as source:
+            qtables = source.quantization
+            subsampling = JpegImagePlugin.get_sampling(source) if components > 1 else -1
+            orientation = source.getexif().get(0x0112, 1)
+        if components > 1 and subsampling == -1:
+            raise ValueError("sous-échantillonnage non pris en charge")
+
+        return {
+            'segments': segments, 'coding': (dqt, dht, sof, dri, sos), 'parts': parts,
+            'width': width, 'height': height, 'components': components, 'mcu_h': mcu_h,
+            'mcus_x': mcus_x, 'mcus_y': mcus_y, 'dri': dri,
+            'step': dri // math.gcd(dri, mcus_x),  # lignes de MCU par groupe d'intervalles complets
+            'qtables': qtables, 'subsampling': subsampling, 'orientation': orientation,
+        }
+
+    @staticmethod
+    def oriented_shape(layout):
+        """(hauteur, largeur) de l'image une fois orientée, comme la décode ImageLoader"""
+        if layout['orientation'] in (5, 6, 7, 8):
+            return layout['width'], layout['height']
+        return layout['height'], layout['width']
+
+    @staticmethod
+    def bands(layout, rects, shape):
+        """Bandes [début, fin) de lignes de MCU couvrant `rects` (repère orienté `shape`), alignées et fusionnées"""
+        inverse = JpegSplice.INVERSE_ORIENTATION.get(layout['orientation'], layout['orientation'])
+        step, mcu_h = layout['step'], layout['mcu_h']
+        bands = []
+        for rect in rects:
+            _, y1, _, y2 = JpegSplice.orient_rect(rect, inverse, shape)
+            last = -(-y2 // mcu_h)  # arrondi supérieur
+            bands.append([y1 // mcu_h // step * step, min(layout['mcus_y'], -(-last // step) * step)])
+        bands.sort()
+        merged = []
+        for band in bands:
+            if merged and band[0] <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], band[1])
+            else:
+                merged.append(band)
+        return merged
+
+    @staticmethod
+    def header(layout, height, orientation=1):
+        """En-tête reconstruit : segments de codage seulement, hauteur au choix, orientation à part"""
+        header = [b'\xff\xd8']
+        if orientation != 1:
+            exif = Image.Exif()
+            exif[0x0112] = orientation
+            app1 = exif.tobytes()
+            header.append(b'\xff\xe1' + struct.pack('>H', len(app1) + 2) + app1)
+        sof = layout['coding'][2]
+        for marker, body in layout['segments']:
+            if marker == sof[0]:
+                body = body[:1] + struct.pack('>H', height) + body[3:]
+            elif marker not in (0xDB, 0xC4, 0xDD, 0xDA):
+                continue
+            header.append(bytes((0xFF, marker)) + struct.pack('>H', len(body) + 2) + body)
+        return b''.join(header)
+
+    @staticmethod
+    def join(header, parts):
+        """Intervalles séparés par des marqueurs RSTn renumérotés depuis 0"""
+        body = bytearray(header)
+        for index, part in enumerate(parts):
+            if index:
+                body += bytes((0xFF, 0xD0 + (index - 1) % 8))
+            body += part
+        body += b'\xff\xd9'
+        return bytes(body)
+
+    @staticmethod
+    def span(layout, start, end):
+        """(premier intervalle, nombre d'intervalles, hauteur en pixels) des lignes de MCU [start, end)"""
+        first = start * layout['mcus_x'] // layout['dri']
+        count = -(-(end - start) * layout['mcus_x'] // layout['dri'])
+        height = min(layout['height'], end * layout['mcu_h']) - start * layout['mcu_h']
+        return first, count, height
+
+    @staticmethod
+    def decode_band(layout, start, end):
+        """Pixels (sens de stockage) des lignes de MCU [start, end), décodées seules : JPEG autonome de la bande"""
+        first, count, height = JpegSplice.span(layout, start, end)
+        band = JpegSplice.join(JpegSplice.header(layout, height), layout['parts'][first:first + count])
+        flags = cv2.IMREAD_GRAYSCALE if layout['components'] == 1 else cv2.IMREAD_COLOR
+        pixels = cv2.imdecode(np.frombuffer(band, np.uint8), flags)
+        if pixels is None:
+            raise ValueError("bande illisible")
+        return pixels
+
+    @staticmethod
+    def encode_band(layout, pixels):
+        """Données compressées d'une bande encodée avec le codage de la source ; ValueError s'il diffère"""
+        buffer = io.BytesIO()
+        ExportProfiles.to_pil(pixels).save(buffer, 'JPEG', qtables=layout['qtables'],
+                                           subsampling=layout['subsampling'], restart_marker_blocks=layout['dri'])
+        band_segments, band_scan = JpegSplice.parse(buffer.getvalue())
+        dqt, dht, sof, dri, sos = layout['coding']
+        band_dqt, band_dht, band_sof, band_dri, band_sos = JpegSplice.coding(band_segments)
+        same = (band_dqt == dqt and band_dht == dht and band_dri == dri and band_sos == sos
+                and band_sof[1][:1] + band_sof[1][5:] == sof[1][:1] + sof[1][5:])
+        if not same:
+            raise ValueError("tables de codage différentes de la source")
+        return band_scan
+
+    @staticmethod
+    def compatible(layout):
+        """L'encodeur retrouve-t-il les tables de la source ? (essai sur une seule ligne de MCU)"""
+        shape = (layout['mcu_h'], layout['width']) + ((3,) if layout['components'] > 1 else ())
+        try:
+            JpegSplice.encode_band(layout, np.zeros(shape, np.uint8))
+            return True
+        except ValueError:
+            return False
+
+    @staticmethod
+    def replace_band(layout, start, pixels):
+        """Ré-encode une bande (sens de stockage) avec le codage de la source et remplace ses intervalles"""
+        band_parts = JpegSplice.RST.split(JpegSplice.encode_band(layout, pixels))
+        end = start + -(-pixels.shape[0] // layout['mcu_h'])
+        first, count, _ = JpegSplice.span(layout, start, end)
+        if len(band_parts) != count:
+            raise ValueError("intervalles de redémarrage inattendus")
+        layout['parts'][first:first + count] = band_parts
+
+    @staticmethod
+    def assemble(layout):
+        header = JpegSplice.header(layout, layout['height'], layout['orientation'])
+        return JpegSplice.join(header, layout['parts'])
+
+    @staticmethod
+    def encode(data, image, rects):
+        """JPEG dont seules les bandes couvrant `rects` sont ré-encodées.
+
+        `data` est le JPEG source, `image` son décodage (orienté) une fois
+        masqué, `rects` les rectangles modifiés dans ce repère. Retourne
+        (octets, part des lignes de MCU ré-encodées).
+        """
+        layout = JpegSplice.layout(data)
+        # Retour au sens de stockage : les intervalles suivent les lignes du fichier
+        inverse = JpegSplice.INVERSE_ORIENTATION.get(layout['orientation'], layout['orientation'])
+        stored = ImageLoader.apply_orientation(image, inverse)
+        if stored.shape[:2] != (layout['height'], layout['width']):
+            raise ValueError("dimensions différentes de la source")
+        if layout['components'] == 1 and stored.ndim == 3:
+            stored = cv2.cvtColor(stored, cv2.COLOR_BGR2GRAY)
+
+        bands = JpegSplice.bands(layout, rects, image.shape)
+        for start, end in bands:
+            mcu_h = layout['mcu_h']
+            JpegSplice.replace_band(layout, start, stored[start * mcu_h:min(layout['height'], end * mcu_h)])
+        return JpegSplice.assemble(layout), sum(end - start for start, end in bands) / layout['mcus_y']
+
+    @staticmethod
+    def redact(data, rects, apply, max_rows):
+        """Masquage bande par bande, sans jamais décoder l'image entière.
+
+        `apply(pixels, rects)` masque sur place une bande décodée (sens de
+        stockage), `rects` étant les zones ramenées dans son repère ; une
+        bande fait au plus `max_rows` lignes de MCU. Retourne (octets, part
+        des lignes de MCU ré-encodées).
+        """
+        layout = JpegSplice.layout(data)
+        shape = JpegSplice.oriented_shape(layout)
+        inverse = JpegSplice.INVERSE_ORIENTATION.get(layout['orientation'], layout['orientation'])
+        stored_rects = [JpegSplice.orient_rect(rect, inverse, shape) for rect in rects]
+        mcu_h, step = layout['mcu_h'], layout['step']
+        chunk = max(step, max_rows // step * step)
+
+        bands = JpegSplice.bands(layout, rects, shape)
+        for band_start, band_end in bands:
+            for start in range(band_start, band_end, chunk):
+                end = min(band_end, start + chunk)
+                pixels = JpegSplice.decode_band(layout, start, end)
+                top, bottom = start * mcu_h, start * mcu_h + pixels.shape[0]
+                local = [(x1, max(y1, top) - top, x2, min(y2, bottom) - top)
+                         for x1, y1, x2, y2 in stored_rects if y1 < bottom and y2 > top]
+                apply(pixels, local)
+                JpegSplice.replace_band(layout, start, pixels)
+        return JpegSplice.assemble(layout), sum(end - start for start, end in bands) / layout['mcus_y']
+
+
+class FaceDetector:
+    """Détection de visages par Haar Cascades"""
+
+    # Vérification post-masquage (visages résiduels)
+    RESIDUAL_MAX_SIDE = 2048
+    RESIDUAL_TILE = 1024
+    RESIDUAL_OVERLAP = 128
+    RESIDUAL_COARSE = 4  # facteur de réduction de la passe grossière (grands visages)
+
+    # Balayage en rotation (visages inclinés), par ordre de priorité
+    ROTATION_ANGLES = (-20, 20, -40, 40)
+    ROTATION_MAX_SIDE = 1024
+    ROTATION_BUDGET = 2.0  # secondes
+    ROTATION_WORKERS = max(1, min(len(ROTATION_ANGLES), os.cpu_count() or 2))
+    _rotation_pool = None  # fils durables : chacun garde ses cascades d'un appel à l'autre
+    _rotation_lock = threading.Lock()
+    _rotation_rates = {}  # secondes par pixel de canevas tourné, par réglage des cascades
+
+    # Préfiltre : zones candidates (peau, texture, contours) avant les cascades
+    PREFILTER_CELL = 16  # côté d'une cellule de la carte, en pixels de l'aperçu
+    PREFILTER_MIN_STD = 10.0  # écart-type minimal (fonds unis exclus)
+    PREFILTER_SKIN = 0.15  # part minimale de pixels couleur peau
+    PREFILTER_EDGES = 0.08  # densité minimale de contours
+    PREFILTER_MAX_COVERAGE = 0.6  # au-delà, balayage complet
+
+    # Préréglages vitesse / rappel (remplaçables par la commande `tune`)
+    PRESETS = {
+        'fast': {'scale_factor': 1.2, 'min_neighbors': 6, 'min_size': 40},
+        'balanced': {'scale_factor': 1.1, 'min_neighbors': 5, 'min_size': 30},
+        'thorough': {'scale_factor': 1.05, 'min_neighbors': 4, 'min_size': 24},
+    }
+    PRESET_LABELS = {'fast': "⚡ Rapide", 'balanced': "⚖️ Équilibré", 'thorough': "🔬 Minutieux"}
+    DEFAULT_PRESET = 'balanced'
+    PRESETS_FILE = Path(__file__).parent / "presets_detection.json"
+
+    _local = threading.local()
+
+    @staticmethod
+    def get_cascade(name):
+        """Cascade chargée une seule fois par fil : detectMultiScale n'accepte pas deux appels simultanés"""
+        cascades = FaceDetector._local.__dict__.setdefault('cascades', {})
+        if name not in cascades:
+            cascades[name] = cv2.CascadeClassifier(cv2.data.haarcascades + name)
+        return cascades[name]
+
+    @staticmethod
+    def preset_params(preset=None):
+        return dict(FaceDetector.PRESETS.get(preset or FaceDetector.DEFAULT_PRESET,
+                                             FaceDetector.PRESETS[FaceDetector.DEFAULT_PRESET]))
+
+    @staticmethod
+    def load_presets(path=None):
+        """Charge les préréglages produits par `tune` (s'il y en a)"""
+        path = Path(path or FaceDetector.PRESETS_FILE)
+        if not path.is_file():
+            return False
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        for name, values in data.get('presets', {}).items():
+            FaceDetector.PRESETS[name] = {
+                'scale_factor': float(values['scale_factor']),
+                'min_neighbors': int(values['min_neighbors']),
+                'min_size': int(values['min_size']),
+            }
+        return True
+
+    @staticmethod
+    def detect(image, scale=1.0, rotation_sweep=False, preset=None, prefilter=False, deadline=None, report=None):
+        """Détecte les visages d'une image BGR.
+
+        `scale` est l'échelle de l'image par rapport à la pleine résolution :
+        les boîtes retournées sont toujours en coordonnées pleine résolution.
+        `rotation_sweep` ajoute une recherche des visages inclinés, `preset`
+        choisit le compromis vitesse / rappel des cascades et `prefilter`
+        limite les cascades aux zones candidates. `deadline` (secondes)
+        borne la durée de la détection : les passes sont alors enchaînées
+        par ordre de rendement (voir AnytimeScan). Si `report` est un dict,
+        il reçoit les statistiques du préfiltre et, avec une échéance, le
+        détail des passes sous la clé 'anytime'.
+        """
+        start = time.perf_counter()
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = cv2.equalizeHist(gray)
+
+        params = FaceDetector.preset_params(preset)
+        anytime = None if deadline is None else AnytimeScan(deadline, params, start)
+        scan = anytime.scan if anytime else None
+        if prefilter:
+            found, stats = FaceDetector.prefiltered_boxes(image, gray, params, scan)
+            if report is not None:
+                report.update(stats)
+        elif anytime:
+            found = anytime.scan(gray)
+        else:
+            found = FaceDetector._cascade_boxes(gray, params=params)
+        boxes = FaceDetector._to_full(found, scale)
+        if rotation_sweep:
+            rotated = anytime.rotations(gray, scale) if anytime else FaceDetector.rotation_sweep(gray, scale, params=params)[0]
+            boxes = FaceDetector.merge_boxes(boxes + rotated)
+        if anytime and report is not None:
+            report['anytime'] = anytime.report()
+        return boxes
+
+    @staticmethod
+    def merge_boxes(boxes):
+        """Suppression des doublons : la première boîte d'un groupe qui se recouvre est gardée"""
+        kept = []
+        for box in boxes:
+            if not any(FaceDetector.boxes_overlap(box, other) for other in kept):
+                kept.append(box)
+        return kept
+
+    @staticmethod
+    def rotation_pool():
+        """Réserve de fils partagée par tous les balayages en rotation"""
+        with FaceDetector._rotation_lock:
+            if FaceDetector._rotation_pool is None:
+                FaceDetector._rotation_pool = ThreadPoolExecutor(max_workers=FaceDetector.ROTATION_WORKERS,
+                                                                 thread_name_prefix="rotation")
+            return FaceDetector._rotation_pool
+
+    @staticmethod
+    def rotation_sweep(gray, scale=1.0, angles=None, max_side=None, budget=None, params=None):
+        """Détection sur des copies tournées d'une image grise réduite.
+
+        Les angles sont traités en parallèle (OpenCV libère le GIL) par ordre
+        de priorité. Un angle n'est lancé que si sa durée estimée (débit
+        mesuré sur les angles précédents) tient dans le budget restant ; un
+        angle lancé va à son terme, si bien qu'aucun calcul ne se poursuit
+        après le retour. Sans mesure, un seul angle est lancé pour l'obtenir.
+        Chaque détection est reprojetée dans l'image d'origine sous forme de
+        boîte droite englobante (pleine résolution). Retourne (boîtes, rapport).
+        """
+        angles = FaceDetector.ROTATION_ANGLES if angles is None else angles
+        max_side = max_side or FaceDetector.ROTATION_MAX_SIDE
+        budget = FaceDetector.ROTATION_BUDGET if budget is None else budget
+        start = time.perf_counter()
+
+        h, w = gray.shape[:2]
+        ratio = min(1.0, max_side / max(w, h))
+        small = gray
+        if ratio < 1.0:
+            small = cv2.resize(gray, (max(1, int(w * ratio)), max(1, int(h * ratio))), interpolation=cv2.INTER_AREA)
+        sh, sw = small.shape[:2]
+
+        params = params or FaceDetector.preset_params()
+        key = (params['scale_factor'], params['min_neighbors'], params['min_size'])
+
+        def canvas(angle):
+            cos, sin = abs(math.cos(math.radians(angle))), abs(math.sin(math.radians(angle)))
+            return int(sh * sin + sw * cos), int(sh * cos + sw * sin)
+
+        def run(angle):
+            # Rotation sur un canevas agrandi pour ne rien rogner
+            begin = time.perf_counter()
+            m = cv2.getRotationMatrix2D((sw / 2, sh / 2), angle, 1.0)
+            nw, nh = canvas(angle)
+            m[0, 2] += nw / 2 - sw / 2
+            m[1, 2] += nh / 2 - sh / 2
+            rotated = cv2.warpAffine(small, m, (nw, nh), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+            inverse = cv2.invertAffineTransform(m)
+            found = []
+            for (x, y, bw, bh) in FaceDetector._cascade_boxes(rotated, params=params):
+                corners = np.array([[x, y], [x + bw, y], [x, y + bh], [x + bw, y + bh]], np.float64)
+                points = corners @ inverse[:, :2].T + inverse[:, 2]
+                x1, y1 = np.clip(points.min(axis=0), 0, (sw, sh))
+                x2, y2 = np.clip(points.max(axis=0), 0, (sw, sh))
+                if x2 > x1 and y2 > y1:
+                    found.append((x1, y1, x2 - x1, y2 - y1))
+            FaceDetector._rotation_rates[key] = (time.perf_counter() - begin) / (nw * nh)
+            return found
+
+        pool = FaceDetector.rotation_pool()
+        pending, running = list(angles), {}
+        boxes, done, skipped = [], [], []
+        while pending or running:
+            while pending and len(running) < FaceDetector.ROTATION_WORKERS:
+                rate = FaceDetector._rotation_rates.get(key)
+                if rate is None and running:
+                    break  # débit inconnu : attendre la mesure du premier angle
+                angle = pending.pop(0)
+                nw, nh = canvas(angle)
+                if rate is not None and rate * nw * nh > budget - (time.perf_counter() - start):
+                    skipped.append(angle)
+                    continue
+                running[pool.submit(run, angle)] = angle
+            if not running:
+                break
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                angle = running.pop(future)
+                if future.exception() is None:
+                    boxes.extend(future.result())
+                    done.append(angle)
+                else:
+                    skipped.append(angle)
+
+        report = {
+            'angles_done': done,
+            'angles_skipped': skipped,
+            'time_ms': round((time.perf_counter() - start) * 1000, 1),
+        }
+        return FaceDetector._to_full(FaceDetector.merge_boxes(boxes), scale * ratio), report
+
+    @staticmethod
+    def candidate_regions(image, min_size=30):
+        """Zones susceptibles de contenir un visage, sur une carte de cellules.
+
+        Une cellule est candidate si elle n'est pas unie (écart-type) et
+        contient de la peau ou assez de contours (images en noir et blanc).
+        Les cartes sont calculées sur l'image non égalisée, où le bruit des
+        fonds unis reste faible. Le masque est dilaté d'une taille de visage
+        minimale, puis chaque composante connexe donne un rectangle (x, y, w, h).
+        Retourne (rectangles, part de l'image couverte).
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        h, w = gray.shape[:2]
+        cell = FaceDetector.PREFILTER_CELL
+        gw, gh = max(1, w // cell), max(1, h // cell)
+
+        # Moyennes par cellule : INTER_AREA fait la réduction en une passe
+        def cell_mean(plane):
+            return cv2.resize(plane, (gw, gh), interpolation=cv2.INTER_AREA)
+
+        plane = gray.astype(np.float32)
+        std = np.sqrt(np.maximum(cell_mean(plane * plane) - cell_mean(plane) ** 2, 0))
+
+        ycrcb = cv2.cvtColor(image, cv2.COLOR_BGR2YCrCb)
+        skin = cv2.inRange(ycrcb, (0, 133, 77), (255, 173, 127))
+        edges = cv2.Canny(gray, 80, 160)
+        skin = cell_mean(skin.astype(np.float32) / 255)
+        edges = cell_mean(edges.astype(np.float32) / 255)
+
+        mask = (std >= FaceDetector.PREFILTER_MIN_STD) & (
+            (skin >= FaceDetector.PREFILTER_SKIN) | (edges >= FaceDetector.PREFILTER_EDGES))
+        mask = mask.astype(np.uint8)
+        if not mask.any():
+            return [], 0.0
+
+        radius = max(1, math.ceil(min_size / cell))
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2 * radius + 1, 2 * radius + 1))
+        mask = cv2.dilate(mask, kernel)
+
+        count, _, cells, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        sx, sy = w / gw, h / gh
+        rects, covered = [], np.zeros((gh, gw), bool)
+        for cx, cy, cw, ch, _ in cells[1:count]:
+            covered[cy:cy + ch, cx:cx + cw] = True
+            x1, y1 = int(cx * sx), int(cy * sy)
+            x2, y2 = min(w, int(math.ceil((cx + cw) * sx))), min(h, int(math.ceil((cy + ch) * sy)))
+            rects.append((x1, y1, x2 - x1, y2 - y1))
+        return rects, float(covered.mean())
+
+    @staticmethod
+    def prefiltered_boxes(image, gray, params=None, scan=None):
+        """Cascades limitées aux zones candidates, balayage complet si elles couvrent trop.
+
+        `scan(gray, zones)` remplace les cascades du préréglage (détection à
+        échéance) ; `zones` vaut None pour un balayage complet. Retourne
+        (boîtes en pixels de `gray`, rapport). Le temps gagné est estimé en
+        supposant un coût des cascades proportionnel à la surface.
+        """
+        params = params or FaceDetector.preset_params()
+        start = time.perf_counter()
+        rects, coverage = FaceDetector.candidate_regions(image, params['min_size'])
+        prefilter_ms = (time.perf_counter() - start) * 1000
+
+        h, w = gray.shape[:2]
+        total = w * h
+        fallback = coverage > FaceDetector.PREFILTER_MAX_COVERAGE
+
+        start = time.perf_counter()
+        zones = None if fallback else [r for r in rects if min(r[2], r[3]) >= params['min_size']]
+        scanned = total if fallback else sum(rw * rh for (_, _, rw, rh) in zones)
+        if scan:
+            boxes = scan(gray, zones)
+        elif fallback:
+            boxes = FaceDetector._cascade_boxes(gray, params=params)
+        else:
+            boxes = []
+            for (x, y, rw, rh) in zones:
+                for (bx, by, bw, bh) in FaceDetector._cascade_boxes(gray[y:y + rh, x:x + rw], params=params):
+                    boxes.append((bx + x, by + y, bw, bh))
+            boxes = FaceDetector.merge_boxes(boxes)
+        cascade_ms = (time.perf_counter() - start) * 1000
+
+        if fallback:
+            saved_ms = -prefilter_ms
+        elif scanned:
+            saved_ms = cascade_ms * (total / scanned - 1) - prefilter_ms
+        else:
+            saved_ms = None  # aucune zone candidate : rien à extrapoler
+        report = {
+            'regions': 0 if fallback else len(rects),
+            'fallback': fallback,
+            'coverage': round(coverage, 3),
+            'pixels_scanned': int(scanned),
+            'pixels_total': int(total),
+            'prefilter_ms': round(prefilter_ms, 1),
+            'cascade_ms': round(cascade_ms, 1),
+            'saved_ms': None if saved_ms is None else round(saved_ms, 1),
+        }
+        return boxes, report
+
+    @staticmethod
+    def _cascade_boxes(gray, max_size=None, params=None):
+        """Passes frontale puis profil sur une image en niveaux de gris égalisée"""
+        params = params or FaceDetector.preset_params()
+        kwargs = {
+            'scaleFactor': params['scale_factor'],
+            'minNeighbors': params['min_neighbors'],
+            'minSize': (params['min_size'], params['min_size']),
+        }
+        if max_size:
+            kwargs['maxSize'] = (max_size, max_size)
+
+        face_cascade = FaceDetector.get_cascade('haarcascade_frontalface_default.xml')
+        faces = face_cascade.detectMultiScale(gray, **kwargs)
+        boxes = [tuple(f) for f in faces] if len(faces) > 0 else []
+
+        profile_cascade = FaceDetector.get_cascade('haarcascade_profileface.xml')
+        profiles = profile_cascade.detectMultiScale(gray, **kwargs)
+
+        for p in profiles:
+            if not any(FaceDetector.boxes_overlap(p, f) for f in boxes):
+                boxes.append(tuple(p))
+        return boxes
+
+    @staticmethod
+    def _to_full(boxes, scale):
+        if scale != 1.0:
+            boxes = [tuple(int(round(v / scale)) for v in box) for box in boxes]
+        return [tuple(int(v) for v in box) for box in boxes]
+
+    @staticmethod
+    def verify_residual(image, boxes, scale=1.0):
+        """Recherche de visages restants en dehors des zones masquées.
+
+        Seules les tuiles qui contiennent une partie non masquée sont
+        analysées, et les zones masquées sont neutralisées pour ne pas être
+        redétectées. Une passe grossière sur l'image réduite couvre les
+        visages plus grands que le recouvrement des tuiles. Retourne un
+        rapport dont les boîtes `residual` sont en pleine résolution.
+        """
+        start = time.perf_counter()
+        image = ImageLoader.to_bgr8(image)
+        h, w = image.shape[:2]
+        ratio = min(1.0, FaceDetector.RESIDUAL_MAX_SIDE / max(w, h))
+        if ratio < 1.0:
+            image = cv2.resize(image, (max(1, int(w * ratio)), max(1, int(h * ratio))), interpolation=cv2.INTER_AREA)
+            scale *= ratio
+            h, w = image.shape[:2]
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = cv2.equalizeHist(gray)
+
+        # Masque complémentaire : 1 = déjà masqué
+        mask = np.zeros((h, w), np.uint8)
+        for (x, y, bw, bh) in boxes:
+            x1, y1 = max(0, int(x * scale)), max(0, int(y * scale))
+            x2, y2 = min(w, int((x + bw) * scale) + 1), min(h, int((y + bh) * scale) + 1)
+            mask[y1:y2, x1:x2] = 1
+        if mask.any():
+            visible = gray[mask == 0]
+            gray[mask == 1] = int(visible.mean()) if visible.size else 128
+        integral = cv2.integral(mask)
+
+        def masked_area(x1, y1, x2, y2):
+            return int(integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1])
+
+        tile, overlap = FaceDetector.RESIDUAL_TILE, FaceDetector.RESIDUAL_OVERLAP
+        step = tile - overlap
+        candidates = []
+        tiles_scanned = tiles_skipped = pixels_scanned = 0
+
+        for ty in range(0, max(1, h - overlap), step):
+            for tx in range(0, max(1, w - overlap), step):
+                x2, y2 = min(w, tx + tile), min(h, ty + tile)
+                area = (x2 - tx) * (y2 - ty)
+                if masked_area(tx, ty, x2, y2) >= area * 0.95:
+                    tiles_skipped += 1
+                    continue
+
+                tiles_scanned += 1
+                pixels_scanned += area
+                for (fx, fy, fw, fh) in FaceDetector._cascade_boxes(gray[ty:y2, tx:x2], max_size=overlap):
+                    candidates.append((fx + tx, fy + ty, fw, fh))
+
+        coarse_factor = FaceDetector.RESIDUAL_COARSE
+        coarse = cv2.resize(gray, (max(1, w // coarse_factor), max(1, h // coarse_factor)), interpolation=cv2.INTER_AREA)
+        pixels_scanned += coarse.size
+        for box in FaceDetector._cascade_boxes(coarse):
+            candidates.append(tuple(v * coarse_factor for v in box))
+
+        residual = []
+        for (x, y, bw, bh) in candidates:
+            x1, y1 = max(0, x), max(0, y)
+            x2, y2 = min(w, x + bw), min(h, y + bh)
+            if x2 <= x1 or y2 <= y1 or masked_area(x1, y1, x2, y2) > 0.5 * (x2 - x1) * (y2 - y1):
+                continue
+            if not any(FaceDetector.boxes_overlap((x, y, bw, bh), other) for other in residual):
+                residual.append((x, y, bw, bh))
+
+        return {
+            'residual': FaceDetector._to_full(residual, scale),
+            'tiles_scanned': tiles_scanned,
+            'tiles_skipped': tiles_skipped,
+            'scanned_fraction': round(pixels_scanned / float(w * h), 3),
+            'time_ms': round((time.perf_counter() - start) * 1000, 1),
+        }
+
+    @staticmethod
+    def iou(box1, box2):
+        """Intersection sur union de deux boîtes (x, y, l, h)"""
+        x1, y1, w1, h1 = box1
+        x2, y2, w2, h2 = box2
+        iw = min(x1 + w1, x2 + w2) - max(x1, x2)
+        ih = min(y1 + h1, y2 + h2) - max(y1, y2)
+        if iw <= 0 or ih <= 0:
+            return 0.0
+        inter = iw * ih
+        return inter / float(w1 * h1 + w2 * h2 - inter)
+
+    @staticmethod
+    def boxes_overlap(box1, box2, threshold=0.5):
+        x1, y1, w1, h1 = box1
+        x2, y2, w2, h2 = box2
+
+        xi1, yi1 = max(x1, x2), max(y1, y2)
+        xi2, yi2 = min(x1 + w1, x2 + w2), min(y1 + h1, y2 + h2)
+
+        if xi2 <= xi1 or yi2 <= yi1:
+            return False
+
+        inter = (xi2 - xi1) * (yi2 - yi1)
+        return inter / min(w1 * h1, w2 * h2) > threshold
+
+
+class AnytimeScan:
+    """Détection à échéance : la meilleure réponse possible dans le temps imparti.
+
+    La passe frontale grossière (image réduite, pas d'échelle large) est
+    toujours exécutée ; viennent ensuite la même passe en pleine
+    résolution (petits visages), la frontale au préréglage, le profil sur
+    l'image réduite, le profil puis le profil miroir (visages tournés vers
+    la droite) en pleine résolution, une passe fine si le préréglage est
+    plus grossier, puis les rotations. Le coût d'une passe est estimé
+    d'après le débit de sa propre cascade (pixels parcourus par la
+    pyramide d'échelles), mesuré d'abord sur l'image réduite : le profil,
+    deux à trois fois plus lent que la frontale selon l'image, n'est
+    jamais chiffré au débit de celle-ci. Une passe qui dépasserait
+    l'échéance est sautée, les suivantes restent tentées.
+    """
+
+    COARSE_SIDE = 640  # côté maximal de la passe grossière
+    COARSE_FACTOR = 1.3
+    FINE_FACTOR = 1.05
+    INTERACTIVE = 0.5  # secondes, échéance de l'interface
+    UNMEASURED_RATIO = 2.5  # profil / frontale sur l'image réduite : de 1,4 à 2,3 mesuré
+    FULL_RATIO = 1.4  # pleine résolution / image réduite, même cascade : jusqu'à 1,38 mesuré
+    MARGIN = 1.1  # marge sur les estimations, le débit varie d'une passe à l'autre
+    FRONTAL = 'haarcascade_frontalface_default.xml'
+    PROFILE = 'haarcascade_profileface.xml'
+    LABELS = {'coarse': "grossière", 'sparse': "frontale à pas large", 'frontal': "frontale",
+              'coarse_profile': "profil grossier", 'profile': "profil",
+              'profile_mirror': "profil miroir", 'fine': "fine", 'rotation': "rotations"}
+
+    def __init__(self, deadline, params=None, start=None):
+        self.deadline = deadline
+        self.start = time.perf_counter() if start is None else start
+        self.params = params or FaceDetector.preset_params()
+        self.rates = {}  # secondes par pixel de pyramide, par (cascade, image réduite)
+        self.done, self.skipped, self.angles_skipped = [], [], []
+
+    def remaining(self):
+        return self.start + self.deadline - time.perf_counter()
+
+    @staticmethod
+    def pyramid_pixels(w, h, params, window):
+        """Pixels parcourus par detectMultiScale, tous niveaux de la pyramide confondus"""
+        factor = max(1.0, params['min_size'] / window)
+        total = 0.0
+        while w / factor >= window and h / factor >= window:
+            total += (w / factor) * (h / factor)
+            factor *= params['scale_factor']
+        return total
+
+    def rate(self, name, small=False):
+        """Débit estimé d'une cascade, None si rien ne permet de l'estimer"""
+        measured = self.rates.get((name, small))
+        if measured is not None:
+            return measured
+        frontal_small = self.rates.get((self.FRONTAL, True))
+        if small:
+            return None if frontal_small is None else frontal_small * self.UNMEASURED_RATIO
+        reduced = self.rates.get((name, True))
+        if reduced is None:
+            return None
+        # Chaque cascade évolue à sa façon avec la résolution (la frontale n'en dit rien pour le profil) :
+        # majoration fixe du débit mesuré sur l'image réduite
+        return reduced * self.FULL_RATIO
+
+    def cost(self, name, zones, params, small=False):
+        """Durée estimée d'une cascade sur des zones (x, y, w, h) ; infinie si son débit est inconnu"""
+        rate = self.rate(name, small)
+        if rate is None:
+            return math.inf
+        window = FaceDetector.get_cascade(name).getOriginalWindowSize()[0]
+        return self.MARGIN * rate * sum(self.pyramid_pixels(zw, zh, params, window) for (_, _, zw, zh) in zones)
+
+    def run(self, name, gray, zones, params, mirror=False, small=False):
+        """Une cascade sur des zones de `gray` ; le débit mesuré affine les estimations suivantes"""
+        kwargs = {
+            'scaleFactor': params['scale_factor'],
+            'minNeighbors': params['min_neighbors'],
+            'minSize': (params['min_size'], params['min_size']),
+        }
+        cascade = FaceDetector.get_cascade(name)  # chargement hors mesure du débit
+        start = time.perf_counter()
+        boxes = []
+        for (x, y, zw, zh) in zones:
+            crop = gray[y:y + zh, x:x + zw]
+            if mirror:
+                crop = cv2.flip(crop, 1)
+            for (bx, by, bw, bh) in cascade.detectMultiScale(crop, **kwargs):
+                if mirror:
+                    bx = zw - bx - bw
+                boxes.append((int(x + bx), int(y + by), int(bw), int(bh)))
+
+        window = cascade.getOriginalWindowSize()[0]
+        work = sum(self.pyramid_pixels(zw, zh, params, window) for (_, _, zw, zh) in zones)
+        if work:
+            self.rates[(name, small)] = (time.perf_counter() - start) / work
+        return boxes
+
+    def scan(self, gray, zones=None):
+        """Passes en cascade sur `gray` (ou ses zones candidates) ; retourne les boîtes en pixels de `gray`"""
+        h, w = gray.shape[:2]
+        zones = [(0, 0, w, h)] if zones is None else zones
+
+        ratio = min(1.0, self.COARSE_SIDE / max(w, h))
+        small = gray
+        if ratio < 1.0:
+            small = cv2.resize(gray, (max(1, int(w * ratio)), max(1, int(h * ratio))), interpolation=cv2.INTER_AREA)
+        coarse = dict(self.params, scale_factor=max(self.params['scale_factor'], self.COARSE_FACTOR),
+                      min_size=max(1, int(self.params['min_size'] * ratio)))
+        sh, sw = small.shape[:2]
+        whole = [(0, 0, sw, sh)]
+        found = {'coarse': FaceDetector._to_full(self.run(self.FRONTAL, small, whole, coarse, small=True), ratio)}
+        self.done.append('coarse')
+
+        # (passe, cascade, paramètres, miroir, sur l'image réduite)
+        plan = [('frontal', self.FRONTAL, self.params, False, False),
+                ('coarse_profile', self.PROFILE, coarse, False, True),
+                ('profile', self.PROFILE, self.params, False, False),
+                ('profile_mirror', self.PROFILE, self.params, True, False)]
+        if ratio < 1.0 and self.params['scale_factor'] < coarse['scale_factor']:
+            plan.insert(0, ('sparse', self.FRONTAL, dict(self.params, scale_factor=coarse['scale_factor']), False, False))
+        if self.params['scale_factor'] > self.FINE_FACTOR:
+            plan.append(('fine', self.FRONTAL, dict(self.params, scale_factor=self.FINE_FACTOR), False, False))
+        for label, name, params, mirror, reduced in plan:
+            if self.cost(name, whole if reduced else zones, params, small=reduced) > self.remaining():
+                self.skipped.append(label)
+                continue
+            if reduced:
+                found[label] = FaceDetector._to_full(self.run(name, small, whole, params, mirror, small=True), ratio)
+            else:
+                found[label] = self.run(name, gray, zones, params, mirror)
+            self.done.append(label)
+
+        # Les passes les plus fines d'abord : leurs boîtes priment sur celles de la passe grossière
+        order = ('frontal', 'fine', 'sparse', 'coarse', 'profile', 'profile_mirror', 'coarse_profile')
+        return FaceDetector.merge_boxes([box for label in order for box in found.get(label, [])])
+
+    def rotations(self, gray, scale=1.0):
+        """Balayage en rotation limité aux angles que le temps restant permet (boîtes pleine résolution)"""
+        h, w = gray.shape[:2]
+        ratio = min(1.0, FaceDetector.ROTATION_MAX_SIDE / max(w, h))
+        sw, sh = w * ratio, h * ratio
+        workers = max(1, min(len(FaceDetector.ROTATION_ANGLES), os.cpu_count() or 2))
+
+        # Coût d'un angle : les deux cascades sur le canevas agrandi par la rotation
+        remaining, angles, total = self.remaining(), [], 0.0
+        for angle in FaceDetector.ROTATION_ANGLES:
+            cos, sin = abs(math.cos(math.radians(angle))), abs(math.sin(math.radians(angle)))
+            canvas = [(0, 0, sh * sin + sw * cos, sh * cos + sw * sin)]
+            total += self.cost(self.FRONTAL, canvas, self.params) + self.cost(self.PROFILE, canvas, self.params)
+            if total / workers > remaining:
+                break
+            angles.append(angle)
+
+        skipped = list(FaceDetector.ROTATION_ANGLES[len(angles):])
+        boxes = []
+        if angles:
+            boxes, report = FaceDetector.rotation_sweep(gray, scale, angles=angles, budget=max(0.0, remaining),
+                                                        params=self.params)
+            skipped += report['angles_skipped']
+        if len(skipped) < len(FaceDetector.ROTATION_ANGLES):
+            self.done.append('rotation')
+        else:
+            self.skipped.append('rotation')
+        self.angles_skipped = skipped
+        return boxes
+
+    def report(self):
+        report = {
+            'deadline_ms': round(self.deadline * 1000),
+            'elapsed_ms': round((time.perf_counter() - self.start) * 1000, 1),
+            'passes_done': self.done,
+            'passes_skipped': self.skipped,
+            'complete': not self.skipped and not self.angles_skipped,
+        }
+        if self.angles_skipped:
+            report['angles_skipped'] = self.angles_skipped
+        return report
+
+    @staticmethod
+    def describe(report):
+        """Passes sautées, en clair (chaîne vide si la détection est complète)"""
+        skipped = [AnytimeScan.LABELS.get(label, label) for label in report['passes_skipped']]
+        if report.get('angles_skipped') and 'rotation' not in report['passes_skipped']:
+            skipped.append("rotations " + ", ".join(f"{a:+d}°" for a in report['angles_skipped']))
+        return ", ".join(skipped)
+
+
+class DetectorTuner:
+    """Balayage des paramètres des cascades sur un jeu d'images annotées.
+
+    Le dossier contient les images et un `labels.json` de la forme
+    {"image.jpg": [[x, y, largeur, hauteur], ...]} en pleine résolution.
+    La détection se fait sur l'aperçu, comme en production.
+    """
+
+    LABELS_FILE = "labels.json"
+    GRID = {
+        'scale_factor': (1.05, 1.1, 1.2, 1.3),
+        'min_neighbors': (3, 4, 5, 6, 8),
+        'min_size': (20, 30, 40, 60),
+    }
+    IOU_THRESHOLD = 0.5
+    FAST_MIN_RECALL = 0.85  # part du meilleur rappel exigée pour le préréglage rapide
+
+    def __init__(self, dataset_dir, grid=None, log=print):
+        self.dataset_dir = Path(dataset_dir)
+        self.grid = dict(DetectorTuner.GRID)
+        self.grid.update({k: v for k, v in (grid or {}).items() if v})
+        self.log = log
+
+    def load_dataset(self):
+        with open(self.dataset_dir / DetectorTuner.LABELS_FILE, encoding='utf-8') as f:
+            labels = json.load(f)
+
+        samples = []
+        for name, boxes in sorted(labels.items()):
+            image, scale, size = ImageLoader.load_proxy(str(self.dataset_dir / name))
+            if image is None:
+                self.log(f"✗ {name} : illisible, ignorée")
+                continue
+            gray = cv2.equalizeHist(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+            samples.append({
+                'name': name,
+                'gray': gray,
+                'scale': scale,
+                'megapixels': size[0] * size[1] / 1e6,
+                'truth': [tuple(b) for b in boxes],
+            })
+        return samples
+
+    @staticmethod
+    def match(predicted, truth, threshold=None):
+        """Nombre de vraies détections (appariement glouton par IoU)"""
+        threshold = DetectorTuner.IOU_THRESHOLD if threshold is None else threshold
+        remaining = list(predicted)
+        hits = 0
+        for gt in truth:
+            scores = [FaceDetector.iou(gt, p) for p in remaining]
+            if scores and max(scores) >= threshold:
+                remaining.pop(scores.index(max(scores)))
+                hits += 1
+        return hits
+
+    def evaluate(self, samples, params):
+        hits = n_pred = n_truth = 0
+        elapsed = megapixels = 0.0
+        for sample in samples:
+            start = time.perf_counter()
+            boxes = FaceDetector._to_full(FaceDetector._cascade_boxes(sample['gray'], params=params), sample['scale'])
+            elapsed += time.perf_counter() - start
+
+            hits += DetectorTuner.match(boxes, sample['truth'])
+            n_pred += len(boxes)
+            n_truth += len(sample['truth'])
+            megapixels += sample['megapixels']
+
+        recall = hits / n_truth if n_truth else 1.0
+        precision = hits / n_pred if n_pred else 1.0
+        f1 = 2 * recall * precision / (recall + precision) if recall + precision else 0.0
+        return dict(
+            params,
+            recall=round(recall, 4),
+            precision=round(precision, 4),
+            f1=round(f1, 4),
+            ms_per_mp=round(elapsed * 1000 / max(megapixels, 1e-6), 2),
+        )
+
+    @staticmethod
+    def choose_presets(results):
+        """Rapide : le plus rapide qui garde l'essentiel du rappel ; équilibré : meilleur F1 ;
+        minutieux : meilleur rappel"""
+        best_recall = max(r['recall'] for r in results)
+        thorough = max(results, key=lambda r: (r['recall'], r['precision'], -r['ms_per_mp']))
+        balanced = max(results, key=lambda r: (r['f1'], -r['ms_per_mp']))
+        candidates = [r for r in results if r['recall'] >= DetectorTuner.FAST_MIN_RECALL * best_recall]
+        fast = min(candidates, key=lambda r: (r['ms_per_mp'], -r['recall']))
+        return {'fast': fast, 'balanced': balanced, 'thorough': thorough}
+
+    def run(self):
+        samples = self.load_dataset()
+        if not samples:
+            raise ValueError("Aucune image annotée exploitable")
+
+        combos = list(itertools.product(self.grid['scale_factor'], self.grid['min_neighbors'], self.grid['min_size']))
+        self.log(f"{len(samples)} image(s), {len(combos)} combinaison(s)")
+
+        results = []
+        for i, (scale_factor, min_neighbors, min_size) in enumerate(combos, 1):
+            params = {'scale_factor': scale_factor, 'min_neighbors': min_neighbors, 'min_size': min_size}
+            row = self.evaluate(samples, params)
+            results.append(row)
+            self.log(f"[{i}/{len(combos)}] {scale_factor} / {min_neighbors} / {min_size} : "
+                     f"rappel {row['recall']:.2f}, précision {row['precision']:.2f}, {row['ms_per_mp']:.0f} ms/Mpx")
+
+        return {'presets': DetectorTuner.choose_presets(results), 'results': results}
+
+
+class Effects:
+    """Effets d'anonymisation appliqués aux zones"""
+
+    @staticmethod
+    def region(box, scale, shape):
+        """Rectangle (x1, y1, x2, y2) réellement touché par une zone, ou None"""
+        x, y, w, h = (int(round(v * scale)) for v in box)
+        x1, y1 = max(0, x), max(0, y)
+        x2, y2 = min(shape[1], x + w), min(shape[0], y + h)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return x1, y1, x2, y2
+
+    @staticmethod
+    def apply(image, boxes, effect, intensity, scale=1.0):
+        """Applique l'effet sur place.
+
+        Les boîtes sont en coordonnées pleine résolution ; `scale` permet de
+        les appliquer sur un aperçu réduit avec un rendu équivalent. Sur une
+        image avec alpha, seuls les canaux de couleur sont modifiés.
+        """
+        target = image[..., :3] if image.ndim == 3 and image.shape[2] == 4 else image
+        for box in boxes:
+            rect = Effects.region(box, scale, image.shape)
+            if rect is None:
+                continue
+            x, y, x2, y2 = rect
+            roi = np.ascontiguousarray(target[y:y2, x:x2])
+            h, w = roi.shape[:2]
+
+            if effect == "pixelate":
+                pixel_size = max(1, int(round(max(2, intensity // 5) * scale)))
+                small = cv2.resize(roi, (max(1, w // pixel_size), max(1, h // pixel_size)), interpolation=cv2.INTER_LINEAR)
+                blurred = cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
+            elif effect == "blur":
+                ksize = int(round(intensity * scale)) * 2 + 1
+                blurred = cv2.GaussianBlur(roi, (ksize, ksize), 0)
+            elif effect == "black":
+                blurred = np.zeros_like(roi)
+            else:
+                blurred = roi
+
+            target[y:y+h, x:x+w] = blurred
+        return image
+
+
+class LRUCache:
+    """Cache LRU borné par un budget mémoire (en octets)"""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def size_of(value):
+        """Estimation de l'empreinte mémoire (les tableaux numpy dominent)"""
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, dict):
+            return 64 * len(value) + sum(LRUCache.size_of(v) for v in value.values())
+        if isinstance(value, (list, tuple)):
+            return 8 * len(value) + sum(LRUCache.size_of(v) for v in value)
+        if isinstance(value, (str, bytes)):
+            return len(value)
+        return 64
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def put(self, key, value):
+        size = LRUCache.size_of(value)
+        with self._lock:
+            if key in self._items:
+                self.used_bytes -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self.used_bytes += size
+            # On garde toujours l'entrée la plus récente, même hors budget
+            while self.used_bytes > self.budget_bytes and len(self._items) > 1:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.used_bytes -= evicted_size
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._items:
+                self.used_bytes -= self._items.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.used_bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+
+class ImageSession:
+    """Session multi-images sur un dossier : cache LRU et préchargement en tâche de fond.
+
+    Le cache contient les aperçus décodés et les rapports de métadonnées ;
+    les zones (détectées et manuelles) sont conservées à part et ne sont
+    jamais évincées, pour ne pas perdre le travail de relecture.
+    """
+
+    EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff', '.gif')
+    CACHE_BUDGET = 768 * 1024 * 1024
+    PREFETCH_COUNT = 3
+    THUMB_HEIGHT = 72
+
+    def __init__(self, folder, cache_budget=None, prefetch_count=None, predetect=True):
+        self.folder = Path(folder)
+        self.paths = sorted(
+            str(p) for p in self.folder.iterdir()
+            if p.is_file() and p.suffix.lower() in ImageSession.EXTENSIONS
+        )
+        self.index = 0
+        self.cache = LRUCache(cache_budget or ImageSession.CACHE_BUDGET)
+        self.prefetch_count = ImageSession.PREFETCH_COUNT if prefetch_count is None else prefetch_count
+        self.predetect = predetect
+        self.detect_options = {}  # options passées à FaceDetector.detect
+
+        self.edits = {}  # chemin -> {'faces': [...] ou None, 'manual': [...]}
+        self.thumbs = {}  # chemin -> miniature BGR (quelques Ko, conservée)
+        self.events = queue.Queue()  # chemins prêts, consommés par l'interface
+
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def __len__(self):
+        return len(self.paths)
+
+    @property
+    def current_path(self):
+        return self.paths[self.index] if self.paths else None
+
+    def edit_state(self, path):
+        with self._lock:
+            return self.edits.setdefault(path, {'faces': None, 'manual': []})
+
+    def load(self, path):
+        """Aperçu + métadonnées, depuis le cache ou décodés à la demande"""
+        while True:
+            entry = self.cache.get(path)
+            if entry is not None:
+                return entry
+            with self._lock:
+                event = self._inflight.get(path)
+                if event is None:
+                    self._inflight[path] = threading.Event()
+                    break
+            # Déjà en cours de décodage par le préchargement : on attend
+            event.wait()
+
+        try:
+            entry = self._decode(path)
+            if entry is not None:
+                self.cache.put(path, entry)
+            return entry
+        finally:
+            with self._lock:
+                self._inflight.pop(path).set()
+
+    def _decode(self, path):
+        try:
+            data = ImageLoader.read_bytes(path)
+        except OSError:
+            return None
+        image, scale, size = ImageLoader.load_proxy(path, data=data)
+        if image is None:
+            return None
+
+        h, w = image.shape[:2]
+        thumb_w = max(1, int(w * ImageSession.THUMB_HEIGHT / h))
+        self.thumbs[path] = cv2.resize(image, (thumb_w, ImageSession.THUMB_HEIGHT), interpolation=cv2.INTER_AREA)
+
+        return {
+            'image': image,
+            'scale': scale,
+            'size': size,
+            'data': data,
+            'metadata': MetadataManager.get_all_metadata(path, data),
+        }
+
+    def update_metadata(self, path, metadata):
+        entry = self.cache.get(path)
+        if entry is not None:
+            self.cache.put(path, dict(entry, metadata=metadata))
+
+    def ensure_detected(self, path, entry):
+        """Détection sur l'aperçu si l'image n'a pas encore de zones détectées"""
+        state = self.edit_state(path)
+        if state['faces'] is None:
+            faces = FaceDetector.detect(entry['image'], entry['scale'], **self.detect_options)
+            with self._lock:
+                if state['faces'] is None:
+                    state['faces'] = faces
+        return state['faces']
+
+    def _window(self):
+        start = max(0, self.index - 1)
+        return self.paths[start:self.index + self.prefetch_count + 1]
+
+    def prefetch(self):
+        """Planifie le décodage (et la pré-détection) des images suivantes"""
+        for path in self.paths[self.index + 1:self.index + self.prefetch_count + 1]:
+            with self._lock:
+                if path in self._pending:
+                    continue
+                self._pending.add(path)
+            self._queue.put(path)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                path = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            with self._lock:
+                self._pending.discard(path)
+            # L'utilisateur a pu avancer entre-temps : on ignore les chemins périmés
+            if path not in self._window():
+                continue
+
+            try:
+                entry = self.load(path)
+                if entry is not None and self.predetect:
+                    self.ensure_detected(path, entry)
+            except Exception:
+                pass
+            self.events.put(path)
+
+    def close(self):
+        self._stop.set()
+        self.cache.clear()
+
+
+class TilePyramid:
+    """Pyramide mipmap construite à la demande et découpée en tuiles.
+
+    Le niveau 0 est l'image de travail, chaque niveau suivant est réduit de
+    moitié. Un niveau n'est calculé que lorsqu'un zoom le demande, et seules
+    les tuiles visibles sont converties en RGB puis gardées en cache.
+    """
+
+    TILE = 256
+    CACHE_BUDGET = 256 * 1024 * 1024
+
+    def __init__(self, image, cache_budget=None):
+        self.tiles = LRUCache(cache_budget or TilePyramid.CACHE_BUDGET)
+        self._serial = itertools.count()
+        self.levels = [image]
+
+    @property
+    def base(self):
+        return self.levels[0]
+
+    def level(self, k):
+        """Niveau k (réduction 2^k), construit par demi-réductions successives"""
+        while len(self.levels) <= k:
+            prev = self.levels[-1]
+            h, w = prev.shape[0] // 2, prev.shape[1] // 2
+            if h < 1 or w < 1:
+                break
+            self.levels.append(cv2.resize(prev[:h * 2, :w * 2], (w, h), interpolation=cv2.INTER_AREA))
+        return self.levels[min(k, len(self.levels) - 1)]
+
+    def level_for(self, zoom):
+        """Niveau le plus réduit qui reste au moins aussi fin que l'affichage"""
+        k = 0
+        while zoom * 2 ** (k + 1) <= 1.0 and max(self.base.shape[:2]) >> (k + 1) >= TilePyramid.TILE:
+            k += 1
+        self.level(k)
+        return min(k, len(self.levels) - 1)
+
+    def grid(self, k):
+        h, w = self.level(k).shape[:2]
+        return -(-w // TilePyramid.TILE), -(-h // TilePyramid.TILE)
+
+    def tile(self, k, tx, ty):
+        """(numéro de version, tuile RGB) ; le numéro change quand la tuile est recalculée"""
+        key = (k, tx, ty)
+        cached = self.tiles.get(key)
+        if cached is not None:
+            return cached
+
+        t = TilePyramid.TILE
+        block = self.level(k)[ty * t:(ty + 1) * t, tx * t:(tx + 1) * t]
+        if block.ndim == 2:
+            rgb = cv2.cvtColor(block, cv2.COLOR_GRAY2RGB)
+        else:
+            rgb = cv2.cvtColor(block, cv2.COLOR_BGR2RGB)
+        cached = (next(self._serial), rgb)
+        self.tiles.put(key, cached)
+        return cached
+
+    def update(self, regions=None):
+        """Le niveau 0 a changé : recalcule les niveaux et tuiles concernés.
+
+        `regions` limite la mise à jour à des rectangles (x1, y1, x2, y2) du
+        niveau 0 ; sans régions, tout est invalidé.
+        """
+        if regions is None:
+            self.levels = [self.base]
+            self.tiles.clear()
+            return
+
+        t = TilePyramid.TILE
+        for (x1, y1, x2, y2) in regions:
+            for k in range(len(self.levels)):
+                if k > 0:
+                    # Même calcul que level() : moyenne 2x2 du niveau précédent
+                    x1, y1 = x1 // 2, y1 // 2
+                    h, w = self.levels[k].shape[:2]
+                    x2, y2 = min(w, -(-x2 // 2)), min(h, -(-y2 // 2))
+                    if x2 <= x1 or y2 <= y1:
+                        break
+                    src = self.levels[k - 1][y1 * 2:y2 * 2, x1 * 2:x2 * 2]
+                    self.levels[k][y1:y2, x1:x2] = cv2.resize(src, (x2 - x1, y2 - y1), interpolation=cv2.INTER_AREA)
+
+                for ty in range(y1 // t, -(-y2 // t)):
+                    for tx in range(x1 // t, -(-x2 // t)):
+                        self.tiles.discard((k, tx, ty))
+
+
+class NearDuplicates:
+    """Regroupement des rafales / quasi-doublons pour ne détecter qu'une fois par groupe"""
+
+    SIGNATURE_SIDE = 512  # côté long de l'image de signature (hash + alignement)
+    HASH_THRESHOLD = 6  # distance de Hamming max entre deux dHash 64 bits
+    MAX_SHIFT = 0.05  # décalage max toléré (fraction de la signature)
+    MIN_RESPONSE = 0.2  # pic minimal de la corrélation de phase
+    MIN_PATCH_SCORE = 0.7  # corrélation minimale d'une zone propagée
+
+    @staticmethod
+    def signature(image_path, data=None):
+        """Petite image en niveaux de gris décodée à résolution réduite.
+
+        Retourne (gris, échelle, (largeur, hauteur) pleine résolution) ou None.
+        """
+        image, scale, size = ImageLoader.load_proxy(image_path, NearDuplicates.SIGNATURE_SIDE, data)
+        if image is None:
+            return None
+        h, w = image.shape[:2]
+        ratio = min(1.0, NearDuplicates.SIGNATURE_SIDE / max(w, h))
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if ratio < 1.0:
+            gray = cv2.resize(gray, (max(1, int(w * ratio)), max(1, int(h * ratio))), interpolation=cv2.INTER_AREA)
+        return gray, scale * ratio, size
+
+    @staticmethod
+    def dhash(gray):
+        """Hash perceptuel par différences (64 bits)"""
+        small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return int(''.join('1' if b else '0' for b in bits), 2)
+
+    @staticmethod
+    def hamming(a, b):
+        return bin(a ^ b).count('1')
+
+    @staticmethod
+    def same_burst(leader, item, threshold=None):
+        """Un (chemin, hash, taille) appartient-il à la rafale de `leader` ?
+
+        Les rafales se suivent dans l'ordre des noms de fichiers : comparer
+        chaque image au premier élément du groupe courant suffit et reste
+        linéaire sur de gros lots.
+        """
+        threshold = NearDuplicates.HASH_THRESHOLD if threshold is None else threshold
+        _, leader_hash, leader_size = leader
+        _, h, size = item
+        return h is not None and leader_hash is not None and size == leader_size \
+            and NearDuplicates.hamming(h, leader_hash) <= threshold
+
+    @staticmethod
+    def propagate(leader_sig, sibling_sig, boxes):
+        """Reporte les zones du meneur sur une image sœur après vérification.
+
+        Retourne les zones décalées, ou None si l'alignement ou la
+        ressemblance des zones ne suffit pas (il faut alors détecter). Sans
+        zone à vérifier, rien ne garantit la ressemblance : None aussi.
+        """
+        if not boxes:
+            return None
+        gray_a, scale, _ = leader_sig
+        gray_b, scale_b, _ = sibling_sig
+        if gray_a.shape != gray_b.shape or abs(scale - scale_b) > 1e-6:
+            return None
+
+        h, w = gray_a.shape
+        (dx, dy), response = cv2.phaseCorrelate(np.float32(gray_a), np.float32(gray_b))
+        if response < NearDuplicates.MIN_RESPONSE:
+            return None
+        if abs(dx) > w * NearDuplicates.MAX_SHIFT or abs(dy) > h * NearDuplicates.MAX_SHIFT:
+            return None
+
+        shifted = []
+        for (x, y, bw, bh) in boxes:
+            sx, sy = int(round(x * scale)), int(round(y * scale))
+            sw, sh = max(1, int(round(bw * scale))), max(1, int(round(bh * scale)))
+            tx, ty = int(round(sx + dx)), int(round(sy + dy))
+            if sx < 0 or sy < 0 or tx < 0 or ty < 0 or sx + sw > w or sy + sh > h or tx + sw > w or ty + sh > h:
+                return None
+
+            patch_a = gray_a[sy:sy+sh, sx:sx+sw]
+            patch_b = gray_b[ty:ty+sh, tx:tx+sw]
+            if patch_a.std() > 1 and patch_b.std() > 1:
+                score = cv2.matchTemplate(patch_b, patch_a, cv2.TM_CCOEFF_NORMED)[0][0]
+                if score < NearDuplicates.MIN_PATCH_SCORE:
+                    return None
+
+            shifted.append((int(round(x + dx / scale)), int(round(y + dy / scale)), bw, bh))
+        return shifted
+
+
+class BatchManifest:
+    """Journal SQLite des fichiers traités, pour reprendre un lot interrompu.
+
+    Une ligne par fichier source : taille, date, empreinte du contenu,
+    empreinte des réglages, fichier produit, statut et entrée du rapport
+    (le rapport d'un lot repris est reconstruit d'ici). Un fichier est
+    sauté s'il a déjà été traité avec succès avec les mêmes réglages et
+    que sa sortie existe ; le contenu n'est haché que si la date a changé
+    sans que la taille change.
+    """
+
+    NAME = ".bal_masque_manifest.sqlite"
+
+    def __init__(self, path, fingerprint):
+        self.fingerprint = fingerprint
+        # Partagé entre la boucle et le fil de travail du mode surveillance, qui sérialisent leurs accès
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " input TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT,"
+            " settings TEXT, output TEXT, status TEXT, error TEXT, updated TEXT, entry TEXT)"
+        )
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(files)")]
+        if 'entry' not in columns:  # manifeste antérieur aux entrées de rapport
+            self.db.execute("ALTER TABLE files ADD COLUMN entry TEXT")
+        self.db.commit()
+
+    @staticmethod
+    def settings_fingerprint(settings):
+        """Empreinte des réglages, valeurs réelles du préréglage de détection comprises"""
+        settings = dict(settings)
+        options = dict(settings.get('detect_options') or {})
+        options['params'] = FaceDetector.preset_params(options.get('preset'))
+        settings['detect_options'] = options
+        encoded = json.dumps(settings, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha1(encoded).hexdigest()[:16]
+
+    @staticmethod
+    def content_hash(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def is_done(self, path, size, mtime_ns):
+        """Déjà traité à l'identique : comparaison de stat d'abord, hachage seulement si nécessaire"""
+        row = self.db.execute(
+            "SELECT size, mtime_ns, sha256, settings, output, status FROM files WHERE input = ?", (str(path),)
+        ).fetchone()
+        if row is None:
+            return False
+        old_size, old_mtime, sha256, settings, output, status = row
+        if status != 'done' or settings != self.fingerprint or size != old_size:
+            return False
+        if not output or not os.path.exists(output):
+            return False
+        if mtime_ns == old_mtime:
+            return True
+
+        # Date changée, même taille (copie, synchronisation…) : le contenu tranche
+        try:
+            same = BatchManifest.content_hash(ImageLoader.read_bytes(path)) == sha256
+        except OSError:
+            return False
+        if same:
+            self.db.execute("UPDATE files SET mtime_ns = ? WHERE input = ?", (mtime_ns, str(path)))
+            self.db.commit()
+        return same
+
+    def record(self, path, size, mtime_ns, entry):
+        status = 'error' if 'error' in entry else 'done'
+        self.db.execute(
+            "INSERT OR REPLACE INTO files (input, size, mtime_ns, sha256, settings, output, status, error, updated,"
+            " entry) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (str(path), size, mtime_ns, entry.get('sha256'), self.fingerprint, entry.get('output'),
+             status, entry.get('error'), datetime.now().isoformat(timespec='seconds'),
+             json.dumps(entry, ensure_ascii=False, default=str))
+        )
+        self.db.commit()
+
+    def signatures(self):
+        """(taille, date) de chaque fichier déjà traité avec ces réglages, en échec compris"""
+        rows = self.db.execute("SELECT input, size, mtime_ns FROM files WHERE settings = ?", (self.fingerprint,))
+        return {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+
+    def entries(self, paths, previous=None):
+        """Entrées du rapport enregistrées pour ces fichiers, toutes passes confondues (ordre des noms).
+
+        `previous` (nom -> entrée, rapport déjà écrit) complète les lignes
+        d'un manifeste antérieur aux entrées de rapport.
+        """
+        previous = previous or {}
+        entries = []
+        for path in paths:
+            row = self.db.execute(
+                "SELECT output, error, entry FROM files WHERE input = ?", (str(path),)
+            ).fetchone()
+            if row is None:
+                continue
+            output, error, entry = row
+            if entry:
+                entries.append(json.loads(entry))
+            elif Path(path).name in previous:
+                entries.append(previous[Path(path).name])
+            else:
+                entry = {'file': Path(path).name, 'output': output}
+                if error:
+                    entry['error'] = error
+                entries.append(entry)
+        return sorted(entries, key=lambda entry: entry['file'])
+
+    def close(self):
+        self.db.close()
+
+
+class MemoryBudget:
+    """Admission des images d'après leur en-tête, avant tout décodage.
+
+    La mémoire de pointe est estimée à partir des dimensions, de la
+    profondeur et du nombre d'images, copies de travail comprises. Sous le
+    budget, l'image est décodée entière. Au-delà, un JPEG à intervalles de
+    redémarrage est traité par bandes à pleine résolution, un autre JPEG est
+    décodé réduit dans le domaine DCT, et les autres formats sont refusés,
+    comme tout ce qui dépasse `max_pixels`.
+    """
+
+    BUDGET = 1024 * 1024 * 1024  # octets pour une image en cours de traitement
+    MAX_PIXELS = 250_000_000
+    WORKING_COPIES = 3  # image décodée, conversion pour l'encodeur, tampon d'encodage
+
+    def __init__(self, budget=None, max_pixels=None):
+        self.budget = budget or MemoryBudget.BUDGET
+        self.max_pixels = max_pixels or MemoryBudget.MAX_PIXELS
+
+    @staticmethod
+    def configure_pillow(max_pixels=None):
+        """Garde anti-bombe de Pillow calée sur notre limite, une fois au démarrage du processus.
+
+        Pillow refuse au-delà de 2 × MAX_IMAGE_PIXELS : sans ce réglage, un
+        en-tête entre cette valeur et `max_pixels` serait pris pour une bombe.
+        Le réglage vaut pour tout le processus, d'où un appel explicite par
+        point d'entrée (interface, ligne de commande, processus de travail).
+        """
+        max_pixels = max_pixels or MemoryBudget.MAX_PIXELS
+        if Image.MAX_IMAGE_PIXELS is not None:
+            Image.MAX_IMAGE_PIXELS = max(Image.MAX_IMAGE_PIXELS, max_pixels)
+
+    @staticmethod
+    def estimate(probe):
+        """Octets de pointe estimés pour traiter l'image entière en mémoire"""
+        frame = probe['width'] * probe['height'] * probe['channels'] * max(1, probe['depth'] // 8)
+        if probe['frames'] > 1 and probe['format'] in ('GIF', 'PNG', 'WEBP'):
+            # Animations : toutes les images restent en mémoire (RGBA) jusqu'à l'encodage
+            return probe['frames'] * probe['width'] * probe['height'] * 4 + MemoryBudget.WORKING_COPIES * frame
+        return MemoryBudget.WORKING_COPIES * frame  # pages TIFF : une à la fois
+
+    def route(self, probe, data=None):
+        """('full', 1), ('bands', lignes de MCU par bande) ou ('reduced', facteur) ; ValueError si refusée.
+
+        Sans `data`, le traitement par bandes n'est pas envisagé : l'appel
+        sert alors à refuser au plus tôt, avant de lire le fichier.
+        """
+        pixels = probe['width'] * probe['height']
+        if pixels > self.max_pixels:
+            raise ValueError(f"refusée : {probe['width']}×{probe['height']}, au-delà de {self.max_pixels / 1e6:g} Mpx")
+        needed = MemoryBudget.estimate(probe)
+        if needed <= self.budget:
+            return 'full', 1
+        over = f"≈ {needed / 2**20:.0f} Mo pour un budget de {self.budget / 2**20:.0f} Mo"
+        if probe['format'] not in ('JPEG', 'MPO'):  # MPO : JPEG multi-vues, seule la première est lue
+            raise ValueError(f"refusée : trop grande pour le budget mémoire ({over})")
+
+        if data is not None:
+            try:
+                layout = JpegSplice.layout(data)
+            except ValueError:
+                layout = None
+            if layout is not None:
+                rows = self.budget // (layout['mcu_h'] * layout['width'] * probe['channels'] * MemoryBudget.WORKING_COPIES)
+                if rows >= layout['step'] and JpegSplice.compatible(layout):
+                    return 'bands', rows
+        for factor in sorted(ImageLoader.REDUCED_FLAGS):
+            if needed / factor ** 2 <= self.budget:
+                return 'reduced', factor
+        raise ValueError(f"refusée : trop grande même réduite ({over})")
+
+
+class BatchProcessor:
+    """Traitement par lot d'un dossier, sans interface"""
+
+    REPORT_NAME = "rapport_bal_masque.json"
+
+    def __init__(self, effect="pixelate", intensity=20, check_metadata=True, dedup=True,
+                 verify="flag", profile=None, detect_options=None, partial_jpeg=False, memory_budget=None,
+                 max_pixels=None, workers=1, resume=True, log=print):
+        self.effect = effect
+        self.intensity = intensity
+        self.check_metadata = check_metadata  # les sorties sont toujours ré-encodées sans métadonnées
+        self.dedup = dedup
+        self.verify = verify  # "off", "flag" (signaler) ou "redact" (masquer aussi)
+        self.profile = profile or ExportProfiles.DEFAULT
+        self.detect_options = detect_options or {}
+        self.partial_jpeg = partial_jpeg  # JPEG vers JPEG : ne ré-encoder que les blocs masqués
+        self.admission = MemoryBudget(memory_budget, max_pixels)
+        self.workers = max(1, workers)
+        self.resume = resume  # False : tout retraiter (le manifeste est tout de même mis à jour)
+        self.log = log
+        self.stats = {'images': 0, 'detections': 0, 'propagated': 0, 'residual': 0, 'errors': 0, 'skipped': 0}
+        self.report = []
+
+    @property
+    def settings(self):
+        """Réglages transmis aux processus de travail (petit dict sérialisable)"""
+        return {
+            'effect': self.effect, 'intensity': self.intensity, 'check_metadata': self.check_metadata,
+            'dedup': self.dedup, 'verify': self.verify, 'profile': self.profile,
+            'detect_options': self.detect_options, 'partial_jpeg': self.partial_jpeg,
+            'memory_budget': self.admission.budget, 'max_pixels': self.admission.max_pixels,
+        }
+
+    def merge_stats(self, stats):
+        """Ajoute les compteurs d'un processus de travail"""
+        for key, value in stats.items():
+            if isinstance(value, dict):  # 'prefilter', 'anytime'
+                totals = self.stats.setdefault(key, dict.fromkeys(value, 0))
+                for name, amount in value.items():
+                    totals[name] = round(totals[name] + amount, 1)
+            else:
+                self.stats[key] += value
+
+    @staticmethod
+    def list_images(input_dir):
+        return sorted(
+            str(p) for p in Path(input_dir).iterdir()
+            if p.is_file() and p.suffix.lower() in ImageSession.EXTENSIONS
+        )
+
+    def detect(self, image_path, data=None):
+        """Détection sur l'aperçu ; retourne (boîtes, rapports du préfiltre et de l'échéance pour l'entrée)"""
+        image, scale, _ = ImageLoader.load_proxy(image_path, data=data)
+        if image is None:
+            raise IOError(f"Impossible de charger {image_path}")
+        self.stats['detections'] += 1
+        report = {}
+        boxes = FaceDetector.detect(image, scale, report=report, **self.detect_options)
+        anytime = report.pop('anytime', None)
+        detection = {}
+        if anytime:
+            totals = self.stats.setdefault('anytime', {'partial': 0, 'passes_skipped': 0})
+            totals['partial'] += int(not anytime['complete'])
+            totals['passes_skipped'] += len(anytime['passes_skipped'])
+            detection['anytime'] = anytime
+        if report:
+            detection['prefilter'] = report
+            prefilter = self.stats.setdefault('prefilter', {'pixels_scanned': 0, 'pixels_total': 0,
+                                                            'fallbacks': 0, 'saved_ms': 0.0})
+            prefilter['pixels_scanned'] += report['pixels_scanned']
+            prefilter['pixels_total'] += report['pixels_total']
+            prefilter['fallbacks'] += int(report['fallback'])
+            prefilter['saved_ms'] = round(prefilter['saved_ms'] + (report['saved_ms'] or 0.0), 1)
+        return boxes, detection
+
+    @staticmethod
+    def output_name(image_path, output):
+        """Nom de la sortie : son chemin, ou celui de la source pour un fichier objet (membre d'archive)"""
+        return str(image_path if hasattr(output, 'write') else output)
+
+    @staticmethod
+    def write(output, encoded):
+        """Vers un fichier objet (membre d'archive) ou, atomiquement, un chemin : jamais de sortie à moitié écrite"""
+        if hasattr(output, 'write'):
+            output.write(encoded)
+            return
+
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                f.write(encoded)
+
+        MetadataManager.write_atomically(output, write)
+
+    def export(self, image_path, output, boxes, data, route):
+        """Export selon l'aiguillage du budget mémoire (MemoryBudget.route)"""
+        kind, amount = route
+        if kind == 'bands':
+            return self.process_bands(image_path, output, boxes, data, amount)
+        return self.process(image_path, output, boxes, data, factor=amount)
+
+    def process(self, image_path, output, boxes, data=None, factor=1):
+        """Effets en pleine résolution, vérification puis encodage unique sans métadonnées.
+
+        `data` est le contenu du fichier déjà lu pour la détection ; `output`
+        est un chemin ou un fichier objet. Avec `factor` > 1, l'image est
+        décodée et exportée réduite (budget mémoire dépassé). Retourne
+        l'entrée du rapport d'export pour cette image.
+        """
+        image = ImageLoader.load_full(image_path, data, factor)
+        if image is None:
+            raise IOError(f"Impossible de charger {image_path}")
+
+        name = self.output_name(image_path, output)
+        entry = {'file': Path(image_path).name, 'output': name, 'zones': 0}
+        scale = 1.0
+        if factor > 1:
+            scale = image.shape[1] / ImageLoader.get_size(image_path, data)[0]
+            entry['route'] = f"réduite 1/{factor}"
+        check = self.redact(image, boxes, entry, scale)
+        if check is not None:
+            entry['verification'] = check
+
+        start = time.perf_counter()
+        encoded = None
+        if self.partial_jpeg and factor == 1 and Path(name).suffix.lower() in ImageLoader.JPEG_EXTENSIONS:
+            applied = list(boxes) + (check['residual'] if check and check.get('redacted') else [])
+            rects = [rect for rect in (Effects.region(box, 1.0, image.shape) for box in applied) if rect]
+            try:
+                source = data if data is not None else ImageLoader.read_bytes(image_path)
+                encoded, share = JpegSplice.encode(source, image, rects)
+                entry['partial_jpeg'] = round(share, 3)
+            except ValueError as e:
+                entry['partial_jpeg'] = f"encodage complet : {e}"
+        if encoded is None:
+            encoded = ExportProfiles.encode(image, Path(name).suffix, self.profile)
+        self.write(output, encoded)
+        entry['encode_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        return self.finish(entry, output, encoded)
+
+    def process_bands(self, image_path, output, boxes, data, max_rows):
+        """JPEG trop grand pour le budget : masqué bande par bande, jamais décodé en entier.
+
+        La vérification des visages résiduels se fait sur l'aperçu, masqué
+        de la même façon ; chaque bande compte au plus `max_rows` lignes de
+        MCU. Le reste du fichier est recopié tel quel.
+        """
+        name = self.output_name(image_path, output)
+        entry = {'file': Path(image_path).name, 'output': name, 'zones': 0, 'route': "par bandes"}
+        preview, scale, size = ImageLoader.load_proxy(image_path, data=data)
+        if preview is None:
+            raise IOError(f"Impossible de charger {image_path}")
+        check = self.redact(preview, boxes, entry, scale)
+        if check is not None:
+            entry['verification'] = check
+        applied = list(boxes) + (check['residual'] if check and check.get('redacted') else [])
+        shape = (size[1], size[0])
+        rects = [rect for rect in (Effects.region(box, 1.0, shape) for box in applied) if rect]
+
+        def apply(pixels, local):
+            Effects.apply(pixels, [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in local],
+                          self.effect, self.intensity)
+
+        start = time.perf_counter()
+        encoded, share = JpegSplice.redact(data, rects, apply, max_rows)
+        entry['partial_jpeg'] = round(share, 3)
+        self.write(output, encoded)
+        entry['encode_ms'] = round((time.perf_counter() - start) * 1000, 1)  # décodage des bandes compris
+        return self.finish(entry, output, encoded)
+
+    def redact(self, image, boxes, entry, scale=1.0):
+        """Effets puis vérification des visages résiduels, sur place.
+
+        Les boîtes sont en pleine résolution, `scale` les ramène à `image`.
+        Ajoute les zones masquées à `entry` et retourne le rapport de
+        vérification (None si elle est désactivée).
+        """
+        Effects.apply(image, boxes, self.effect, self.intensity, scale)
+        entry['zones'] += len(boxes)
+        if self.verify == "off":
+            return None
+
+        check = FaceDetector.verify_residual(image, boxes, scale)
+        if check['residual']:
+            self.stats['residual'] += len(check['residual'])
+            if self.verify == "redact":
+                Effects.apply(image, check['residual'], self.effect, self.intensity, scale)
+                entry['zones'] += len(check['residual'])
+                check['redacted'] = True
+        return check
+
+    def process_frames(self, image_path, output, data, count):
+        """Document multipage ou animation : chaque image est détectée et masquée à son tour.
+
+        Les pages sont traitées au fil du décodage puis ré-assemblées dans le
+        même format ; profondeur et alpha sont conservés. Retourne l'entrée
+        du rapport, avec le détail par page dans `verification['frames']`.
+        """
+        name = self.output_name(image_path, output)
+        entry = {'file': Path(image_path).name, 'output': name, 'zones': 0, 'frames': count}
+        frames, residual = [], []
+
+        def redact_frame(frame):
+            preview, scale = ImageLoader.frame_proxy(frame)
+            self.stats['detections'] += 1
+            boxes = FaceDetector.detect(preview, scale, **self.detect_options)
+            zones = entry['zones']
+            check = self.redact(frame, boxes, entry)
+            found = check['residual'] if check else []
+            residual.extend(found)
+            frames.append({'frame': len(frames), 'zones': entry['zones'] - zones, 'residual': found})
+            return frame
+
+        start = time.perf_counter()
+        ext = Path(name).suffix.lower()
+        if ext in ImageLoader.TIFF_EXTENSIONS:
+            pages = (redact_frame(page) for page in FrameStream.tiff_pages(data, count))
+            FrameStream.write_tiff(output, pages, self.profile)
+        else:
+            animation = ((redact_frame(frame), duration) for frame, duration in FrameStream.animation_frames(data))
+            FrameStream.write_animation(output, animation, ext, FrameStream.loop(data), self.profile)
+        entry['encode_ms'] = round((time.perf_counter() - start) * 1000, 1)  # décodage et détection compris
+
+        if self.verify != "off":
+            entry['verification'] = {'residual': residual, 'frames': frames}
+        return self.finish(entry, output)
+
+    def anonymize(self, image_path, output, data):
+        """Admission, détection puis export d'un fichier (vers un chemin ou un fichier objet), quel que soit son nombre de pages"""
+        route = self.admission.route(ImageLoader.probe(image_path, data), data)
+        count = FrameStream.count(image_path, data)
+        if count > 1:
+            return self.process_frames(image_path, output, data, count)
+        boxes, detection = self.detect(image_path, data)
+        entry = self.export(image_path, output, boxes, data, route)
+        entry.update(detection)
+        return entry
+
+    def finish(self, entry, output, encoded=None):
+        if encoded is None and hasattr(output, 'getvalue'):
+            encoded = output.getvalue()
+        entry['size'] = len(encoded) if encoded is not None else os.path.getsize(output)
+        if self.check_metadata:
+            # Contrôle de la sortie écrite (lecture seule, pas de ré-encodage)
+            check = MetadataManager.get_all_metadata(entry['output'], encoded, on_disk=not hasattr(output, 'write'))
+            entry['metadata_risk'] = check.get('risk_score', 0)
+        return entry
+
+    def run(self, input_dir, output_dir):
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        manifest = BatchManifest(Path(output_dir) / BatchManifest.NAME,
+                                 BatchManifest.settings_fingerprint(self.settings))
+        try:
+            return self._run(input_dir, output_dir, manifest)
+        finally:
+            manifest.close()
+
+    def _run(self, input_dir, output_dir, manifest):
+        # Fichiers déjà traités à l'identique : sautés avant toute lecture
+        paths, sources = [], {}
+        for path in self.list_images(input_dir):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            sources[Path(path).name] = (path, st.st_size, st.st_mtime_ns)
+            if self.resume and manifest.is_done(path, st.st_size, st.st_mtime_ns):
+                self.stats['skipped'] += 1
+                continue
+            paths.append(path)  # refus sur l'en-tête à la lecture, dans process_files
+        if self.stats['skipped']:
+            self.log(f"Reprise : {self.stats['skipped']} fichier(s) déjà traité(s), {len(paths)} à traiter")
+
+        def record(entries):
+            for entry in entries:
+                path, size, mtime_ns = sources[entry['file']]
+                manifest.record(path, size, mtime_ns, entry)
+
+        if self.workers > 1:
+            chunks = [paths[i:i + BatchWorkers.CHUNK] for i in range(0, len(paths), BatchWorkers.CHUNK)]
+            with BatchWorkers(self.settings, self.workers) as pool:
+                for report, stats, lines in pool.map(chunks, output_dir):
+                    self.report.extend(report)
+                    record(report)
+                    self.merge_stats(stats)
+                    for line in lines:
+                        self.log(line)
+            self.report.sort(key=lambda entry: entry['file'])
+        else:
+            self.process_files(paths, output_dir, record)
+
+        # Rapport de tout le dossier, passes précédentes comprises (lot repris) ; les compteurs sont ceux de cette passe
+        report_path = Path(output_dir) / BatchProcessor.REPORT_NAME
+        previous = {}
+        try:
+            with open(report_path, encoding='utf-8') as f:
+                previous = {entry['file']: entry for entry in json.load(f).get('images', [])}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+        images = manifest.entries((path for path, _, _ in sources.values()), previous)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({'stats': self.stats, 'images': images}, f, ensure_ascii=False, indent=2, default=str)
+
+        self.log(
+            f"{self.stats['images']} image(s) traitée(s), {self.stats['detections']} détection(s), "
+            f"{self.stats['propagated']} image(s) reprise(s) d'une voisine, "
+            f"{self.stats['residual']} visage(s) résiduel(s), {self.stats['errors']} erreur(s), "
+            f"{self.stats['skipped']} déjà traitée(s)"
+        )
+        prefilter = self.stats.get('prefilter')
+        if prefilter and prefilter['pixels_total']:
+            share = 100 * prefilter['pixels_scanned'] / prefilter['pixels_total']
+            self.log(
+                f"Préfiltre : {share:.0f} % des pixels analysés, {prefilter['fallbacks']} balayage(s) complet(s), "
+                f"≈ {prefilter['saved_ms'] / 1000:.1f} s gagnée(s)"
+            )
+        anytime = self.stats.get('anytime')
+        if anytime and anytime['partial']:
+            self.log(
+                f"Échéance de {self.detect_options['deadline'] * 1000:.0f} ms : {anytime['partial']} image(s) "
+                f"à détection partielle, {anytime['passes_skipped']} passe(s) sautée(s)"
+            )
+        return self.stats
+
+    def propagation_holds(self, image_path, data, boxes):
+        """Aucun visage sur l'aperçu d'une image sœur hors des zones reportées.
+
+        Un visage apparu après le meneur n'est couvert par aucune zone : la
+        recherche des visages résiduels sur l'aperçu le repère, et l'image
+        est alors détectée normalement.
+        """
+        preview, scale, _ = ImageLoader.load_proxy(image_path, data=data)
+        if preview is None:
+            return False
+        return not FaceDetector.verify_residual(preview, boxes, scale)['residual']
+
+    def read_admitted(self, image_path):
+        """Contenu d'un fichier, refusé (ValueError) sur son en-tête avant d'être lu en entier"""
+        def check(f):
+            self.admission.route(ImageLoader.probe(image_path, stream=f))
+        return ImageLoader.read_bytes(image_path, check)
+
+    def process_files(self, paths, output_dir, record=None):
+        """Lit chaque fichier une seule fois, forme les rafales au fil de la lecture et les traite.
+
+        Le contenu lu et la signature qui en est décodée servent au
+        regroupement comme au traitement ; seule la rafale en cours reste en
+        mémoire. `record` reçoit les entrées du rapport de chaque rafale
+        terminée (manifeste de reprise).
+        """
+        group, contents, signatures, leader = [], {}, {}, None
+
+        def flush():
+            done = len(self.report)
+            self.process_group(group, output_dir, contents, signatures)
+            if record:
+                record(self.report[done:])
+
+        for path in paths:
+            try:
+                data = self.read_admitted(path)
+            except (OSError, ValueError) as e:
+                data = e  # signalé par process_group
+            item, sig = (path, None, None), None
+            if self.dedup and not isinstance(data, Exception):
+                sig = NearDuplicates.signature(path, data)
+                if sig is not None:
+                    item = (path, NearDuplicates.dhash(sig[0]), sig[2])
+            if group and not NearDuplicates.same_burst(leader, item):
+                flush()
+                group, contents, signatures = [], {}, {}
+            if not group:
+                leader = item
+            group.append(path)
+            contents[path] = data
+            if sig is not None:
+                signatures[path] = sig
+        if group:
+            flush()
+
+    def process_group(self, group, output_dir, contents=None, signatures=None):
+        """Traite une rafale (ou une image seule) : détection sur la première, report sur les suivantes.
+
+        `contents` donne le contenu déjà lu de chaque fichier ; à défaut, il
+        est lu ici, une seule fois par fichier. `signatures` évite de
+        redécoder celles déjà calculées pour le regroupement.
+        """
+        signatures = signatures or {}
+        leader_boxes = None
+        leader_sig = None
+
+        for i, path in enumerate(group):
+            output_path = Path(output_dir) / Path(path).name
+            try:
+                # Une seule lecture du fichier pour la détection et l'export
+                data = contents[path] if contents else ImageLoader.read_bytes(path)
+                if isinstance(data, Exception):
+                    raise data
+                route = self.admission.route(ImageLoader.probe(path, data), data)
+                count = FrameStream.count(path, data)
+                if count > 1:
+                    # Pages détectées une à une, sans report depuis une voisine
+                    entry = self.process_frames(path, output_path, data, count)
+                else:
+                    boxes, detection = None, {}
+                    if i > 0 and leader_boxes is not None:
+                        sig = signatures.get(path) or NearDuplicates.signature(path, data)
+                        if sig is not None:
+                            boxes = NearDuplicates.propagate(leader_sig, sig, leader_boxes)
+                        if boxes is not None and not self.propagation_holds(path, data, boxes):
+                            boxes = None
+                        if boxes is not None:
+                            self.stats['propagated'] += 1
+
+                    if boxes is None:
+                        boxes, detection = self.detect(path, data)
+                        if i == 0 and len(group) > 1:
+                            leader_boxes = boxes
+                            leader_sig = signatures.get(path) or NearDuplicates.signature(path, data)
+
+                    entry = self.export(path, output_path, boxes, data, route)
+                    entry.update(detection)
+                entry['sha256'] = BatchManifest.content_hash(data)
+                self.stats['images'] += 1
+                self.report.append(entry)
+
+                message = f"✓ {Path(path).name} : {entry['zones']} zone(s)"
+                if count > 1:
+                    message += f" sur {count} pages"
+                residual = entry.get('verification', {}).get('residual')
+                if residual:
+                    action = "masqué(s)" if self.verify == "redact" else "à vérifier"
+                    message += f" — ⚠️ {len(residual)} visage(s) résiduel(s) {action}"
+                self.log(message)
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.report.append({'file': Path(path).name, 'error': str(e)})
+                self.log(f"✗ {Path(path).name} : {e}")
+
+
+def _batch_worker(tasks, results, settings, presets):
+    """Boucle d'un processus de travail : une suite de fichiers par tâche, réponses de quelques Ko"""
+    MemoryBudget.configure_pillow(settings['max_pixels'])
+    # Préréglages du processus parent (ceux de l'empreinte du manifeste), `tune` compris
+    FaceDetector.PRESETS.update(presets)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, paths, output_dir = task
+        lines = []
+        processor = BatchProcessor(log=lines.append, **settings)
+        processor.process_files(paths, output_dir)
+        results.put((task_id, processor.report, processor.stats, lines))
+
+
+class BatchWorkers:
+    """Processus de travail pour `batch --workers N`.
+
+    Chaque processus lit, décode, masque et encode lui-même une suite de
+    fichiers consécutifs (BatchProcessor.process_files) : ni image décodée
+    ni contenu de fichier ne traverse les processus, seuls des chemins et
+    des rapports passent par les files. Chaque fichier est lu une fois, par
+    le processus qui le traite. Une rafale à cheval sur deux suites est
+    détectée une fois de chaque côté.
+    """
+
+    CHUNK = 8  # fichiers par tâche
+
+    def __init__(self, settings, workers):
+        self.settings = settings
+        self.count = workers
+        context = multiprocessing.get_context("spawn")
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.processes = [
+            context.Process(target=_batch_worker, args=(self.tasks, self.results, settings, FaceDetector.PRESETS),
+                            daemon=True)
+            for _ in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def collect(self):
+        """Résultat suivant ; erreur si un processus de travail est mort"""
+        while True:
+            try:
+                return self.results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [p for p in self.processes if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Processus de travail arrêté (code {dead[0].exitcode})")
+
+    def map(self, chunks, output_dir):
+        """Traite les suites de fichiers, au plus deux par processus en vol.
+
+        Produit (rapport, compteurs, lignes de journal) dans l'ordre d'achèvement.
+        """
+        pending = set()
+        chunks = iter(enumerate(chunks))
+        for task_id, chunk in itertools.islice(chunks, 2 * self.count):
+            self.tasks.put((task_id, chunk, str(output_dir)))
+            pending.add(task_id)
+
+        while pending:
+            task_id, report, stats, lines = self.collect()
+            pending.discard(task_id)
+            for next_id, chunk in itertools.islice(chunks, 1):
+                self.tasks.put((next_id, chunk, str(output_dir)))
+                pending.add(next_id)
+            yield report, stats, lines
+
+    def close(self):
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+class FolderWatcher:
+    """Surveillance d'un dossier de dépôt : chaque image terminée est anonymisée dans le dossier de sortie.
+
+    Sous Linux, les changements arrivent par inotify (via ctypes) ; ailleurs,
+    ou si inotify n'est pas disponible, le dossier est parcouru périodiquement.
+    Dans les deux cas, un fichier n'est traité qu'une fois sa taille et sa date
+    stables pendant `debounce` secondes (copies et synchronisations en cours).
+    Les fichiers traités sont consignés dans le manifeste SQLite du dossier
+    de sortie (une ligne par fichier, comme pour `batch`).
+    """
+
+    RECORD_NAME = ".bal_masque_traites.json"  # ancien registre JSON, importé dans le manifeste
+    DEBOUNCE = 2.0  # secondes sans changement avant traitement
+    POLL_INTERVAL = 1.0
+    QUEUE_SIZE = 32
+    TEMP_SUFFIXES = ('.part', '.tmp', '.crdownload', '.partial')
+
+    # Constantes inotify (linux/inotify.h)
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+
+    def __init__(self, input_dir, output_dir, processor, debounce=None, poll=False,
+                 poll_interval=None, queue_size=None, log=print):
+        self.input_dir = Path(input_dir).resolve()
+        self.output_dir = Path(output_dir).resolve()
+        if self.input_dir == self.output_dir:
+            raise ValueError("Le dossier de sortie doit être différent du dossier surveillé")
+        self.processor = processor
+        self.debounce = FolderWatcher.DEBOUNCE if debounce is None else debounce
+        self.poll_interval = poll_interval or FolderWatcher.POLL_INTERVAL
+        self.log = log
+        self.record_path = self.output_dir / FolderWatcher.RECORD_NAME
+        self.manifest = None
+        self.record = {}  # chemin -> (taille, date), copie en mémoire du manifeste
+        self.pending = {}  # chemin -> (signature, instant du dernier changement)
+        self.queued = set()
+        self.work = queue.Queue(maxsize=queue_size or FolderWatcher.QUEUE_SIZE)
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._fd = None if poll else self._open_inotify()
+
+    def _open_inotify(self):
+        """Descripteur inotify sur le dossier d'entrée, None si indisponible"""
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(FolderWatcher.IN_NONBLOCK | FolderWatcher.IN_CLOEXEC)
+            if fd < 0:
+                return None
+            mask = (FolderWatcher.IN_CLOSE_WRITE | FolderWatcher.IN_MOVED_TO
+                    | FolderWatcher.IN_CREATE | FolderWatcher.IN_MODIFY)
+            if libc.inotify_add_watch(fd, os.fsencode(self.input_dir), mask) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except (OSError, AttributeError):
+            return None
+
+    @staticmethod
+    def signature(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def wanted(self, path):
+        path = Path(path)
+        name = path.name
+        return (not name.startswith('.') and not name.lower().endswith(FolderWatcher.TEMP_SUFFIXES)
+                and path.suffix.lower() in ImageSession.EXTENSIONS)
+
+    def load_record(self):
+        self.manifest = BatchManifest(self.output_dir / BatchManifest.NAME,
+                                      BatchManifest.settings_fingerprint(self.processor.settings))
+        self.record = self.manifest.signatures()
+        if not self.record_path.is_file():
+            return
+
+        # Registre JSON d'une version antérieure : repris une fois, puis supprimé
+        try:
+            with open(self.record_path, encoding='utf-8') as f:
+                old = json.load(f)
+        except (OSError, ValueError) as e:
+            self.log(f"Ancien registre illisible, ignoré : {e}")
+            return
+        for name, entry in old.items():
+            path = str(self.input_dir / name)
+            if path not in self.record:
+                self.manifest.record(path, entry['size'], entry['mtime_ns'], dict(entry, file=name))
+                self.record[path] = (entry['size'], entry['mtime_ns'])
+        self.record_path.unlink()
+
+    def is_done(self, path, sig):
+        """Déjà traité (ou déjà en échec) dans cette version du fichier"""
+        return self.record.get(str(path)) == tuple(sig)
+
+    def nominate(self, path):
+        """Signale un fichier nouveau ou modifié : il repart pour une période de stabilité"""
+        path = str(path)
+        if not self.wanted(path) or path in self.queued:
+            return
+        sig = self.signature(path)
+        if sig is None:
+            self.pending.pop(path, None)
+            return
+        previous = self.pending.get(path)
+        if previous is None or previous[0] != sig:
+            with self._lock:
+                if self.is_done(path, sig):
+                    return
+            self.pending[path] = (sig, time.monotonic())
+
+    def scan(self):
+        """Parcours complet du dossier (démarrage, mode sans inotify, débordement de file)"""
+        try:
+            with os.scandir(self.input_dir) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        self.nominate(entry.path)
+        except OSError as e:
+            self.log(f"✗ Lecture de {self.input_dir} impossible : {e}")
+
+    def read_events(self, timeout):
+        """Attend les événements inotify au plus `timeout` secondes"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + 16 <= len(data):
+            _, mask, _, length = struct.unpack_from('iIII', data, offset)
+            name = data[offset + 16:offset + 16 + length].split(b'\0', 1)[0]
+            offset += 16 + length
+            if mask & FolderWatcher.IN_Q_OVERFLOW:
+                self.scan()
+            elif name:
+                self.nominate(self.input_dir / os.fsdecode(name))
+
+    def promote(self):
+        """Met en file les fichiers stables ; si la file est pleine, ils attendent le tour suivant"""
+        now = time.monotonic()
+        for path, (sig, since) in list(self.pending.items()):
+            current = self.signature(path)
+            if current is None:
+                del self.pending[path]
+            elif current != sig:
+                self.pending[path] = (current, now)
+            elif now - since >= self.debounce:
+                try:
+                    self.work.put_nowait((path, sig))
+                except queue.Full:
+                    return
+                del self.pending[path]
+                self.queued.add(path)
+
+    def _worker(self):
+        while not self.stop_event.is_set():
+            try:
+                path, sig = self.work.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.process(path, sig)
+            finally:
+                self.queued.discard(path)
+                self.work.task_done()
+
+    def process(self, path, sig):
+        name = Path(path).name
+        start = time.perf_counter()
+        output = self.output_dir / name
+        entry = {'file': name, 'output': str(output), 'time': datetime.now().isoformat(timespec='seconds')}
+        try:
+            data = self.processor.read_admitted(path)  # refus sur l'en-tête, avant lecture complète
+            report = self.processor.anonymize(path, output, data)
+            entry['zones'] = report['zones']
+            self.processor.stats['images'] += 1
+            residual = report.get('verification', {}).get('residual')
+            message = f"✓ {name} : {report['zones']} zone(s) en {time.perf_counter() - start:.1f} s"
+            if residual:
+                message += f" — ⚠️ {len(residual)} visage(s) résiduel(s)"
+            self.log(message)
+        except Exception as e:
+            # Noté pour ne pas boucler : retenté seulement si le fichier change
+            entry['error'] = str(e)
+            self.processor.stats['errors'] += 1
+            self.log(f"✗ {name} : {e}")
+        # Une ligne du manifeste par fichier : coût constant, quel que soit l'historique
+        with self._lock:
+            self.record[str(path)] = tuple(sig)
+            self.manifest.record(path, sig[0], sig[1], entry)
+
+    def run(self):
+        """Boucle principale, jusqu'à stop() ou Ctrl+C"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.load_record()
+        worker = threading.Thread(target=self._worker, daemon=True)
+        worker.start()
+
+        mode = "inotify" if self._fd is not None else f"scrutation toutes les {self.poll_interval:g} s"
+        self.log(f"👁 Surveillance de {self.input_dir} ({mode}) → {self.output_dir}")
+        self.scan()
+        try:
+            tick = min(0.5, self.debounce / 2) if self.debounce else 0.1
+            while not self.stop_event.is_set():
+                if self._fd is not None:
+                    self.read_events(tick if self.pending else self.poll_interval)
+                else:
+                    self.stop_event.wait(self.poll_interval)
+                    self.scan()
+                self.promote()
+        except KeyboardInterrupt:
+            self.log("Arrêt demandé, fin du fichier en cours...")
+        finally:
+            self.stop()
+            worker.join()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self.manifest.close()
+        return self.processor.stats
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class ArchiveProcessor:
+    """Anonymisation d'une archive ZIP ou TAR vers une nouvelle archive, sans extraction sur disque.
+
+    Les membres sont lus un à un, dans l'ordre de l'archive (TAR en lecture
+    séquentielle, compressé ou non). Les images sont traitées en mémoire par
+    plusieurs fils — OpenCV et Pillow libèrent le GIL pendant le calcul — et
+    écrites dans leur ordre d'origine : au plus `window` images sont en
+    mémoire à la fois. Les autres fichiers sont recopiés par blocs ou
+    écartés. Dates et droits sont conservés ; propriétaires, commentaires
+    et champs étendus ne sont pas recopiés.
+    """
+
+    TAR_MODES = {'.tar': '', '.tgz': 'gz', '.gz': 'gz', '.tbz2': 'bz2', '.bz2': 'bz2', '.txz': 'xz', '.xz': 'xz'}
+    STORED = ('.jpg', '.jpeg', '.png', '.webp', '.gif')  # déjà compressés : pas de deflate par-dessus
+    INLINE_MAX = 1 << 20  # fichiers annexes gardés en file d'attente, au-delà copiés par blocs
+    PROBE_BYTES = 256 * 1024  # début d'une image lu pour l'admission, avant le reste du membre
+    ZIP_EPOCH = time.mktime((1980, 1, 1, 0, 0, 0, 0, 0, -1))  # date minimale d'un membre ZIP
+
+    def __init__(self, processor, others="keep", workers=None, log=print):
+        self.processor = processor  # réglages et statistiques ; chaque image a son propre BatchProcessor
+        self.others = others  # "keep" (recopier) ou "drop" (écarter) les fichiers qui ne sont pas des images
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.window = 2 * self.workers
+        self.log = log
+        self.stats = {'kept': 0, 'dropped': 0}
+
+    @staticmethod
+    def output_mode(path):
+        """'zip' ou mode d'écriture tarfile, d'après l'extension de l'archive à produire"""
+        suffix = Path(path).suffix.lower()
+        if suffix == '.zip':
+            return 'zip'
+        if suffix in ArchiveProcessor.TAR_MODES:
+            return 'w|' + ArchiveProcessor.TAR_MODES[suffix]
+        raise ValueError(f"Format d'archive inconnu : {path} (.zip, .tar, .tar.gz, .tar.bz2, .tar.xz)")
+
+    @staticmethod
+    def read_members(path):
+        """(nom, type, taille, date, droits, flux) de chaque membre, dans l'ordre de l'archive.
+
+        Le flux doit être lu avant de passer au membre suivant. Type : 'file',
+        'dir' ou 'other' (liens, fichiers spéciaux).
+        """
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    mtime = time.mktime(info.date_time + (0, 0, -1))
+                    mode = (info.external_attr >> 16) & 0o7777 or None
+                    if info.is_dir():
+                        yield info.filename, 'dir', 0, mtime, mode, None
+                        continue
+                    with archive.open(info) as stream:
+                        yield info.filename, 'file', info.file_size, mtime, mode, stream
+            return
+
+        if not tarfile.is_tarfile(path):
+            raise ValueError(f"Ni ZIP ni TAR : {path}")
+        with tarfile.open(path, 'r|*') as archive:
+            for info in archive:
+                kind = 'file' if info.isfile() else 'dir' if info.isdir() else 'other'
+                stream = archive.extractfile(info) if kind == 'file' else None
+                yield info.name, kind, info.size, info.mtime, info.mode, stream
+
+    @staticmethod
+    def add(archive, name, kind, mtime, mode, data=None, stream=None, size=0):
+        """Ajoute un membre depuis des octets (`data`) ou un flux de `size` octets"""
+        if isinstance(archive, zipfile.ZipFile):
+            if kind == 'dir' and not name.endswith('/'):
+                name += '/'
+            info = zipfile.ZipInfo(name, time.localtime(max(mtime, ArchiveProcessor.ZIP_EPOCH))[:6])
+            info.external_attr = (mode or (0o755 if kind == 'dir' else 0o644)) << 16
+            if kind == 'dir':
+                info.external_attr |= 0x10  # attribut MS-DOS « répertoire »
+                archive.writestr(info, b'')
+                return
+            stored = Path(name).suffix.lower() in ArchiveProcessor.STORED
+            info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            if data is not None:
+                archive.writestr(info, data)
+            else:
+                info.file_size = size
+                with archive.open(info, 'w', force_zip64=size > zipfile.ZIP64_LIMIT) as target:
+                    shutil.copyfileobj(stream, target, ArchiveProcessor.INLINE_MAX)
+            return
+
+        # TarInfo neuf : uid / gid à 0, sans noms d'utilisateur ni en-têtes étendus d'origine
+        info = tarfile.TarInfo(name.rstrip('/'))
+        info.mtime = int(mtime)
+        info.mode = mode or (0o755 if kind == 'dir' else 0o644)
+        if kind == 'dir':
+            info.type = tarfile.DIRTYPE
+            archive.addfile(info)
+            return
+        if data is not None:
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+        else:
+            info.size = size
+            archive.addfile(info, stream)
+
+    def read_admitted(self, name, size, stream):
+        """Contenu d'un membre image, refusé (ValueError) sur sa taille puis son en-tête avant d'être lu en entier.
+
+        Seuls les premiers Ko sont décompressés pour l'en-tête. S'il ne s'y
+        trouve pas en entier (IFD TIFF en fin de fichier…), le membre est lu
+        et l'admission se fait au traitement : la taille annoncée, que le
+        lecteur ne dépasse jamais, borne alors la lecture au budget.
+        """
+        admission = self.processor.admission
+        if size > admission.budget:
+            raise ValueError(f"refusée : {size / 2**20:.0f} Mo, au-delà du budget de {admission.budget / 2**20:.0f} Mo")
+        head = stream.read(ArchiveProcessor.PROBE_BYTES)
+        try:
+            probe = ImageLoader.probe(name, head)
+        except ValueError:
+            if len(head) < ArchiveProcessor.PROBE_BYTES:
+                raise  # membre lu en entier, et pourtant illisible
+            probe = None
+        if probe is not None:
+            admission.route(probe)
+        return head + stream.read()
+
+    @staticmethod
+    def rejected(name, error, stats=None, lines=None):
+        """Résultat d'une image écartée, au format de process_member"""
+        # Jamais d'image d'origine dans l'archive anonymisée : le membre est écarté
+        stats = stats if stats is not None else {'errors': 0}
+        lines = lines if lines is not None else []
+        stats['errors'] += 1
+        lines.append(f"✗ {name} : {error} (écartée)")
+        return None, {'file': name, 'error': str(error)}, stats, lines
+
+    def process_member(self, name, data):
+        """Anonymise une image en mémoire (fil de travail) ; retourne (octets ou None, entrée, compteurs, lignes)"""
+        lines = []
+        processor = BatchProcessor(log=lines.append, **self.processor.settings)
+        output = io.BytesIO()
+        try:
+            entry = processor.anonymize(name, output, data)
+            entry['file'] = name
+            processor.stats['images'] += 1
+            message = f"✓ {name} : {entry['zones']} zone(s)"
+            residual = entry.get('verification', {}).get('residual')
+            if residual:
+                action = "masqué(s)" if processor.verify == "redact" else "à vérifier"
+                message += f" — ⚠️ {len(residual)} visage(s) résiduel(s) {action}"
+            lines.append(message)
+            return output.getvalue(), entry, processor.stats, lines
+        except Exception as e:
+            return self.rejected(name, e, processor.stats, lines)
+
+    def run(self, input_path, output_path):
+        input_path, output_path = Path(input_path), Path(output_path)
+        if input_path.resolve() == output_path.resolve():
+            raise ValueError("L'archive de sortie doit être différente de l'archive source")
+        mode = self.output_mode(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Archive complète ou rien : écrite à côté puis renommée
+        MetadataManager.write_atomically(output_path, lambda tmp_path: self._run(input_path, tmp_path, mode))
+
+        stats = self.processor.stats
+        report_path = output_path.with_name(f"{output_path.name}.{BatchProcessor.REPORT_NAME}")
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({'stats': dict(stats, **self.stats), 'images': self.processor.report},
+                      f, ensure_ascii=False, indent=2)
+        self.log(
+            f"{stats['images']} image(s) traitée(s), {stats['residual']} visage(s) résiduel(s), "
+            f"{stats['errors']} erreur(s) ; {self.stats['kept']} autre(s) fichier(s) recopié(s), "
+            f"{self.stats['dropped']} écarté(s)"
+        )
+        return stats
+
+    def _run(self, input_path, tmp_path, mode):
+        pending = deque()  # (membre, future ou octets) dans l'ordre de l'archive
+
+        def flush(limit):
+            while len(pending) > limit:
+                (name, kind, mtime, mode_), result = pending.popleft()
+                if kind != 'image':
+                    self.add(archive, name, kind, mtime, mode_, data=result)
+                    continue
+                data, entry, stats, lines = result.result()
+                self.processor.report.append(entry)
+                self.processor.merge_stats(stats)
+                for line in lines:
+                    self.log(line)
+                if data is not None:
+                    self.add(archive, name, 'file', mtime, mode_, data=data)
+
+        if mode == 'zip':
+            archive = zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            archive = tarfile.open(tmp_path, mode)
+        with archive, ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for name, kind, size, mtime, mode_, stream in self.read_members(input_path):
+                if kind == 'file' and Path(name).suffix.lower() in ImageSession.EXTENSIONS:
+                    flush(self.window - 1)  # place libérée avant de lire l'image suivante
+                    try:
+                        data = self.read_admitted(name, size, stream)
+                    except (OSError, ValueError) as e:
+                        result = Future()  # refusée sans décompression complète, rapportée à son rang
+                        result.set_result(self.rejected(name, e))
+                    else:
+                        result = executor.submit(self.process_member, name, data)
+                    pending.append(((name, 'image', mtime, mode_), result))
+                elif kind == 'dir':
+                    pending.append(((name, 'dir', mtime, mode_), None))
+                elif kind == 'file' and self.others == 'keep':
+                    self.stats['kept'] += 1
+                    if size <= ArchiveProcessor.INLINE_MAX:
+                        pending.append(((name, 'file', mtime, mode_), stream.read()))
+                    else:
+                        # Gros fichier copié par blocs : les images qui le précèdent sont écrites d'abord
+                        flush(0)
+                        self.add(archive, name, 'file', mtime, mode_, stream=stream, size=size)
+                else:
+                    self.stats['dropped'] += 1
+                    self.log(f"– {name} : écarté")
+            flush(0)
+
+
+class BalMasque:
+    """Application principale"""
+
+    VERSION = "2.0"
+
+    def __init__(self):
+        # D'abord le disclaimer
+        if not self.show_disclaimer():
+            return
+
+        # Puis l'application principale
+        self.root = tk.Tk()
+        self.root.title("🎭 Bal Masqué")
+        self.root.configure(bg=Style.BG)
+
+        # Plein écran
+        self.root.state('zoomed')  # Windows
+        try:
+            self.root.attributes('-zoomed', True)  # Linux
+        except:
+            pass
+
+        self.root.minsize(1200, 800)
+
+        Style.init(self.root)
+
+        # Variables
+        self.image_path = None
+        self.image_original = None  # aperçu (éventuellement décodé à résolution réduite)
+        self.image_size = None  # (largeur, hauteur) pleine résolution
+        self.image_data = None  # contenu du fichier, lu une seule fois (export sans relecture)
+        self.proxy_scale = 1.0  # échelle aperçu / pleine résolution
+        self.image_processed = None
+        self.image_display = None
+        self.faces_detected = []
+        self.manual_boxes = []
+        self.mode = tk.StringVar(value="auto")
+        self.rotation_var = tk.BooleanVar(value=False)
+        self.prefilter_var = tk.BooleanVar(value=False)
+        self.deadline_var = tk.BooleanVar(value=False)
+        self.preset_var = tk.StringVar(value=FaceDetector.DEFAULT_PRESET)
+        self.effect_var = tk.StringVar(value="pixelate")
+        self.intensity_var = tk.IntVar(value=20)
+        self.metadata_enabled = tk.BooleanVar(value=True)
+        self.profile_var = tk.StringVar(value=ExportProfiles.DEFAULT)
+        self.metadata_info = None
+        self.session = None  # session multi-images (dossier)
+        self.admission = MemoryBudget()
+        self.export_factor = 1  # > 1 : export réduit, l'image dépasse le budget mémoire
+        self.poll_id = None  # relève programmée des résultats de la session
+        self.detection_done = False
+        self.thumb_images = {}
+
+        self.start_x = 0
+        self.start_y = 0
+        self.current_rect = None
+        self.scale_ratio = 1.0
+        self.offset_x = 0
+        self.offset_y = 0
+        self.zoom = 1.0  # pixels écran par pixel de l'aperçu
+        self.fit_mode = True
+        self.pan_start = None
+        self.pyramid = None
+        self.rendered_boxes = []
+        self.tile_photos = OrderedDict()
+
+        self.build_ui()
+        self.bind_shortcuts()
+        self.root.mainloop()
+
+    def load_logo(self, size=90):
+        logo_paths = [
+            Path(__file__).parent / "logo.png",
+            Path(__file__).parent / "assets" / "logo.png",
+            Path("logo.png"),
+        ]
+
+        for path in logo_paths:
+            if path.exists():
+                try:
+                    img = Image.open(path)
+                    img.thumbnail((size, size), Image.Resampling.LANCZOS)
+                    return ImageTk.PhotoImage(img)
+                except:
+                    pass
+        return None
+
+    def center_window(self, win, w, h):
+        win.update_idletasks()
+        x = (win.winfo_screenwidth() - w) // 2
+        y = (win.winfo_screenheight() - h) // 2
+        win.geometry(f"{w}x{h}+{x}+{y}")
+
+    def show_disclaimer(self):
+        """Fenêtre de bienvenue"""
+        enable_high_dpi()
+
+        win = tk.Tk()
+        win.title("Bal Masqué")
+        win.configure(bg=Style.BG)
+
+        Style.init(win)
+        self.center_window(win, 550, 620)
+
+        accepted = [False]
+
+        def accept():
+            accepted[0] = True
+            win.quit()
+            win.destroy()
+
+        def on_close():
+            win.quit()
+            win.destroy()
+
+        win.protocol("WM_DELETE_WINDOW", on_close)
+
+        canvas = tk.Canvas(win, bg=Style.BG, highlightthickness=0)
+        scrollbar = tk.Scrollbar(win, orient='vertical', command=canvas.yview)
+        canvas.configure(yscrollcommand=scrollbar.set)
+
+        scrollbar.pack(side='right', fill='y')
+        canvas.pack(side='left', fill='both', expand=True)
+
+        main = tk.Frame(canvas, bg=Style.BG)
+        canvas.create_window((0, 0), window=main, anchor='nw')
+
+        content = tk.Frame(main, bg=Style.BG)
+        content.pack(expand=True, fill='both', padx=45, pady=35)
+
+        # Logo
+        logo = self.load_logo(90)
+        if logo:
+            lbl = tk.Label(content, image=logo, bg=Style.BG)
+            lbl.image = logo
+            lbl.pack(pady=(0, 10))
+        else:
+            lbl = tk.Label(content, text="🎭 Bal Masqué", font=(Style.FONT, 22, 'bold'), bg=Style.BG, fg=Style.ACCENT)
+            lbl.pack(pady=(0, 10))
+
+        sub = tk.Label(content, text="Floutage de visages • Hors-ligne", font=(Style.FONT, 11), bg=Style.BG, fg=Style.CYAN)
+        sub.pack(pady=(0, 25))
+
+        # Métaphore
+        metaphor_frame = tk.Frame(content, bg=Style.PURPLE, padx=3, pady=3)
+        metaphor_frame.pack(fill='x', pady=(0, 25))
+
+        metaphor_inner = tk.Frame(metaphor_frame, bg=Style.BG_PANEL, padx=20, pady=18)
+        metaphor_inner.pack(fill='x')
+
+        metaphor_text = """Au bal masqué, chacun·e choisit ce qu'iel révèle.
+
+Dans la rue comme au carnaval, le masque protège.
+Il permet d'exister sans être fiché, de défiler sans être ciblé.
+
+Vos images restent sur votre machine."""
+
+        tk.Label(
+            metaphor_inner, text=metaphor_text,
+            font=(Style.FONT, 11), bg=Style.BG_PANEL, fg=Style.TEXT,
+            justify='left', wraplength=420
+        ).pack()
+
+        # Bouton principal
+        btn = tk.Button(
+            content, text="Accéder au bal →",
+            command=accept, padx=25, pady=12,
+            font=(Style.FONT, 12, 'bold'),
+            bg=Style.SECONDARY, fg=Style.BLACK,
+            activebackground=Style.SECONDARY_HOVER,
+            activeforeground=Style.BLACK,
+            relief='flat', cursor='hand2'
+        )
+        btn.pack(pady=(0, 25))
+
+        # Ressources dépliantes
+        resources_frame = tk.Frame(content, bg=Style.BG)
+        resources_frame.pack(fill='x')
+
+        expanded = [False]
+        resources_content = [None]
+
+        def toggle_resources():
+            expanded[0] = not expanded[0]
+
+            if expanded[0]:
+                toggle_btn.config(text="▾ Ressources", fg=Style.PINK)
+                rc = tk.Frame(resources_frame, bg=Style.BG)
+                rc.pack(fill='x', pady=(10, 0))
+                resources_content[0] = rc
+
+                resources = [
+                    ("La Quadrature du Net", "https://www.laquadrature.net", "Libertés numériques"),
+                    ("Technopolice", "https://technopolice.fr", "Surveillance urbaine"),
+                    ("Guide Boum", "https://guide.boum.org", "Autodéfense numérique"),
+                ]
+
+                for name, url, desc in resources:
+                    row = tk.Frame(rc, bg=Style.BG)
+                    row.pack(fill='x', pady=3)
+
+                    link = tk.Label(row, text=f"★ {name}", font=(Style.FONT, 10, 'underline'), bg=Style.BG, fg=Style.LINK, cursor='hand2')
+                    link.pack(side='left')
+                    link.bind('<Button-1>', lambda e, u=url: webbrowser.open(u))
+
+                    tk.Label(row, text=f" — {desc}", font=(Style.FONT, 10), bg=Style.BG, fg=Style.TEXT_DIM).pack(side='left')
+
+                main.update_idletasks()
+                canvas.configure(scrollregion=canvas.bbox('all'))
+            else:
+                toggle_btn.config(text="▸ Ressources", fg=Style.TEXT_DIM)
+                if resources_content[0]:
+                    resources_content[0].destroy()
+                main.update_idletasks()
+                canvas.configure(scrollregion=canvas.bbox('all'))
+
+        toggle_btn = tk.Button(
+            resources_frame, text="▸ Ressources",
+            command=toggle_resources,
+            font=(Style.FONT, 10),
+            bg=Style.BG, fg=Style.TEXT_DIM,
+            activebackground=Style.BG, activeforeground=Style.PINK,
+            relief='flat', cursor='hand2', bd=0
+        )
+        toggle_btn.pack(anchor='w')
+
+        tk.Label(
+            content,
+            text="GPL-3.0 • github.com/comenottaris/BAL-MASQUE",
+            font=(Style.FONT, 9),
+            bg=Style.BG, fg=Style.TEXT_MUTED
+        ).pack(pady=(25, 0))
+
+        main.update_idletasks()
+        canvas.configure(scrollregion=canvas.bbox('all'))
+
+        canvas.bind_all('<MouseWheel>', lambda e: canvas.yview_scroll(int(-1 * (e.delta / 120)), 'units'))
+
+        win.mainloop()
+        return accepted[0]
+
+    def build_ui(self):
+        """Construction de l'interface"""
+        main = tk.Frame(self.root, bg=Style.BG)
+        main.pack(fill='both', expand=True)
+
+        # === SIDEBAR GAUCHE (contrôles) ===
+        sidebar = tk.Frame(main, bg=Style.BG, width=320)
+        sidebar.pack(side='left', fill='y', padx=15, pady=15)
+        sidebar.pack_propagate(False)
+
+        # Scrollable
+        s_canvas = tk.Canvas(sidebar, bg=Style.BG, highlightthickness=0)
+        s_scroll = tk.Scrollbar(sidebar, orient='vertical', command=s_canvas.yview)
+        s_frame = tk.Frame(s_canvas, bg=Style.BG)
+
+        s_frame.bind("<Configure>", lambda e: s_canvas.configure(scrollregion=s_canvas.bbox("all")))
+        s_canvas.create_window((0, 0), window=s_frame, anchor='nw', width=300)
+        s_canvas.configure(yscrollcommand=s_scroll.set)
+
+        s_canvas.pack(side='left', fill='both', expand=True)
+        s_scroll.pack(side='right', fill='y')
+
+        content = s_frame
+
+        # Logo + titre
+        logo = self.load_logo(70)
+        if logo:
+            lbl = tk.Label(content, image=logo, bg=Style.BG)
+            lbl.image = logo
+            lbl.pack(pady=(0, 5))
+        else:
+            tk.Label(content, text="🎭", font=('Segoe UI Emoji', 32), bg=Style.BG, fg=Style.ACCENT).pack()
+
+        tk.Label(content, text="Bal Masqué", font=(Style.FONT, 16, 'bold'), bg=Style.BG, fg=Style.TEXT).pack()
+        tk.Label(content, text="v2.0 • Hors-ligne", font=(Style.FONT, 9), bg=Style.BG, fg=Style.TEXT_MUTED).pack(pady=(0, 15))
+
+        # === SECTION IMAGE ===
+        self.create_section(content, "📷 IMAGE")
+
+        img_btns = tk.Frame(content, bg=Style.BG)
+        img_btns.pack(fill='x', pady=5)
+
+        btn_open = tk.Button(img_btns, text="📂 Ouvrir", font=(Style.FONT, 10, 'bold'),
+                            bg=Style.SECONDARY, fg=Style.BLACK, relief='flat', cursor='hand2',
+                            padx=15, pady=6, command=self.load_image)
+        btn_open.pack(side='left', expand=True, fill='x', padx=(0, 3))
+
+        btn_save = tk.Button(img_btns, text="💾 Sauver", font=(Style.FONT, 10, 'bold'),
+                            bg=Style.ORANGE, fg=Style.BLACK, relief='flat', cursor='hand2',
+                            padx=15, pady=6, command=self.save_image)
+        btn_save.pack(side='left', expand=True, fill='x', padx=(3, 0))
+
+        btn_folder = tk.Button(content, text="📁 Ouvrir un dossier", font=(Style.FONT, 10),
+                              bg=Style.BG_PANEL, fg=Style.TEXT, relief='flat', cursor='hand2',
+                              padx=15, pady=6, command=self.open_folder)
+        btn_folder.pack(fill='x', pady=(0, 5))
+
+        # === SECTION MÉTADONNÉES (dépliante) ===
+        self.create_collapsible_section(content, "🔒 MÉTADONNÉES", self.build_metadata_panel)
+
+        # === SECTION DÉTECTION (dépliante) ===
+        self.create_collapsible_section(content, "🎯 DÉTECTION", self.build_detection_panel)
+
+        # === SECTION EFFET (dépliante) ===
+        self.create_collapsible_section(content, "🎨 EFFET", self.build_effect_panel)
+
+        # === SECTION EXPORT (dépliante) ===
+        self.create_collapsible_section(content, "💾 EXPORT", self.build_export_panel)
+
+        # === SECTION ACTIONS ===
+        self.create_section(content, "⚡ ACTIONS")
+
+        act_row1 = tk.Frame(content, bg=Style.BG)
+        act_row1.pack(fill='x', pady=3)
+
+        btn_detect = tk.Button(act_row1, text="🔍 Détecter", font=(Style.FONT, 10),
+                              bg=Style.PURPLE, fg=Style.WHITE, relief='flat', cursor='hand2',
+                              padx=10, pady=6, command=self.detect_faces)
+        btn_detect.pack(side='left', expand=True, fill='x', padx=(0, 3))
+
+        btn_apply = tk.Button(act_row1, text="✨ Appliquer", font=(Style.FONT, 10),
+                             bg=Style.CYAN, fg=Style.BLACK, relief='flat', cursor='hand2',
+                             padx=10, pady=6, command=self.apply_blur)
+        btn_apply.pack(side='left', expand=True, fill='x', padx=(3, 0))
+
+        act_row2 = tk.Frame(content, bg=Style.BG)
+        act_row2.pack(fill='x', pady=3)
+
+        btn_undo = tk.Button(act_row2, text="↩ Annuler zone", font=(Style.FONT, 10),
+                            bg=Style.BG_PANEL, fg=Style.TEXT, relief='flat', cursor='hand2',
+                            padx=10, pady=6, command=self.undo_last_box)
+        btn_undo.pack(side='left', expand=True, fill='x', padx=(0, 3))
+
+        btn_reset = tk.Button(act_row2, text="🔄 Reset", font=(Style.FONT, 10),
+                             bg=Style.ACCENT, fg=Style.WHITE, relief='flat', cursor='hand2',
+                             padx=10, pady=6, command=self.reset_image)
+        btn_reset.pack(side='left', expand=True, fill='x', padx=(3, 0))
+
+        # Compteur
+        self.counter_label = tk.Label(content, text="Zones : 0", font=(Style.FONT, 12, 'bold'),
+                                     fg=Style.HIGHLIGHT, bg=Style.BG)
+        self.counter_label.pack(pady=15)
+
+        # Indicateur métadonnées
+        self.meta_indicator = tk.Label(content, text="", font=(Style.FONT, 9),
+                                      fg=Style.TEXT_DIM, bg=Style.BG, wraplength=280)
+        self.meta_indicator.pack(pady=5)
+
+        # === ZONE CENTRALE (image) ===
+        center = tk.Frame(main, bg=Style.CANVAS_BG)
+        center.pack(side='left', fill='both', expand=True, padx=(0, 15), pady=15)
+
+        # Barre de statut
+        self.status_bar = tk.Label(center, text="Prêt — Ctrl+O pour ouvrir", font=(Style.FONT, 10),
+                                  bg=Style.BG_PANEL, fg=Style.TEXT_DIM, anchor='w', padx=15, pady=8)
+        self.status_bar.pack(fill='x')
+
+        # Canvas
+        self.canvas = tk.Canvas(center, bg=Style.CANVAS_BG, highlightthickness=0)
+        self.canvas.pack(fill='both', expand=True)
+
+        self.canvas.bind('<ButtonPress-1>', self.on_canvas_press)
+        self.canvas.bind('<B1-Motion>', self.on_canvas_drag)
+        self.canvas.bind('<ButtonRelease-1>', self.on_canvas_release)
+
+        # Zoom (molette) et déplacement (clic milieu / droit, ou clic gauche hors mode manuel)
+        self.canvas.bind('<MouseWheel>', self.on_canvas_wheel)
+        self.canvas.bind('<Button-4>', self.on_canvas_wheel)
+        self.canvas.bind('<Button-5>', self.on_canvas_wheel)
+        for button in (2, 3):
+            self.canvas.bind(f'<ButtonPress-{button}>', self.start_pan)
+            self.canvas.bind(f'<B{button}-Motion>', self.do_pan)
+            self.canvas.bind(f'<ButtonRelease-{button}>', self.end_pan)
+        self.canvas.bind('<Configure>', lambda e: self.display_image() if self.fit_mode else self.render_view())
+
+        # Pellicule (affichée uniquement en mode dossier)
+        self.filmstrip_frame = tk.Frame(center, bg=Style.BG_PANEL)
+        self.filmstrip = tk.Canvas(self.filmstrip_frame, bg=Style.BG_PANEL, highlightthickness=0,
+                                   height=ImageSession.THUMB_HEIGHT + 28)
+        film_scroll = tk.Scrollbar(self.filmstrip_frame, orient='horizontal', command=self.filmstrip.xview)
+        self.filmstrip.configure(xscrollcommand=film_scroll.set)
+        self.filmstrip.pack(fill='x')
+        film_scroll.pack(fill='x')
+
+        self.show_welcome()
+
+    def create_section(self, parent, title):
+        """Titre de section simple"""
+        frame = tk.Frame(parent, bg=Style.BG)
+        frame.pack(fill='x', pady=(15, 5))
+
+        tk.Frame(frame, bg=Style.CYAN, height=1).pack(fill='x', pady=(0, 5))
+        tk.Label(frame, text=title, font=(Style.FONT, 9, 'bold'), fg=Style.CYAN, bg=Style.BG).pack(anchor='w')
+
+    def create_collapsible_section(self, parent, title, build_func):
+        """Section dépliante"""
+        container = tk.Frame(parent, bg=Style.BG)
+        container.pack(fill='x', pady=(10, 0))
+
+        expanded = [False]
+        content_frame = [None]
+
+        def toggle():
+            expanded[0] = not expanded[0]
+            if expanded[0]:
+                btn.config(text=f"▾ {title}", fg=Style.PINK)
+                cf = tk.Frame(container, bg=Style.BG_PANEL, padx=10, pady=10)
+                cf.pack(fill='x', pady=(5, 0))
+                content_frame[0] = cf
+                build_func(cf)
+            else:
+                btn.config(text=f"▸ {title}", fg=Style.CYAN)
+                if content_frame[0]:
+                    content_frame[0].destroy()
+
+        btn = tk.Button(container, text=f"▸ {title}", font=(Style.FONT, 10, 'bold'),
+                       bg=Style.BG, fg=Style.CYAN, relief='flat', cursor='hand2', bd=0,
+                       anchor='w', command=toggle)
+        btn.pack(fill='x')
+
+    def build_metadata_panel(self, parent):
+        """Contenu du panneau métadonnées"""
+        cb = tk.Checkbutton(parent, text="Contrôler à la sauvegarde", variable=self.metadata_enabled,
+                           font=(Style.FONT, 10), fg=Style.TEXT, bg=Style.BG_PANEL,
+                           selectcolor=Style.PURPLE, activebackground=Style.BG_PANEL)
+        cb.pack(anchor='w', pady=3)
+
+        btns = tk.Frame(parent, bg=Style.BG_PANEL)
+        btns.pack(fill='x', pady=5)
+
+        tk.Button(btns, text="🔍 Analyser", font=(Style.FONT, 9),
+                 bg=Style.CYAN, fg=Style.BLACK, relief='flat', cursor='hand2',
+                 padx=8, pady=4, command=self.show_metadata_report).pack(side='left', padx=(0, 5))
+
+        tk.Button(btns, text="🧹 Nettoyer", font=(Style.FONT, 9),
+                 bg=Style.ACCENT, fg=Style.WHITE, relief='flat', cursor='hand2',
+                 padx=8, pady=4, command=self.clean_metadata_now).pack(side='left')
+
+    def build_detection_panel(self, parent):
+        """Contenu du panneau détection"""
+        for val, txt in [("auto", "🤖 Automatique"), ("manual", "✋ Manuel (dessiner)")]:
+            rb = tk.Radiobutton(parent, text=txt, variable=self.mode, value=val,
+                               font=(Style.FONT, 10), fg=Style.TEXT, bg=Style.BG_PANEL,
+                               selectcolor=Style.PURPLE, activebackground=Style.BG_PANEL)
+            rb.pack(anchor='w', pady=2)
+
+        cb = tk.Checkbutton(parent, text="🔄 Visages inclinés (±20°, ±40°)", variable=self.rotation_var,
+                           font=(Style.FONT, 10), fg=Style.TEXT, bg=Style.BG_PANEL,
+                           selectcolor=Style.PURPLE, activebackground=Style.BG_PANEL)
+        cb.pack(anchor='w', pady=(8, 2))
+
+        cb = tk.Checkbutton(parent, text="🎯 Préfiltre (zones de peau / texture)", variable=self.prefilter_var,
+                           font=(Style.FONT, 10), fg=Style.TEXT, bg=Style.BG_PANEL,
+                           selectcolor=Style.PURPLE, activebackground=Style.BG_PANEL)
+        cb.pack(anchor='w', pady=2)
+
+        cb = tk.Checkbutton(parent, text=f"⏱️ Réponse en {AnytimeScan.INTERACTIVE * 1000:.0f} ms au plus",
+                           variable=self.deadline_var,
+                           font=(Style.FONT, 10), fg=Style.TEXT, bg=Style.BG_PANEL,
+                           selectcolor=Style.PURPLE, activebackground=Style.BG_PANEL)
+        cb.pack(anchor='w', pady=2)
+
+        tk.Label(parent, text="Préréglage :", font=(Style.FONT, 9), fg=Style.TEXT_DIM, bg=Style.BG_PANEL).pack(anchor='w', pady=(10, 0))
+        for name in FaceDetector.PRESETS:
+            rb = tk.Radiobutton(parent, text=FaceDetector.PRESET_LABELS.get(name, name), variable=self.preset_var, value=name,
+                               font=(Style.FONT, 10), fg=Style.TEXT, bg=Style.BG_PANEL,
+                               selectcolor=Style.PURPLE, activebackground=Style.BG_PANEL)
+            rb.pack(anchor='w', pady=2)
+
+    def detection_options(self):
+        """Options de FaceDetector.detect selon les réglages du panneau"""
+        return {'rotation_sweep': self.rotation_var.get(), 'preset': self.preset_var.get(),
+                'prefilter': self.prefilter_var.get(),
+                'deadline': AnytimeScan.INTERACTIVE if self.deadline_var.get() else None}
+
+    def build_effect_panel(self, parent):
+        """Contenu du panneau effet"""
+        for val, txt in [("pixelate", "▦ Pixelisation"), ("blur", "◐ Flou gaussien"), ("black", "■ Noir")]:
+            rb = tk.Radiobutton(parent, text=txt, variable=self.effect_var, value=val,
+                               font=(Style.FONT, 10), fg=Style.TEXT, bg=Style.BG_PANEL,
+                               selectcolor=Style.PURPLE, activebackground=Style.BG_PANEL)
+            rb.pack(anchor='w', pady=2)
+
+        tk.Label(parent, text="Intensité:", font=(Style.FONT, 9), fg=Style.TEXT_DIM, bg=Style.BG_PANEL).pack(anchor='w', pady=(10, 0))
+
+        slider = tk.Scale(parent, from_=5, to=50, orient='horizontal', variable=self.intensity_var,
+                         bg=Style.BG_PANEL, fg=Style.TEXT, highlightthickness=0,
+                         troughcolor=Style.BG, activebackground=Style.PINK,
+                         command=lambda v: self.apply_blur() if self.image_processed is not None else None)
+        slider.pack(fill='x')
+
+    def build_export_panel(self, parent):
+        """Contenu du panneau export"""
+        for name, settings in ExportProfiles.PROFILES.items():
+            rb = tk.Radiobutton(parent, text=settings['label'], variable=self.profile_var, value=name,
+                               font=(Style.FONT, 10), fg=Style.TEXT, bg=Style.BG_PANEL,
+                               selectcolor=Style.PURPLE, activebackground=Style.BG_PANEL)
+            rb.pack(anchor='w', pady=2)
+
+    def show_welcome(self):
+        self.canvas.delete("all")
+        self.canvas.update()
+        cx = self.canvas.winfo_width() // 2 or 400
+        cy = self.canvas.winfo_height() // 2 or 300
+
+        self.canvas.create_text(cx, cy - 30, text="🎭", font=('Segoe UI Emoji', 48), fill=Style.ACCENT)
+        self.canvas.create_text(cx, cy + 40, text="Glissez une image ou cliquez sur Ouvrir",
+                               font=(Style.FONT, 14), fill=Style.TEXT_DIM)
+        self.canvas.create_text(cx, cy + 70, text="Ctrl+O pour ouvrir • Ctrl+S pour sauver",
+                               font=(Style.FONT, 11), fill=Style.TEXT_MUTED)
+
+    def bind_shortcuts(self):
+        self.root.bind('<Control-o>', lambda e: self.load_image())
+        self.root.bind('<Control-s>', lambda e: self.save_image())
+        self.root.bind('<Control-z>', lambda e: self.undo_last_box())
+        self.root.bind('<Control-d>', lambda e: self.detect_faces())
+        self.root.bind('<Control-Right>', lambda e: self.goto_session_image(1))
+        self.root.bind('<Control-Left>', lambda e: self.goto_session_image(-1))
+        self.root.bind('<Control-plus>', lambda e: self.zoom_by(1.25))
+        self.root.bind('<Control-equal>', lambda e: self.zoom_by(1.25))
+        self.root.bind('<Control-minus>', lambda e: self.zoom_by(0.8))
+        self.root.bind('<Control-0>', lambda e: self.zoom_fit())
+
+    def update_status(self, text):
+        self.status_bar.config(text=text)
+
+    def update_counter(self):
+        total = len(self.faces_detected) + len(self.manual_boxes)
+        self.counter_label.config(text=f"Zones : {total}")
+
+    def load_image(self):
+        path = filedialog.askopenfilename(
+            title="Ouvrir une image",
+            filetypes=[("Images", "*.jpg *.jpeg *.png *.bmp *.webp *.tif *.tiff *.gif"), ("Tous", "*.*")]
+        )
+
+        if path:
+            self.close_session()
+            self.open_image(path)
+
+    def admit(self, path, data=None):
+        """Facteur de réduction à l'export selon le budget mémoire ; ValueError si l'image est refusée.
+
+        L'interface n'exporte pas par bandes : un JPEG trop grand est
+        décodé réduit dans le domaine DCT, comme dans le traitement par lot.
+        """
+        kind, amount = self.admission.route(ImageLoader.probe(path, data))
+        return amount if kind == 'reduced' else 1
+
+    def open_image(self, path):
+        try:
+            factor = self.admit(path)
+        except ValueError as e:
+            messagebox.showerror("Image refusée", str(e))
+            return
+
+        # Une seule lecture : aperçu, métadonnées et export partagent le même contenu
+        try:
+            data = ImageLoader.read_bytes(path)
+        except OSError:
+            data = None
+        image, scale, size = ImageLoader.load_proxy(path, data=data) if data else (None, 1.0, None)
+
+        if image is None:
+            messagebox.showerror("Erreur", "Impossible de charger l'image")
+            return
+
+        self.set_current_image(path, image, scale, size, data, factor)
+        self.faces_detected = []
+        self.manual_boxes = []
+        self.detection_done = False
+        self.update_counter()
+        self.analyze_metadata(data)
+        self.display_image()
+        self.update_status(self.loaded_status(path))
+
+    def set_current_image(self, path, image, scale, size, data=None, factor=1):
+        self.image_path = path
+        self.image_data = data
+        self.export_factor = factor
+        self.image_original = image
+        self.image_size = size
+        self.proxy_scale = scale
+        self.image_processed = self.image_original.copy()
+        self.rendered_boxes = []
+        self.fit_mode = True
+
+    def loaded_status(self, path):
+        status = f"Image chargée : {Path(path).name}"
+        if self.proxy_scale < 1.0:
+            status += f" (aperçu 1/{round(1 / self.proxy_scale)})"
+        if self.export_factor > 1:
+            status += f" — export réduit 1/{self.export_factor} (budget mémoire)"
+        if self.image_data:
+            count = FrameStream.count(path, self.image_data)
+            if count > 1:
+                status += f" — page 1/{count} (toutes les pages : commande batch)"
+        if self.session:
+            status += f" — {self.session.index + 1}/{len(self.session)}"
+        return status
+
+    # === SESSION MULTI-IMAGES ===
+
+    def open_folder(self):
+        folder = filedialog.askdirectory(title="Ouvrir un dossier d'images")
+        if not folder:
+            return
+
+        session = ImageSession(folder)
+        if not session.paths:
+            session.close()
+            messagebox.showwarning("Dossier vide", "Aucune image trouvée dans ce dossier")
+            return
+
+        self.close_session()
+        self.session = session
+        self.filmstrip_frame.pack(side='bottom', fill='x', before=self.canvas)
+        self.show_session_image(0)
+        self.poll_session()
+
+    def close_session(self):
+        if self.poll_id is not None:
+            self.root.after_cancel(self.poll_id)
+            self.poll_id = None
+        if self.session is None:
+            return
+        self.session.close()
+        self.session = None
+        self.thumb_images = {}
+        self.filmstrip.delete("all")
+        self.filmstrip_frame.pack_forget()
+
+    def store_session_edits(self):
+        """Mémorise les zones de l'image courante avant d'en changer"""
+        if self.session is None or self.image_path is None:
+            return
+        state = self.session.edit_state(self.image_path)
+        if self.detection_done:
+            state['faces'] = list(self.faces_detected)
+        state['manual'] = list(self.manual_boxes)
+
+    def goto_session_image(self, step):
+        if self.session is None:
+            return
+        index = self.session.index + step
+        if 0 <= index < len(self.session):
+            self.show_session_image(index)
+
+    def show_session_image(self, index):
+        self.store_session_edits()
+        previous = self.session.index
+        self.session.index = index
+        path = self.session.current_path
+
+        if path not in self.session.cache:
+            self.update_status(f"Chargement : {Path(path).name}...")
+            self.root.update()
+
+        try:
+            factor = self.admit(path)
+        except ValueError as e:
+            self.session.index = previous
+            messagebox.showerror("Image refusée", f"{Path(path).name}\n{e}")
+            return
+
+        entry = self.session.load(path)
+        if entry is None:
+            self.session.index = previous
+            messagebox.showerror("Erreur", f"Impossible de charger l'image\n{Path(path).name}")
+            return
+
+        self.set_current_image(path, entry['image'], entry['scale'], entry['size'], entry.get('data'), factor)
+        state = self.session.edit_state(path)
+        self.detection_done = state['faces'] is not None
+        self.faces_detected = list(state['faces'] or [])
+        self.manual_boxes = list(state['manual'])
+        self.metadata_info = entry['metadata']
+        self.update_meta_indicator()
+        self.update_counter()
+
+        if self.faces_detected or self.manual_boxes:
+            self.apply_blur()
+        else:
+            self.display_image()
+
+        self.update_status(self.loaded_status(path))
+        self.session.detect_options = self.detection_options()
+        self.session.prefetch()
+        self.draw_filmstrip()
+
+    def poll_session(self):
+        """Récupère les résultats du préchargement (thread de fond)"""
+        self.poll_id = None
+        if self.session is None:
+            return
+
+        changed = False
+        while True:
+            try:
+                path = self.session.events.get_nowait()
+            except queue.Empty:
+                break
+            changed = True
+
+            # Pré-détection terminée sur l'image affichée : on l'adopte
+            if path == self.image_path and not self.detection_done:
+                faces = self.session.edit_state(path)['faces']
+                if faces is not None:
+                    self.detection_done = True
+                    self.faces_detected = list(faces)
+                    self.update_counter()
+                    self.apply_blur()
+
+        if changed:
+            self.draw_filmstrip()
+        self.poll_id = self.root.after(250, self.poll_session)
+
+    def draw_filmstrip(self):
+        if self.session is None:
+            return
+
+        self.filmstrip.delete("all")
+        pad = 6
+        x = pad
+
+        for i, path in enumerate(self.session.paths):
+            thumb = self.session.thumbs.get(path)
+            if thumb is not None and path not in self.thumb_images:
+                rgb = cv2.cvtColor(thumb, cv2.COLOR_BGR2RGB)
+                self.thumb_images[path] = ImageTk.PhotoImage(Image.fromarray(rgb))
+
+            photo = self.thumb_images.get(path)
+            w = photo.width() if photo else ImageSession.THUMB_HEIGHT
+            tag = f"film{i}"
+
+            outline = Style.ACCENT if i == self.session.index else Style.BG
+            self.filmstrip.create_rectangle(x - 3, pad - 3, x + w + 3, pad + ImageSession.THUMB_HEIGHT + 3,
+                                            outline=outline, width=2, fill=Style.BG, tags=tag)
+            if photo:
+                self.filmstrip.create_image(x, pad, anchor=tk.NW, image=photo, tags=tag)
+            else:
+                self.filmstrip.create_text(x + w // 2, pad + ImageSession.THUMB_HEIGHT // 2, text=str(i + 1),
+                                           font=(Style.FONT, 10), fill=Style.TEXT_MUTED, tags=tag)
+
+            state = self.session.edits.get(path)
+            zones = len(state['faces'] or []) + len(state['manual']) if state else 0
+            label = f"✓ {zones}" if state and state['faces'] is not None else Path(path).name[:12]
+            self.filmstrip.create_text(x + w // 2, pad + ImageSession.THUMB_HEIGHT + 12, text=label,
+                                       font=(Style.FONT, 8), fill=Style.TEXT_DIM, tags=tag)
+            self.filmstrip.tag_bind(tag, '<Button-1>', lambda e, idx=i: self.show_session_image(idx))
+            x += w + 2 * pad
+
+        self.filmstrip.configure(scrollregion=(0, 0, x, ImageSession.THUMB_HEIGHT + 28))
+
+    def analyze_metadata(self, data=None):
+        if not self.image_path:
+            return
+
+        self.metadata_info = MetadataManager.get_all_metadata(self.image_path, data)
+        if self.session:
+            self.session.update_metadata(self.image_path, self.metadata_info)
+        self.update_meta_indicator()
+
+    def update_meta_indicator(self):
+        if self.metadata_info:
+            risk = self.metadata_info.get('risk_score', 0)
+            sensibles = len(self.metadata_info.get('sensibles', []))
+            gps = self.metadata_info.get('gps')
+
+            if risk >= 50:
+                color, icon = Style.CRITICAL, "⚠️"
+            elif risk >= 25:
+                color, icon = Style.WARNING, "⚡"
+            else:
+                color, icon = Style.SUCCESS, "✓"
+
+            text = f"{icon} Risque: {risk}/100"
+            if sensibles > 0:
+                text += f" • {sensibles} données sensibles"
+            if gps:
+                text += "\n🌍 GPS DÉTECTÉ !"
+
+            self.meta_indicator.config(text=text, fg=color)
+
+    def show_metadata_report(self):
+        """Rapport de métadonnées - fenêtre agrandie"""
+        if not self.image_path:
+            messagebox.showwarning("Aucune image", "Chargez d'abord une image")
+            return
+
+        if not self.metadata_info:
+            self.analyze_metadata()
+
+        report = self.metadata_info
+
+        win = tk.Toplevel(self.root)
+        win.title("🔍 Rapport de sécurité - Métadonnées")
+        win.configure(bg=Style.BG)
+
+        # Fenêtre plus grande
+        win_w, win_h = 850, 700
+        x = (win.winfo_screenwidth() - win_w) // 2
+        y = (win.winfo_screenheight() - win_h) // 2
+        win.geometry(f"{win_w}x{win_h}+{x}+{y}")
+
+        # Scrollable
+        canvas = tk.Canvas(win, bg=Style.BG, highlightthickness=0)
+        scrollbar = tk.Scrollbar(win, orient='vertical', command=canvas.yview)
+        frame = tk.Frame(canvas, bg=Style.BG, padx=35, pady=25)
+
+        frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=frame, anchor='nw', width=win_w - 40)
+        canvas.configure(yscrollcommand=scrollbar.set)
+
+        scrollbar.pack(side='right', fill='y')
+        canvas.pack(side='left', fill='both', expand=True)
+
+        # Titre
+        tk.Label(frame, text="🔍 RAPPORT DE SÉCURITÉ", font=(Style.FONT, 20, 'bold'),
+                fg=Style.ACCENT, bg=Style.BG).pack(anchor='w', pady=(0, 20))
+
+        # Score
+        risk = report.get('risk_score', 0)
+        if risk >= 50:
+            risk_color, risk_text = Style.CRITICAL, "CRITIQUE"
+        elif risk >= 25:
+            risk_color, risk_text = Style.WARNING, "ÉLEVÉ"
+        else:
+            risk_color, risk_text = Style.SUCCESS, "FAIBLE"
+
+        risk_frame = tk.Frame(frame, bg=Style.BG_PANEL, padx=25, pady=20)
+        risk_frame.pack(fill='x', pady=(0, 20))
+
+        tk.Label(risk_frame, text=f"Score de risque : {risk}/100 — {risk_text}",
+                font=(Style.FONT, 16, 'bold'), fg=risk_color, bg=Style.BG_PANEL).pack(anchor='w')
+
+        # GPS
+        if report.get('gps'):
+            gps = report['gps']
+            gps_frame = tk.Frame(frame, bg=Style.CRITICAL, padx=3, pady=3)
+            gps_frame.pack(fill='x', pady=15)
+
+            gps_inner = tk.Frame(gps_frame, bg=Style.BG_PANEL, padx=20, pady=15)
+            gps_inner.pack(fill='x')
+
+            tk.Label(gps_inner, text="🌍 POSITION GPS DÉTECTÉE", font=(Style.FONT, 14, 'bold'),
+                    fg=Style.CRITICAL, bg=Style.BG_PANEL).pack(anchor='w')
+            tk.Label(gps_inner, text=gps['display'], font=(Style.FONT_MONO, 12),
+                    fg=Style.TEXT, bg=Style.BG_PANEL).pack(anchor='w', pady=8)
+
+            tk.Button(gps_inner, text="🗺️ Voir sur la carte", font=(Style.FONT, 11),
+                     fg=Style.BLACK, bg=Style.ORANGE, relief='flat', cursor='hand2',
+                     padx=15, pady=6, command=lambda: webbrowser.open(gps['osm'])).pack(anchor='w')
+
+        # Données sensibles
+        sensibles = report.get('sensibles', [])
+        if sensibles:
+            tk.Label(frame, text=f"\n⚠️ DONNÉES SENSIBLES ({len(sensibles)})",
+                    font=(Style.FONT, 14, 'bold'), fg=Style.WARNING, bg=Style.BG).pack(anchor='w')
+
+            for item in sensibles:
+                tk.Label(frame, text=f"  {item['label']}: {item['value'][:60]}",
+                        font=(Style.FONT, 11), fg=Style.TEXT_DIM, bg=Style.BG).pack(anchor='w', pady=2)
+
+        # Données cachées
+        hidden = report.get('hidden_data', [])
+        if hidden:
+            tk.Label(frame, text=f"\n🔎 DONNÉES CACHÉES ({len(hidden)})",
+                    font=(Style.FONT, 14, 'bold'), fg=Style.PINK, bg=Style.BG).pack(anchor='w')
+
+            for item in hidden:
+                tk.Label(frame, text=f"  {item}", font=(Style.FONT, 11),
+                        fg=Style.TEXT_DIM, bg=Style.BG).pack(anchor='w', pady=2)
+
+        # Toutes métadonnées
+        all_tags = report.get('all_tags', {})
+        if all_tags:
+            tk.Label(frame, text=f"\n📋 TOUTES LES MÉTADONNÉES ({len(all_tags)})",
+                    font=(Style.FONT, 14, 'bold'), fg=Style.CYAN, bg=Style.BG).pack(anchor='w')
+
+            tags_frame = tk.Frame(frame, bg=Style.BG_PANEL, padx=15, pady=15)
+            tags_frame.pack(fill='x', pady=10)
+
+            for i, (tag, value) in enumerate(list(all_tags.items())[:25]):
+                tk.Label(tags_frame, text=f"{tag}: {value[:70]}", font=(Style.FONT, 10),
+                        fg=Style.TEXT_DIM, bg=Style.BG_PANEL, anchor='w').pack(anchor='w', pady=1)
+
+            if len(all_tags) > 25:
+                tk.Label(tags_frame, text=f"... et {len(all_tags) - 25} autres",
+                        font=(Style.FONT, 10), fg=Style.TEXT_MUTED, bg=Style.BG_PANEL).pack(anchor='w')
+
+        # Boutons
+        btn_frame = tk.Frame(frame, bg=Style.BG)
+        btn_frame.pack(pady=25)
+
+        tk.Button(btn_frame, text="🧹 Tout nettoyer", font=(Style.FONT, 12, 'bold'),
+                 fg=Style.BLACK, bg=Style.SECONDARY, relief='flat', cursor='hand2',
+                 padx=25, pady=10, command=lambda: [self.clean_metadata_now(), win.destroy()]).pack(side='left', padx=10)
+
+        tk.Button(btn_frame, text="Fermer", font=(Style.FONT, 12),
+                 fg=Style.TEXT, bg=Style.BG_PANEL, relief='flat', cursor='hand2',
+                 padx=25, pady=10, command=win.destroy).pack(side='left', padx=10)
+
+        canvas.bind_all('<MouseWheel>', lambda e: canvas.yview_scroll(int(-1 * (e.delta / 120)), 'units'))
+
+    def clean_metadata_now(self):
+        if not self.image_path:
+            messagebox.showwarning("Aucune image", "Chargez d'abord une image")
+            return
+
+        if messagebox.askyesno("Confirmation", "Supprimer TOUTES les métadonnées ?\n\nUne sauvegarde sera créée."):
+            try:
+                # Écriture atomique, sauvegarde par lien physique (pas de copie)
+                result = MetadataManager.clean_in_place(self.image_path, profile=self.profile_var.get())
+
+                if result['success']:
+                    self.analyze_metadata()
+                    messagebox.showinfo("Succès", f"✅ Métadonnées supprimées !\n\nSauvegarde : {Path(result['backup']).name}")
+                else:
+                    messagebox.showerror("Erreur", result['message'])
+            except Exception as e:
+                messagebox.showerror("Erreur", str(e))
+
+    def display_image(self):
+        if self.image_processed is None:
+            return
+
+        # Nouvelle image de travail : nouvelle pyramide (niveaux construits à la demande)
+        if self.pyramid is None or self.pyramid.base is not self.image_processed:
+            self.pyramid = TilePyramid(self.image_processed)
+            self.tile_photos.clear()
+
+        if self.fit_mode:
+            self.fit_view()
+        self.render_view()
+
+    def canvas_size(self):
+        self.canvas.update_idletasks()
+        return max(self.canvas.winfo_width(), 400), max(self.canvas.winfo_height(), 300)
+
+    def fit_zoom(self):
+        canvas_w, canvas_h = self.canvas_size()
+        img_h, img_w = self.image_processed.shape[:2]
+        return min(canvas_w / img_w, canvas_h / img_h, 1.0)
+
+    def fit_view(self):
+        canvas_w, canvas_h = self.canvas_size()
+        img_h, img_w = self.image_processed.shape[:2]
+        self.zoom = self.fit_zoom()
+        self.offset_x = (canvas_w - int(img_w * self.zoom)) // 2
+        self.offset_y = (canvas_h - int(img_h * self.zoom)) // 2
+
+    def render_view(self):
+        """Affiche les seules tuiles visibles, au niveau de la pyramide adapté au zoom"""
+        if self.image_processed is None or self.pyramid is None:
+            return
+
+        # Les zones sont en coordonnées pleine résolution
+        self.scale_ratio = self.zoom * self.proxy_scale
+
+        canvas_w, canvas_h = self.canvas_size()
+        level = self.pyramid.level_for(self.zoom)
+        factor = 2 ** level
+        lvl_h, lvl_w = self.pyramid.level(level).shape[:2]
+        cols, rows = self.pyramid.grid(level)
+        span = TilePyramid.TILE * factor * self.zoom  # taille d'une tuile à l'écran
+
+        tx0 = max(0, int(-self.offset_x // span))
+        ty0 = max(0, int(-self.offset_y // span))
+        tx1 = min(cols, int((canvas_w - self.offset_x) // span) + 1)
+        ty1 = min(rows, int((canvas_h - self.offset_y) // span) + 1)
+
+        self.canvas.delete("all")
+        visible = []
+
+        for ty in range(ty0, ty1):
+            for tx in range(tx0, tx1):
+                # Bords calculés depuis la grille pour éviter les jointures
+                x1 = int(round(self.offset_x + tx * span))
+                y1 = int(round(self.offset_y + ty * span))
+                x2 = int(round(self.offset_x + min((tx + 1) * TilePyramid.TILE, lvl_w) * factor * self.zoom))
+                y2 = int(round(self.offset_y + min((ty + 1) * TilePyramid.TILE, lvl_h) * factor * self.zoom))
+                if x2 <= x1 or y2 <= y1:
+                    continue
+
+                photo = self.tile_photo(level, tx, ty, x2 - x1, y2 - y1)
+                visible.append(photo)
+                self.canvas.create_image(x1, y1, anchor=tk.NW, image=photo, tags="tiles")
+
+        self.image_display = visible
+        self.draw_boxes()
+
+    def tile_photo(self, level, tx, ty, w, h):
+        """Tuile convertie pour Tk, mise en cache tant qu'elle n'a pas changé"""
+        serial, rgb = self.pyramid.tile(level, tx, ty)
+        key = (serial, w, h)
+        photo = self.tile_photos.get(key)
+        if photo is not None:
+            self.tile_photos.move_to_end(key)
+            return photo
+
+        if (w, h) != (rgb.shape[1], rgb.shape[0]):
+            interpolation = cv2.INTER_NEAREST if w > rgb.shape[1] else cv2.INTER_AREA
+            rgb = cv2.resize(rgb, (w, h), interpolation=interpolation)
+        photo = ImageTk.PhotoImage(Image.fromarray(rgb))
+
+        self.tile_photos[key] = photo
+        while len(self.tile_photos) > 512:
+            self.tile_photos.popitem(last=False)
+        return photo
+
+    # === ZOOM / DÉPLACEMENT ===
+
+    def zoom_at(self, factor, cx, cy):
+        """Zoom autour d'un point du canevas (qui reste fixe)"""
+        if self.image_processed is None:
+            return
+
+        new_zoom = min(max(self.zoom * factor, self.fit_zoom()), 8.0)
+        if new_zoom == self.zoom:
+            return
+
+        px = (cx - self.offset_x) / self.zoom
+        py = (cy - self.offset_y) / self.zoom
+        self.zoom = new_zoom
+        self.offset_x = cx - px * new_zoom
+        self.offset_y = cy - py * new_zoom
+        self.fit_mode = False
+        self.render_view()
+        self.update_status(f"Zoom {self.scale_ratio * 100:.0f} % — Ctrl+0 pour ajuster")
+
+    def zoom_by(self, factor):
+        canvas_w, canvas_h = self.canvas_size()
+        self.zoom_at(factor, canvas_w / 2, canvas_h / 2)
+
+    def zoom_fit(self):
+        if self.image_processed is None:
+            return
+        self.fit_mode = True
+        self.display_image()
+
+    def on_canvas_wheel(self, event):
+        if getattr(event, 'num', None) == 5 or getattr(event, 'delta', 0) < 0:
+            self.zoom_at(0.8, event.x, event.y)
+        else:
+            self.zoom_at(1.25, event.x, event.y)
+        return "break"
+
+    def start_pan(self, event):
+        self.pan_start = (event.x, event.y, self.offset_x, self.offset_y)
+
+    def do_pan(self, event):
+        if self.pan_start is None or self.image_processed is None:
+            return
+        sx, sy, ox, oy = self.pan_start
+        self.offset_x = ox + event.x - sx
+        self.offset_y = oy + event.y - sy
+        self.fit_mode = False
+        self.render_view()
+
+    def end_pan(self, event):
+        self.pan_start = None
+
+    def draw_boxes(self):
+        self.canvas.delete("boxes")
+
+        for (x, y, w, h) in self.faces_detected:
+            x1 = int(x * self.scale_ratio) + self.offset_x
+            y1 = int(y * self.scale_ratio) + self.offset_y
+            x2 = int((x + w) * self.scale_ratio) + self.offset_x
+            y2 = int((y + h) * self.scale_ratio) + self.offset_y
+            self.canvas.create_rectangle(x1, y1, x2, y2, outline=Style.SECONDARY, width=2, tags="boxes")
+
+        for (x, y, w, h) in self.manual_boxes:
+            x1 = int(x * self.scale_ratio) + self.offset_x
+            y1 = int(y * self.scale_ratio) + self.offset_y
+            x2 = int((x + w) * self.scale_ratio) + self.offset_x
+            y2 = int((y + h) * self.scale_ratio) + self.offset_y
+            self.canvas.create_rectangle(x1, y1, x2, y2, outline=Style.ORANGE, width=2, tags="boxes")
+
+    def on_canvas_press(self, event):
+        if self.image_original is None:
+            return
+        if self.mode.get() != "manual":
+            self.start_pan(event)
+            return
+        self.start_x = event.x
+        self.start_y = event.y
+        self.current_rect = None
+
+    def on_canvas_drag(self, event):
+        if self.image_original is None:
+            return
+        if self.mode.get() != "manual":
+            self.do_pan(event)
+            return
+        if self.current_rect:
+            self.canvas.delete(self.current_rect)
+        self.current_rect = self.canvas.create_rectangle(
+            self.start_x, self.start_y, event.x, event.y,
+            outline=Style.ACCENT, width=2, dash=(4, 4)
+        )
+
+    def on_canvas_release(self, event):
+        if self.image_original is None:
+            return
+        if self.mode.get() != "manual":
+            self.end_pan(event)
+            return
+        if self.current_rect:
+            self.canvas.delete(self.current_rect)
+
+        x1 = int((min(self.start_x, event.x) - self.offset_x) / self.scale_ratio)
+        y1 = int((min(self.start_y, event.y) - self.offset_y) / self.scale_ratio)
+        x2 = int((max(self.start_x, event.x) - self.offset_x) / self.scale_ratio)
+        y2 = int((max(self.start_y, event.y) - self.offset_y) / self.scale_ratio)
+
+        if x2 - x1 > 10 and y2 - y1 > 10:
+            w, h = self.image_size
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(w, x2), min(h, y2)
+
+            self.manual_boxes.append((x1, y1, x2 - x1, y2 - y1))
+            self.update_counter()
+            self.apply_blur()
+
+    def detect_faces(self):
+        if self.image_original is None:
+            messagebox.showwarning("Aucune image", "Chargez d'abord une image")
+            return
+
+        self.update_status("Détection en cours...")
+        self.root.update()
+
+        # Première passe sur l'aperçu, boîtes remises à la pleine résolution
+        report = {}
+        self.faces_detected = FaceDetector.detect(self.image_original, self.proxy_scale, report=report,
+                                                  **self.detection_options())
+        self.detection_done = True
+
+        self.update_counter()
+
+        scanned = ""
+        if report.get('pixels_total') and not report['fallback']:
+            scanned = f" — {100 * report['pixels_scanned'] / report['pixels_total']:.0f} % de l'image analysée"
+        skipped = AnytimeScan.describe(report['anytime']) if 'anytime' in report else ""
+        if skipped:
+            scanned += f" — passes sautées : {skipped}"
+        if self.faces_detected:
+            self.update_status(f"{len(self.faces_detected)} visage(s) détecté(s){scanned}")
+            self.apply_blur()
+        elif skipped:
+            # Détection partielle : le résultat négatif ne vaut que pour les passes exécutées
+            self.update_status(f"Aucun visage — détection partielle, passes sautées : {skipped}")
+            messagebox.showinfo("Détection", "Aucun visage détecté, mais la détection est partielle "
+                                f"(passes sautées : {skipped}).\n\nDécochez « Réponse en "
+                                f"{AnytimeScan.INTERACTIVE * 1000:.0f} ms au plus » pour une détection complète, "
+                                "ou utilisez le mode manuel (▸ DÉTECTION)")
+        else:
+            self.update_status("Aucun visage — Mode manuel recommandé")
+            messagebox.showinfo("Détection", "Aucun visage détecté.\n\nUtilisez le mode manuel (▸ DÉTECTION)")
+
+    def apply_blur(self):
+        if self.image_original is None:
+            return
+
+        boxes = self.faces_detected + self.manual_boxes
+        if self.image_processed is None or self.image_processed.shape != self.image_original.shape:
+            self.image_processed = self.image_original.copy()
+            self.rendered_boxes = []
+
+        # On ne restaure et ne retraite que les zones, pas l'image entière
+        shape = self.image_processed.shape
+        previous = [Effects.region(b, self.proxy_scale, shape) for b in self.rendered_boxes]
+        for rect in previous:
+            if rect:
+                x1, y1, x2, y2 = rect
+                self.image_processed[y1:y2, x1:x2] = self.image_original[y1:y2, x1:x2]
+
+        Effects.apply(self.image_processed, boxes, self.effect_var.get(), self.intensity_var.get(), self.proxy_scale)
+        self.rendered_boxes = list(boxes)
+
+        if self.pyramid is not None and self.pyramid.base is self.image_processed:
+            regions = previous + [Effects.region(b, self.proxy_scale, shape) for b in boxes]
+            self.pyramid.update([rect for rect in regions if rect])
+
+        self.display_image()
+
+    def render_full_resolution(self):
+        """Image finale : décodage pleine résolution (alpha et 16 bits compris) puis effets.
+
+        Retourne (image, échelle par rapport à la pleine résolution) : un
+        JPEG au-delà du budget mémoire est décodé réduit (`export_factor`).
+        """
+        image = ImageLoader.load_full(self.image_path, self.image_data, self.export_factor)
+        if image is None:
+            raise IOError("Impossible de relire l'image en pleine résolution")
+
+        scale = image.shape[1] / self.image_size[0] if self.export_factor > 1 else 1.0
+        Effects.apply(
+            image, self.faces_detected + self.manual_boxes,
+            self.effect_var.get(), self.intensity_var.get(), scale
+        )
+        return image, scale
+
+    def verify_export(self, output, scale=1.0):
+        """Recherche de visages résiduels hors des zones avant l'écriture.
+
+        Propose de masquer ceux qui sont trouvés (modifie `output` sur place)
+        et retourne une ligne de résumé pour le message de confirmation.
+        `scale` ramène les boîtes pleine résolution à `output`.
+        """
+        self.update_status("Vérification des zones non masquées...")
+        self.root.update()
+
+        check = FaceDetector.verify_residual(output, self.faces_detected + self.manual_boxes, scale)
+        residual = check['residual']
+        if not residual:
+            return "✅ Aucun visage résiduel détecté"
+
+        # Signalement sur le canevas
+        for (x, y, w, h) in residual:
+            self.canvas.create_rectangle(
+                int(x * self.scale_ratio) + self.offset_x, int(y * self.scale_ratio) + self.offset_y,
+                int((x + w) * self.scale_ratio) + self.offset_x, int((y + h) * self.scale_ratio) + self.offset_y,
+                outline=Style.HIGHLIGHT, width=2, dash=(6, 3), tags="boxes"
+            )
+
+        if messagebox.askyesno("Visages résiduels",
+                               f"⚠️ {len(residual)} visage(s) possible(s) hors des zones masquées.\n\n"
+                               "Les masquer avant d'enregistrer ?"):
+            self.faces_detected = self.faces_detected + list(residual)
+            self.detection_done = True
+            self.update_counter()
+            self.apply_blur()
+            Effects.apply(output, residual, self.effect_var.get(), self.intensity_var.get(), scale)
+            return f"✅ {len(residual)} visage(s) résiduel(s) masqué(s)"
+        return f"⚠️ {len(residual)} visage(s) résiduel(s) non masqué(s)"
+
+    def undo_last_box(self):
+        if self.manual_boxes:
+            self.manual_boxes.pop()
+        elif self.faces_detected:
+            self.faces_detected.pop()
+        else:
+            return
+
+        self.update_counter()
+        self.apply_blur()
+        self.update_status("Zone annulée")
+
+    def reset_image(self):
+        if self.image_original is not None:
+            self.image_processed = self.image_original.copy()
+            self.rendered_boxes = []
+            self.faces_detected = []
+            self.manual_boxes = []
+            self.update_counter()
+            self.display_image()
+            self.update_status("Image réinitialisée")
+
+    def save_image(self):
+        if self.image_processed is None:
+            messagebox.showwarning("Aucune image", "Aucune image à sauvegarder")
+            return
+
+        default_name = f"bal_masque_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+
+        path = filedialog.asksaveasfilename(
+            defaultextension=".png",
+            initialfile=default_name,
+            filetypes=[("PNG (recommandé)", "*.png"), ("JPEG", "*.jpg"), ("WebP", "*.webp"), ("TIFF", "*.tif")]
+        )
+
+        if path:
+            try:
+                self.update_status("Export en pleine résolution...")
+                self.root.update()
+                output, scale = self.render_full_resolution()
+                verification = self.verify_export(output, scale)
+                if self.export_factor > 1:
+                    verification += f"\n⚠️ Exportée réduite 1/{self.export_factor} (budget mémoire)"
+                # Encodage unique : l'image reconstruite ne porte aucune métadonnée
+                ExportProfiles.save(output, path, self.profile_var.get())
+
+                if self.metadata_enabled.get():
+                    check = MetadataManager.get_all_metadata(path)
+                    if 'error' not in check and not check.get('sensibles'):
+                        messagebox.showinfo("Succès", f"✅ Image sauvegardée :\n{path}\n\n✅ Métadonnées supprimées\n{verification}")
+                    else:
+                        messagebox.showwarning("Attention", f"Sauvegardée mais erreur métadonnées")
+                else:
+                    messagebox.showinfo("Succès", f"Image sauvegardée :\n{path}\n\n{verification}")
+
+                self.update_status(f"Sauvegardé : {Path(path).name}")
+            except Exception as e:
+                messagebox.showerror("Erreur", str(e))
+
+
+def main(argv=None):
+    """Point d'entrée : interface graphique sans argument, sinon ligne de commande"""
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        FaceDetector.load_presets()
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Préréglages de détection ignorés : {e}")
+
+    if not argv:
+        MemoryBudget.configure_pillow()
+        BalMasque()
+        return 0
+
+    parser = argparse.ArgumentParser(prog="bal_masque", description="🎭 Bal Masqué — anonymisation hors-ligne")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # Options de traitement communes à `batch`, `watch` et `archive`
+    processing = argparse.ArgumentParser(add_help=False)
+    processing.add_argument("--effect", choices=["pixelate", "blur", "black"], default="pixelate")
+    processing.add_argument("--intensity", type=int, default=20)
+    processing.add_argument("--no-metadata-check", action="store_true",
+                            help="Ne pas contrôler les métadonnées des sorties (elles sont toujours ré-encodées sans)")
+    processing.add_argument("--verify", choices=["off", "flag", "redact"], default="flag",
+                            help="Recherche de visages résiduels après masquage : signaler ou masquer")
+    processing.add_argument("--profile", choices=list(ExportProfiles.PROFILES), default=ExportProfiles.DEFAULT,
+                            help="Profil d'export (vitesse / taille)")
+    processing.add_argument("--rotations", action="store_true",
+                            help="Chercher aussi les visages inclinés (±20°, ±40°)")
+    processing.add_argument("--preset", choices=list(FaceDetector.PRESETS), default=FaceDetector.DEFAULT_PRESET,
+                            help="Préréglage de détection (vitesse / rappel)")
+    processing.add_argument("--prefilter", action="store_true",
+                            help="Limiter la détection aux zones candidates (peau, texture)")
+    processing.add_argument("--deadline", type=float, metavar="MS",
+                            help="Échéance de détection par image, en ms (ex. 500) : passes fines sautées au besoin")
+    processing.add_argument("--partial-jpeg", action="store_true",
+                            help="JPEG : ne ré-encoder que les blocs masqués, le reste est recopié à l'identique")
+    processing.add_argument("--memory-budget", type=int, default=MemoryBudget.BUDGET // 2**20,
+                            help="Mémoire allouée à une image (Mo) : au-delà, traitement par bandes, réduit ou refus")
+    processing.add_argument("--max-megapixels", type=float, default=MemoryBudget.MAX_PIXELS / 1e6,
+                            help="Images refusées au-delà de ce nombre de mégapixels")
+
+    batch = commands.add_parser("batch", parents=[processing], help="Traiter toutes les images d'un dossier")
+    batch.add_argument("input", help="Dossier d'images source")
+    batch.add_argument("output", help="Dossier de sortie")
+    batch.add_argument("--no-dedup", action="store_true",
+                       help="Détecter sur chaque image, même dans les rafales")
+    batch.add_argument("--workers", type=int, default=1,
+                       help="Nombre de processus de traitement (chacun lit lui-même ses fichiers)")
+    batch.add_argument("--restart", action="store_true",
+                       help="Tout retraiter, sans reprendre là où le lot précédent s'est arrêté")
+
+    watch = commands.add_parser("watch", parents=[processing],
+                                help="Surveiller un dossier de dépôt et traiter les images à leur arrivée")
+    watch.add_argument("input", help="Dossier de dépôt surveillé")
+    watch.add_argument("output", help="Dossier de sortie")
+    watch.add_argument("--debounce", type=float, default=FolderWatcher.DEBOUNCE,
+                       help="Secondes sans modification avant de traiter un fichier")
+    watch.add_argument("--poll", action="store_true", help="Scruter le dossier au lieu d'utiliser inotify")
+    watch.add_argument("--interval", type=float, default=FolderWatcher.POLL_INTERVAL,
+                       help="Intervalle de scrutation (secondes)")
+    watch.add_argument("--queue-size", type=int, default=FolderWatcher.QUEUE_SIZE,
+                       help="Nombre maximal d'images en attente de traitement")
+
+    archive = commands.add_parser("archive", parents=[processing],
+                                  help="Anonymiser une archive ZIP / TAR vers une nouvelle archive, sans extraction")
+    archive.add_argument("input", help="Archive source (.zip, .tar, .tar.gz, .tar.bz2, .tar.xz)")
+    archive.add_argument("output", help="Archive à produire (format d'après l'extension)")
+    archive.add_argument("--others", choices=["keep", "drop"], default="keep",
+                         help="Fichiers qui ne sont pas des images : recopier ou écarter")
+    archive.add_argument("--workers", type=int, default=None,
+                         help="Nombre d'images traitées en parallèle (par défaut : nombre de cœurs)")
+
+    clean = commands.add_parser("clean", help="Supprimer les métadonnées sur place (écriture atomique)")
+    clean.add_argument("paths", nargs="+", help="Images ou dossiers")
+    clean.add_argument("--profile", choices=list(ExportProfiles.PROFILES), default=ExportProfiles.DEFAULT)
+    clean.add_argument("--no-backup", action="store_true", help="Ne garder aucune sauvegarde")
+    clean.add_argument("--backup-dir", help="Dossier central de sauvegardes (au lieu des fichiers .backup)")
+    clean.add_argument("--retention-days", type=int, default=30,
+                       help="Durée de conservation dans le dossier central (jours)")
+
+    tune = commands.add_parser("tune", help="Calculer les préréglages de détection sur des images annotées")
+    tune.add_argument("dataset", help="Dossier d'images contenant labels.json")
+    tune.add_argument("--output", default=str(FaceDetector.PRESETS_FILE),
+                      help="Fichier de préréglages à écrire (chargé au démarrage)")
+    tune.add_argument("--scale-factors", type=lambda s: [float(v) for v in s.split(',')],
+                      help="Valeurs de scaleFactor, ex. 1.05,1.1,1.2")
+    tune.add_argument("--min-neighbors", type=lambda s: [int(v) for v in s.split(',')],
+                      help="Valeurs de minNeighbors, ex. 3,5,8")
+    tune.add_argument("--min-sizes", type=lambda s: [int(v) for v in s.split(',')],
+                      help="Tailles minimales (pixels de l'aperçu), ex. 20,30,40")
+
+    bench = commands.add_parser("bench-export", help="Comparer les profils d'export sur une image")
+    bench.add_argument("image", help="Image de test")
+
+    args = parser.parse_args(argv)
+
+    if args.command in ("batch", "watch", "archive"):
+        MemoryBudget.configure_pillow(int(args.max_megapixels * 1e6))
+        detect_options = {'rotation_sweep': args.rotations, 'preset': args.preset, 'prefilter': args.prefilter}
+        if args.deadline:
+            detect_options['deadline'] = args.deadline / 1000  # sans échéance, l'empreinte des manifestes est inchangée
+        processor = BatchProcessor(
+            effect=args.effect, intensity=args.intensity,
+            check_metadata=not args.no_metadata_check, dedup=args.command == "batch" and not args.no_dedup,
+            verify=args.verify, profile=args.profile,
+            detect_options=detect_options,
+            partial_jpeg=args.partial_jpeg, memory_budget=args.memory_budget * 2**20,
+            max_pixels=int(args.max_megapixels * 1e6),
+            workers=args.workers if args.command == "batch" else 1, resume=not getattr(args, 'restart', False)
+        )
+        if args.command == "archive":
+            try:
+                stats = ArchiveProcessor(processor, others=args.others, workers=args.workers).run(args.input, args.output)
+            except (OSError, ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+                print(f"✗ {e}")
+                return 1
+            return 1 if stats['errors'] else 0
+        if args.command == "watch":
+            watcher = FolderWatcher(args.input, args.output, processor, debounce=args.debounce, poll=args.poll,
+                                    poll_interval=args.interval, queue_size=args.queue_size)
+            # Arrêt propre aussi en service (systemd, kill)
+            signal.signal(signal.SIGTERM, lambda *_: watcher.stop())
+            try:
+                watcher.run()
+            except KeyboardInterrupt:
+                return 130  # second Ctrl+C : arrêt sans attendre la fin du fichier
+            return 0
+        stats = processor.run(args.input, args.output)
+        return 1 if stats['errors'] else 0
+
+    if args.command == "clean":
+        store = BackupStore(args.backup_dir, args.retention_days) if args.backup_dir else None
+        if store:
+            purged = store.purge()
+            if purged:
+                print(f"{purged} jour(s) de sauvegardes expirés supprimés")
+
+        errors = 0
+        for target in args.paths:
+            target = Path(target)
+            if target.is_dir():
+                files = sorted(p for p in target.rglob('*') if p.is_file() and p.suffix.lower() in ImageSession.EXTENSIONS)
+            else:
+                files = [target]
+
+            for path in files:
+                result = MetadataManager.clean_in_place(path, profile=args.profile,
+                                                        backup=not args.no_backup, backup_store=store)
+                if result['success']:
+                    print(f"✓ {path}")
+                else:
+                    errors += 1
+                    print(f"✗ {path} : {result['message']}")
+        return 1 if errors else 0
+
+    if args.command == "tune":
+        tuner = DetectorTuner(args.dataset, grid={
+            'scale_factor': args.scale_factors,
+            'min_neighbors': args.min_neighbors,
+            'min_size': args.min_sizes,
+        })
+        report = tuner.run()
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        print(f"\nPréréglages écrits dans {args.output}")
+        for name, row in report['presets'].items():
+            print(f"  {name:<9} scaleFactor={row['scale_factor']} minNeighbors={row['min_neighbors']} "
+                  f"minSize={row['min_size']} — rappel {row['recall']:.2f}, précision {row['precision']:.2f}, "
+                  f"{row['ms_per_mp']:.0f} ms/Mpx")
+        return 0
+
+    if args.command == "bench-export":
+        image = ImageLoader.load_full(args.image)
+        if image is None:
+            print(f"Impossible de charger {args.image}")
+            return 1
+        h, w = image.shape[:2]
+        print(f"{Path(args.image).name} : {w}x{h}")
+        print(f"{'Profil':<10} {'Format':<6} {'Temps (ms)':>11} {'Taille (Ko)':>12}")
+        for row in ExportProfiles.benchmark(image):
+            print(f"{row['profile']:<10} {row['format']:<6} {row['time_ms']:>11.1f} {row['size'] / 1024:>12.1f}")
+        return 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
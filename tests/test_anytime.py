@@ -0,0 +1,45 @@
+"""Détection à échéance (AnytimeScan) : le temps imparti est tenu sur une grande image."""
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bal_masque import AnytimeScan, FaceDetector  # noqa: E402
+
+
+def textured(width=2048, height=1536, seed=0):
+    """Texture multi-échelle déterministe : coûteuse pour les cascades, comme une photo chargée"""
+    rng = np.random.default_rng(seed)
+    image = np.zeros((height, width), np.float32)
+    for octave in range(1, 8):
+        side = 2 ** octave
+        layer = rng.random((max(2, height * side // width), side), dtype=np.float32)
+        image += cv2.resize(layer, (width, height), interpolation=cv2.INTER_CUBIC) / octave
+    image = cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+
+@pytest.fixture(scope="module")
+def large_image():
+    image = textured()
+    FaceDetector.detect(image, deadline=0.2)  # cascades chargées hors mesure
+    return image
+
+
+@pytest.mark.parametrize("rotation_sweep", [False, True])
+@pytest.mark.parametrize("deadline", [AnytimeScan.INTERACTIVE, 1.5, 4.0])
+def test_deadline_is_met(large_image, deadline, rotation_sweep):
+    report = {}
+    start = time.perf_counter()
+    FaceDetector.detect(large_image, deadline=deadline, rotation_sweep=rotation_sweep, report=report)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed <= deadline
+    anytime = report['anytime']
+    assert anytime['passes_done'][0] == 'coarse'
+    assert anytime['complete'] == (not anytime['passes_skipped'] and not anytime.get('angles_skipped'))